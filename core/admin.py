@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Item, Bill, BillItem, InventoryLog, Customer, Vendor, ActivityLog, PurchaseRecord, VendorPayment
+from .metrics import invalidate_dashboard_metrics
+from .catalogue import invalidate_item_catalogue
+from .customers import invalidate_customer_lookup
+from .rollups import bill_dates, reconcile_sales_rollup
+from .periods import invalidate_period_reports
 
 
 class BillItemInline(admin.TabularInline):
@@ -31,10 +36,23 @@ class BillAdmin(admin.ModelAdmin):
 	customer_display.admin_order_field = 'customer__customer_name'
 
 	def mark_as_paid(self, request, queryset):
+		dates = bill_dates(queryset)
 		updated = queryset.update(payment_status='PAID')
+		invalidate_dashboard_metrics()
+		invalidate_period_reports()
+		# queryset.update() skips Bill.save, so rebuild the affected rollup days
+		reconcile_sales_rollup(dates)
 		self.message_user(request, f"{updated} bill(s) marked as PAID")
 	mark_as_paid.short_description = 'Mark selected bills as PAID'
 
+	# "Delete selected" uses queryset.delete(), which skips Bill.delete
+	def delete_queryset(self, request, queryset):
+		dates = bill_dates(queryset)
+		super().delete_queryset(request, queryset)
+		invalidate_dashboard_metrics()
+		invalidate_period_reports()
+		reconcile_sales_rollup(dates)
+
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
@@ -43,6 +61,11 @@ class CustomerAdmin(admin.ModelAdmin):
 	list_editable = ('contact_number', 'email_id')
 	ordering = ('customer_name',)
 
+	# Bulk deletes bypass Customer.delete()
+	def delete_queryset(self, request, queryset):
+		super().delete_queryset(request, queryset)
+		invalidate_customer_lookup()
+
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
@@ -52,6 +75,11 @@ class ItemAdmin(admin.ModelAdmin):
 	list_filter = ('is_active',)
 	list_per_page = 50
 
+	# list_editable rows go through Item.save(); bulk deletes bypass Item.delete()
+	def delete_queryset(self, request, queryset):
+		super().delete_queryset(request, queryset)
+		invalidate_item_catalogue()
+
 
 @admin.register(Vendor)
 class VendorAdmin(admin.ModelAdmin):
@@ -82,5 +110,12 @@ class VendorPaymentAdmin(admin.ModelAdmin):
     list_filter = ('status', 'approval_status', 'date')
 
 
-admin.site.register(User, UserAdmin)
-admin.site.register(InventoryLog)
\ No newline at end of file
+@admin.register(InventoryLog)
+class InventoryLogAdmin(admin.ModelAdmin):
+    # Bulk deletes bypass InventoryLog.delete()
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_dashboard_metrics()
+
+
+admin.site.register(User, UserAdmin)
\ No newline at end of file
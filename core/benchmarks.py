@@ -0,0 +1,166 @@
+import platform
+import subprocess
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import RequestCost, percentile
+from .models import Bill, BillItem, Customer, InventorySession, InventorySessionItem, InventorySessionPayment, Item, PurchaseRecord, Vendor
+
+
+@dataclass
+class Case:
+    """One timed request. `prepare` returns (path, data) just before each run; `writes` runs are rolled back."""
+    name: str
+    method: str
+    prepare: object
+    writes: bool = False
+
+
+def _get(url_name, query=''):
+    return lambda user: (reverse(url_name) + query, None)
+
+
+def _create_outer_bill(user):
+    item = Item.objects.filter(is_active=True).order_by('pk').first()
+    customer = Customer.objects.order_by('pk').first()
+    return reverse('create_bill_outer'), {
+        'customer': customer.pk, 'payment_type': 'CASH', 'advance_payment': '0', 'payment_status': 'PENDING',
+        'delivery_date': timezone.localdate().isoformat(), 'remarks': 'benchmark',
+        'items-TOTAL_FORMS': '1', 'items-INITIAL_FORMS': '0',
+        'items-0-item': item.pk, 'items-0-quantity': '2', 'items-0-price': str(item.price),
+    }
+
+
+def _balanced_session(user, outlet='MOBILE_1', lines=5):
+    session = InventorySession.objects.create(outlet_name=outlet, created_by=user, payment_status='PAID')
+    items = list(Item.objects.order_by('pk')[:lines])
+    InventorySessionItem.objects.bulk_create(
+        InventorySessionItem(session=session, item=item, quantity_taken=3, quantity_returned=1) for item in items
+    )
+    total = sum((item.price * 2 for item in items), Decimal(0))
+    InventorySessionPayment.objects.create(session=session, payment_type='CASH', amount=total)
+    return session
+
+
+def _close_session(user):
+    return reverse('close_inventory_session', args=[_balanced_session(user).pk]), {}
+
+
+def _close_day(user):
+    for outlet in ('MOBILE_1', 'MOBILE_2', 'MOBILE_3'):
+        _balanced_session(user, outlet)
+    return reverse('close_inventory_day'), {'date': timezone.localdate().isoformat()}
+
+
+CASES = [
+    Case('dashboard', 'GET', _get('dashboard')),
+    Case('dashboard_search', 'GET', _get('dashboard', '?q=customer')),
+    Case('billing_home', 'GET', _get('billing_home')),
+    Case('bill_list', 'GET', _get('bill_list')),
+    Case('bill_list_filtered', 'GET', _get('bill_list', '?payment_status=PENDING&bill_type=SALES')),
+    Case('bill_list_search', 'GET', _get('bill_list', '?q=customer')),
+    Case('invoice_list', 'GET', _get('invoice_list')),
+    Case('inventory_list', 'GET', _get('inventory_list')),
+    Case('sales_report', 'GET', _get('sales_report')),
+    Case('financial_report', 'GET', _get('financial_report')),
+    Case('create_bill_form', 'GET', _get('create_bill_sales')),
+    Case('create_bill', 'POST', _create_outer_bill, writes=True),
+    Case('close_inventory_session', 'POST', _close_session, writes=True),
+    Case('close_inventory_day', 'POST', _close_day, writes=True),
+    Case('export_bills_csv', 'GET', _get('export_bills', '?format=csv')),
+    Case('export_bills_pdf', 'GET', _get('export_bills', '?format=pdf'), writes=True),
+    Case('invoice_export', 'GET', _get('invoice_export', '?format=csv')),
+    Case('export_vendors', 'GET', _get('export_vendors')),
+    Case('export_purchases', 'GET', _get('export_purchases')),
+    Case('export_pending_purchases', 'GET', _get('export_pending_purchases')),
+]
+
+
+def _request(client, case, user):
+    """Run one case; returns (status, wall ms, queries, db ms). Streaming exports are read to the end."""
+    cost = RequestCost()
+    path, data = case.prepare(user)
+    with connection.execute_wrapper(cost):
+        start = time.perf_counter()
+        response = client.get(path) if case.method == 'GET' else client.post(path, data)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        elapsed = time.perf_counter() - start
+    return response.status_code, elapsed * 1000, cost.queries, cost.db_time * 1000
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(user, repeat=5, only=None, log=None):
+    """
+    Time every case in CASES (or those named in `only`) `repeat` times as `user`
+    through the test client against the configured database, and return the results
+    with the environment they were taken in. The first run of each case is reported
+    separately (cold caches). Writing cases run inside a transaction that is rolled
+    back, so the data is the same for every run and every commit.
+    """
+    log = log or (lambda message: None)
+    client = Client()
+    client.force_login(user)
+    results = {}
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for case in CASES:
+            if only and case.name not in only:
+                continue
+            runs = []
+            for _ in range(repeat):
+                if case.writes:
+                    with transaction.atomic():
+                        runs.append(_request(client, case, user))
+                        transaction.set_rollback(True)
+                else:
+                    runs.append(_request(client, case, user))
+            times = [ms for _, ms, _, _ in runs[1:]] or [runs[0][1]]
+            results[case.name] = {
+                'status': runs[-1][0],
+                'runs': len(runs),
+                'first_ms': round(runs[0][1], 2),
+                'p50_ms': round(percentile(times, 0.5), 2),
+                'p95_ms': round(percentile(times, 0.95), 2),
+                'queries': runs[-1][2],
+                'db_ms': round(percentile([db for _, _, _, db in runs], 0.5), 2),
+            }
+            log(f"{case.name:<28} {results[case.name]['p50_ms']:>9.1f} ms  {results[case.name]['queries']:>4} queries")
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'taken_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'repeat': repeat,
+            'rows': {model.__name__: model.objects.count() for model in (Bill, BillItem, Customer, Item, InventorySession, PurchaseRecord, Vendor)},
+        },
+        'results': results,
+    }
+
+
+def compare_results(before, after):
+    """[(case, before p50 ms, after p50 ms, change %, before queries, after queries)] for cases in both runs."""
+    rows = []
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old:
+            change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+            rows.append((name, old['p50_ms'], new['p50_ms'], round(change, 1), old['queries'], new['queries']))
+    return rows
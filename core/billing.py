@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import BillItem, BillPayment
+from .printing import invalidate_bill_invoice
+
+PAYMENT_FIELDS = ['payment_type', 'amount', 'reference_number']
+
+
+def line_key(item_id, custom_item_name, price):
+    # Same grouping as the bill forms: one line per catalogue item (or custom name) and price
+    name = f'item:{item_id}' if item_id else f'custom:{(custom_item_name or "").strip()}'
+    return (name, Decimal(price).quantize(Decimal('0.01')))
+
+
+class BillWriter:
+    """
+    Saves a validated BillForm together with its grouped lines and payments.
+
+    Everything happens in one transaction: the total is computed before the bill row
+    is written, lines and payments go in with bulk_create, and when editing only the
+    lines that changed are inserted, updated or deleted. `lines` are the aggregated
+    dicts built by the views: {'item', 'custom_item_name', 'price', 'quantity'}.
+    """
+
+    def __init__(self, form, lines, payment_formset=None):
+        self.form = form
+        self.lines = list(lines)
+        self.payment_formset = payment_formset
+
+    @property
+    def total(self):
+        return sum((Decimal(line['price']) * line['quantity'] for line in self.lines), Decimal('0'))
+
+    def save(self, **fields):
+        """Save the bill; `fields` are set on it first (e.g. bill_type, created_by on create)."""
+        with transaction.atomic():
+            bill = self.form.save(commit=False)
+            for name, value in fields.items():
+                setattr(bill, name, value)
+            editing = bill.pk is not None
+            bill.total_amount = self.total
+            bill.save()
+            self.form.save_m2m()  # student_employees
+            if editing:
+                self._update_lines(bill)
+            else:
+                BillItem.objects.bulk_create(self._new_line(bill, line) for line in self.lines)
+            if self.payment_formset is not None:
+                self._save_payments(bill)
+        # Bulk writes skip BillItem/BillPayment.save, so drop the cached invoice here
+        invalidate_bill_invoice(bill.pk)
+        return bill
+
+    @staticmethod
+    def _new_line(bill, line):
+        return BillItem(
+            bill=bill,
+            item=line['item'],
+            custom_item_name=line['custom_item_name'] or None,
+            quantity=line['quantity'],
+            price=line['price'],
+        )
+
+    def _update_lines(self, bill):
+        existing = {}
+        stale = []
+        for row in bill.items.all():
+            key = line_key(row.item_id, row.custom_item_name, row.price)
+            if key in existing:
+                stale.append(row.pk)  # duplicates left by older edits are merged away
+            else:
+                existing[key] = row
+
+        created, changed = [], []
+        for line in self.lines:
+            row = existing.pop(line_key(line['item'].pk if line['item'] else None, line['custom_item_name'], line['price']), None)
+            if row is None:
+                created.append(self._new_line(bill, line))
+            elif row.quantity != line['quantity']:
+                row.quantity = line['quantity']
+                changed.append(row)
+
+        stale.extend(row.pk for row in existing.values())
+        if stale:
+            BillItem.objects.filter(pk__in=stale).delete()
+        if changed:
+            BillItem.objects.bulk_update(changed, ['quantity'])
+        if created:
+            BillItem.objects.bulk_create(created)
+
+    def _save_payments(self, bill):
+        formset = self.payment_formset
+        payments = formset.save(commit=False)
+        for payment in payments:
+            payment.bill = bill
+        BillPayment.objects.bulk_create(p for p in payments if p.pk is None)
+        changed = [p for p in payments if p.pk is not None]
+        if changed:
+            BillPayment.objects.bulk_update(changed, PAYMENT_FIELDS)
+        deleted = [p.pk for p in formset.deleted_objects if p.pk is not None]
+        if deleted:
+            BillPayment.objects.filter(pk__in=deleted).delete()
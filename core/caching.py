@@ -0,0 +1,33 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version(name):
+    """Current value of a shared version counter, used to invalidate derived caches in every worker."""
+    key = f'core:version:{name}'
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so a cleared cache never reuses a version a worker already holds
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    key = f'core:version:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(name):
+    """
+    bump_version() now, so this worker sees its own write, and again once the current
+    transaction commits, so no other worker can cache the old rows under the new version
+    in between. Outside a transaction both bumps happen immediately.
+    """
+    bump_version(name)
+    transaction.on_commit(lambda: bump_version(name))
@@ -0,0 +1,45 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import get_version, bump_version_on_commit
+from .models import Item
+
+
+def invalidate_item_catalogue():
+    # Called whenever items are written (model save/delete, admin bulk delete)
+    bump_version_on_commit('item_catalogue')
+
+
+def get_item_catalogue_version():
+    return get_version('item_catalogue')
+
+
+def item_catalogue(active_only=False):
+    """
+    The item list used by the bill and inventory session forms, built once per catalogue version.
+
+    Returns a dict with `items` (Item instances in id order), `choices` (for the item
+    selects, including the empty choice) and `json`, the body served by the
+    item_catalogue endpoint: {"items": [{"id", "name", "price"}, ...]}. Cached for
+    ITEM_CATALOGUE_CACHE_TIMEOUT seconds; any item change starts a new version, so
+    edits show up on the next render.
+    """
+    scope = 'active' if active_only else 'all'
+    key = f"core:item_catalogue:{get_item_catalogue_version()}:{scope}"
+    catalogue = cache.get(key)
+    if catalogue is not None:
+        return catalogue
+
+    items = Item.objects.order_by('id')
+    if active_only:
+        items = items.filter(is_active=True)
+    items = list(items)
+    catalogue = {
+        'items': items,
+        'choices': [('', '---------')] + [(item.pk, str(item)) for item in items],
+        'json': json.dumps({'items': [{'id': item.id, 'name': item.name, 'price': str(item.price)} for item in items]}),
+    }
+    cache.set(key, catalogue, getattr(settings, 'ITEM_CATALOGUE_CACHE_TIMEOUT', 60 * 60))
+    return catalogue
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import get_version, bump_version_on_commit
+from .models import Customer
+
+
+def invalidate_customer_lookup():
+    # Called whenever customers are written (model save/delete, admin bulk delete)
+    bump_version_on_commit('customer_lookup')
+
+
+def get_customer_version():
+    return get_version('customer_lookup')
+
+
+def _limit():
+    return getattr(settings, 'CUSTOMER_LOOKUP_LIMIT', 20)
+
+
+def customer_suggestions(term):
+    """
+    The first CUSTOMER_LOOKUP_LIMIT customers whose name (or, for digits, contact
+    number) starts with `term`, as [{"id", "text"}] rows for the form's type-ahead.
+
+    Each branch is a prefix range scan on its own index, so the cost depends on the
+    limit, not on the number of customers. Results are cached per prefix for
+    CUSTOMER_LOOKUP_CACHE_TIMEOUT seconds; any customer change starts a new version.
+    """
+    term = ' '.join(term.split()).lower()
+    if not term:
+        return []
+    key = f"core:customer_lookup:{get_version('customer_lookup')}:{term}"
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    limit = _limit()
+    rows = list(Customer.objects.filter(customer_name__istartswith=term)
+                .order_by('customer_name', 'id').values_list('id', 'customer_name', 'contact_number')[:limit])
+    if term.replace('+', '').isdigit():
+        seen = {row[0] for row in rows}
+        rows += [row for row in Customer.objects.filter(contact_number__startswith=term)
+                 .order_by('contact_number', 'id').values_list('id', 'customer_name', 'contact_number')[:limit]
+                 if row[0] not in seen]
+        rows = rows[:limit]
+    results = [{'id': pk, 'text': f"{name} ({contact})" if contact else name} for pk, name, contact in rows]
+    cache.set(key, results, getattr(settings, 'CUSTOMER_LOOKUP_CACHE_TIMEOUT', 60 * 5))
+    return results
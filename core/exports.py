@@ -0,0 +1,105 @@
+import csv
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.http import StreamingHttpResponse
+
+from .models import Bill
+from .pagination import iter_keyset
+
+EXPORT_CHUNK_SIZE = 2000
+
+IST = ZoneInfo('Asia/Kolkata')
+BILL_TYPE_LABELS = dict(Bill.BILL_TYPES)
+PAYMENT_STATUS_LABELS = dict(Bill.PAYMENT_STATUS)
+
+
+class Echo:
+    """File-like object whose write() hands the formatted CSV line back to the caller."""
+    def write(self, value):
+        return value
+
+
+def csv_stream_response(filename, rows):
+    """
+    Stream `rows` (any iterable of lists) as a CSV download.
+
+    Lines are produced lazily while the response is sent, so the first bytes go out
+    immediately and memory stays flat however many rows are exported.
+    """
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _ist(value):
+    return value.astimezone(IST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _bill_customer(row):
+    return row['customer__customer_name'] or row['customer_name'] or ''
+
+
+def bill_rows(qs):
+    yield ['Invoice', 'Type', 'Customer', 'Created By', 'Created At (IST)', 'Total', 'Payment Status']
+    fields = ['invoice_number', 'bill_type', 'customer__customer_name', 'customer_name',
+              'created_by__username', 'created_at', 'total_amount', 'payment_status']
+    for row in iter_keyset(qs, fields, EXPORT_CHUNK_SIZE):
+        yield [row['invoice_number'], BILL_TYPE_LABELS.get(row['bill_type'], row['bill_type']), _bill_customer(row),
+               row['created_by__username'], _ist(row['created_at']), str(row['total_amount']),
+               PAYMENT_STATUS_LABELS.get(row['payment_status'], row['payment_status'])]
+
+
+def invoice_rows(qs):
+    yield ['Invoice', 'Date (IST)', 'Customer', 'Bill Type', 'Total', 'Advance', 'Payment Type', 'Payment Status', 'Created By']
+    fields = ['invoice_number', 'created_at', 'customer__customer_name', 'customer_name', 'bill_type',
+              'total_amount', 'advance_payment', 'payment_type', 'payment_status', 'created_by__username']
+    for row in iter_keyset(qs, fields, EXPORT_CHUNK_SIZE):
+        yield [row['invoice_number'], _ist(row['created_at']), _bill_customer(row),
+               BILL_TYPE_LABELS.get(row['bill_type'], row['bill_type']), str(row['total_amount']),
+               str(row['advance_payment']), row['payment_type'],
+               PAYMENT_STATUS_LABELS.get(row['payment_status'], row['payment_status']), row['created_by__username']]
+
+
+def vendor_rows(qs):
+    # S.no, Name, A/c Holder’s Name, Name of the Bank, Account Number, Ifsc Code, Branch, Mobile Number
+    yield ['S.no', 'Name', 'A/c Holder\'s Name', 'Name of the Bank', 'Account Number', 'Ifsc Code', 'Branch', 'Mobile Number']
+    fields = ['name', 'account_holder_name', 'bank_name', 'ac_number', 'ifsc_code', 'branch', 'contact']
+    for idx, row in enumerate(iter_keyset(qs.order_by('id'), fields, EXPORT_CHUNK_SIZE), 1):
+        yield [idx, *(row[f] for f in fields)]
+
+
+def purchase_rows(qs):
+    # Headers: S.no, Purchase Order ID, Vendor Name, Bill No, Ordered Date, Received Date, Amount, Payment Status, Payment Date
+    yield ['S.no', 'Purchase Order ID', 'Vendor Name', 'Bill No', 'Ordered Date', 'Received Date', 'Amount', 'Payment Status', 'Payment Date']
+    fields = ['purchase_order_id', 'vendor__name', 'bill_no', 'ordered_date', 'received_date',
+              'total_amount', 'payment_status', 'payment_date']
+    grand_total = Decimal(0)
+    for idx, row in enumerate(iter_keyset(qs, fields, EXPORT_CHUNK_SIZE), 1):
+        yield [idx, row['purchase_order_id'], row['vendor__name'], row['bill_no'], row['ordered_date'],
+               row['received_date'], row['total_amount'],
+               PAYMENT_STATUS_LABELS.get(row['payment_status'], row['payment_status']), row['payment_date']]
+        grand_total += row['total_amount']
+
+    yield []
+    # Grand Total Row
+    yield ['', '', '', '', '', 'Grand Total', '', '']
+    yield ['', '', '', '', '', grand_total, '', '']
+
+
+def pending_purchase_rows(qs, title):
+    yield [title]
+    yield []
+    # S.no, purchase order , Name, A/c Holder’s Name, Name of the Bank, Account Number, IFSC Code, Branch, Mobile Number, Total Amount to Pay
+    yield ['S.no', 'Purchase Order', 'Name', 'A/c Holder\'s Name', 'Name of the Bank', 'Account Number', 'IFSC Code', 'Branch', 'Mobile Number', 'Total Amount to Pay']
+    vendor_fields = ['vendor__account_holder_name', 'vendor__bank_name', 'vendor__ac_number',
+                     'vendor__ifsc_code', 'vendor__branch', 'vendor__contact']
+    fields = ['purchase_order_id', 'vendor__name', *vendor_fields, 'total_amount']
+    grand_total = Decimal(0)
+    for idx, row in enumerate(iter_keyset(qs, fields, EXPORT_CHUNK_SIZE), 1):
+        yield [idx, row['purchase_order_id'], row['vendor__name'], *(row[f] or '' for f in vendor_fields), row['total_amount']]
+        grand_total += row['total_amount']
+
+    yield []
+    yield ['', '', '', '', '', '', '', '', 'Grand Total', grand_total]
@@ -0,0 +1,123 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from .models import Bill, InventorySession
+from .search import filter_bills
+
+IST = ZoneInfo('Asia/Kolkata')
+
+
+def parse_local_date(value):
+    # Accepts 'YYYY-MM-DD' (or a full ISO datetime) from the filter forms; invalid input is ignored
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def local_day_start(day):
+    return datetime.combine(day, time.min, tzinfo=IST)
+
+
+class BillQuery:
+    """
+    The bill_type / payment_status / date range / q filters shared by the billing,
+    bill list, invoice list and export views.
+
+    The q search box goes through core.search (invoice prefix or indexed search text).
+    Dates are whole days in Asia/Kolkata turned into an aware half-open range
+    [start 00:00, day after end 00:00) on `created_at`, so the index on created_at
+    can be used and the end date is inclusive. Related rows used by the list
+    templates are always fetched up front.
+    """
+    SORT_ORDERS = {
+        'date_desc': ('-created_at', '-id'),
+        'date_asc': ('created_at', 'id'),
+        'amount_desc': ('-total_amount', '-id'),
+        'amount_asc': ('total_amount', 'id'),
+        'invoice_desc': ('-invoice_number',),
+        'invoice_asc': ('invoice_number',),
+    }
+
+    def __init__(self, params, search=True):
+        self.bill_type = params.get('bill_type')
+        self.payment_status = params.get('payment_status')
+        self.start_date = params.get('start_date')
+        self.end_date = params.get('end_date')
+        self.sort_by = params.get('sort_by', 'date_desc')
+        if self.sort_by not in self.SORT_ORDERS:
+            self.sort_by = 'date_desc'
+        self.q = params.get('q') if search else None
+
+    def filter(self, qs):
+        if self.bill_type:
+            qs = qs.filter(bill_type=self.bill_type)
+        if self.payment_status:
+            qs = qs.filter(payment_status=self.payment_status)
+        start = parse_local_date(self.start_date)
+        if start:
+            qs = qs.filter(created_at__gte=local_day_start(start))
+        end = parse_local_date(self.end_date)
+        if end:
+            qs = qs.filter(created_at__lt=local_day_start(end + timedelta(days=1)))
+        if self.q:
+            qs = filter_bills(qs, self.q)
+        return qs
+
+    def queryset(self, user=None):
+        """Filtered, ordered bills; pass `user` to restrict to bills they created."""
+        qs = Bill.objects.all()
+        if user is not None:
+            qs = qs.filter(created_by=user)
+        qs = self.filter(qs).order_by(*self.SORT_ORDERS[self.sort_by])
+        return qs.select_related('customer', 'created_by').prefetch_related('student_employees')
+
+    def context(self):
+        return {
+            'filter_bill_type': self.bill_type,
+            'filter_payment_status': self.payment_status,
+            'filter_start_date': self.start_date,
+            'filter_end_date': self.end_date,
+            'sort_by': self.sort_by,
+            'q': self.q,
+        }
+
+
+class InventorySessionQuery:
+    """
+    The status / outlet / date range filters of the inventory session list. Dates
+    are whole IST days on `created_at`, as in BillQuery; newest sessions come first.
+    """
+
+    def __init__(self, params):
+        self.status = params.get('status')
+        self.outlet_name = params.get('outlet_name')
+        self.start_date = params.get('start_date')
+        self.end_date = params.get('end_date')
+
+    def filter(self, qs):
+        if self.status:
+            qs = qs.filter(status=self.status)
+        if self.outlet_name:
+            qs = qs.filter(outlet_name=self.outlet_name)
+        start = parse_local_date(self.start_date)
+        if start:
+            qs = qs.filter(created_at__gte=local_day_start(start))
+        end = parse_local_date(self.end_date)
+        if end:
+            qs = qs.filter(created_at__lt=local_day_start(end + timedelta(days=1)))
+        return qs
+
+    def queryset(self):
+        qs = self.filter(InventorySession.objects.all()).order_by('-created_at', '-id')
+        return qs.select_related('customer', 'created_by').prefetch_related('student_employees')
+
+    def context(self):
+        return {
+            'filter_status': self.status,
+            'filter_outlet_name': self.outlet_name,
+            'filter_start_date': self.start_date,
+            'filter_end_date': self.end_date,
+        }
@@ -1,8 +1,10 @@
 from django import forms
 # Force reload
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from .models import User, Bill, BillItem, Item, InventoryLog, Customer, Vendor, PurchaseRecord, VendorPayment, BillPayment, InventorySession, InventorySessionItem, InventorySessionPayment
+from .catalogue import item_catalogue
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta:
@@ -68,12 +70,21 @@ class ItemForm(forms.ModelForm):
         model = Item
         fields = '__all__'
 
-class BillForm(forms.ModelForm):
+class CustomerLookupMixin:
+    # Only the selected customer is rendered as an <option>; the rest come from the customer_lookup endpoint
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields['customer']
+        selected = self.data.get(self.add_prefix('customer')) if self.is_bound else self.initial.get('customer')
+        customers = field.queryset.filter(pk=selected) if str(selected or '').isdigit() else []
+        field.widget.choices = [('', field.empty_label)] + [(c.pk, str(c)) for c in customers]
+
+class BillForm(CustomerLookupMixin, forms.ModelForm):
     class Meta:
         model = Bill
         fields = ['customer', 'outlet_name', 'payment_type', 'advance_payment', 'advance_payment_type', 'payment_status', 'remarks', 'delivery_date', 'student_employees']
         widgets = {
-            'customer': forms.Select(attrs={'class': 'form-select'}),
+            'customer': forms.Select(attrs={'class': 'form-select customer-lookup', 'data-lookup-url': reverse_lazy('customer_lookup')}),
             'outlet_name': forms.Select(attrs={'class': 'form-select'}),
             'payment_type': forms.Select(attrs={'class': 'form-select'}),
             'advance_payment': forms.NumberInput(attrs={'class': 'form-control'}),
@@ -114,7 +125,13 @@ BillPaymentFormSet = inlineformset_factory(
     extra=0, can_delete=True
 )
 
-class BillItemForm(forms.ModelForm):
+class CatalogueItemChoicesMixin:
+    # Item selects are filled from the cached catalogue instead of one query per rendered row
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['item'].choices = item_catalogue()['choices']
+
+class BillItemForm(CatalogueItemChoicesMixin, forms.ModelForm):
     class Meta:
         model = BillItem
         fields = ['item', 'custom_item_name', 'quantity', 'price']
@@ -154,6 +171,8 @@ class InventoryLogForm(forms.ModelForm):
 class InventorySessionForm(forms.ModelForm):
     class Meta:
         model = InventorySession
+        # InventorySession.customer is not edited here, so this form renders no customer
+        # select; add it with the bill forms' customer_lookup type-ahead if it ever is
         fields = ['outlet_name', 'student_employees', 'payment_status']
         widgets = {
             'outlet_name': forms.Select(attrs={'class': 'form-select'}),
@@ -176,7 +195,7 @@ InventorySessionPaymentFormSet = inlineformset_factory(
     extra=0, can_delete=True
 )
 
-class InventorySessionItemForm(forms.ModelForm):
+class InventorySessionItemForm(CatalogueItemChoicesMixin, forms.ModelForm):
     class Meta:
         model = InventorySessionItem
         fields = ['item', 'quantity_taken', 'quantity_returned']
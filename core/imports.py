@@ -0,0 +1,206 @@
+import codecs
+import csv
+import os
+from contextlib import nullcontext
+from itertools import chain, islice
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .catalogue import invalidate_item_catalogue
+from .customers import invalidate_customer_lookup
+from .forms import ItemForm, CustomerForm, VendorForm
+from .models import Bill, Item, Customer, Vendor
+from .search import refresh_search_text
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except Exception:
+    OPENPYXL_AVAILABLE = False
+
+FALSE_VALUES = {'no', 'n', 'off', 'inactive'}
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported (unknown format, missing required columns)."""
+
+
+class MasterDataImporter:
+    """
+    Bulk import of one master-data model from spreadsheet rows.
+
+    Rows are cleaned with the fields of `form` (the same rules as the create/edit
+    pages) and deduplicated on the natural `key`. With `upsert` (a unique index on
+    `key`) a chunk is written with one bulk_create(update_conflicts=True); otherwise
+    rows whose key already exists are bulk_update()d and the rest bulk_create()d.
+    Rows with a blank key are always new. Only the columns present in the file are
+    written, so an omitted optional column keeps the model default / current value.
+    """
+
+    def __init__(self, model, form, key, upsert=False, invalidate=None):
+        self.model = model
+        self.form = form
+        self.key = key
+        self.upsert = upsert
+        self.invalidate = invalidate
+
+    @property
+    def fields(self):
+        return self.form.base_fields
+
+    def columns(self, header):
+        missing = [name for name, field in self.fields.items() if (field.required or name == self.key) and name not in header]
+        if missing:
+            raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+        return [name for name in self.fields if name in header]
+
+    def clean(self, row, columns):
+        data, errors = {}, []
+        for name in columns:
+            field = self.fields[name]
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+                if isinstance(field, forms.BooleanField) and value.lower() in FALSE_VALUES:
+                    value = False
+            try:
+                data[name] = field.clean(value)
+            except ValidationError as e:
+                errors.append(f"{name}: {' '.join(e.messages)}")
+        return data, errors
+
+    def existing(self, keys):
+        return dict(self.model.objects.filter(**{f'{self.key}__in': keys}).values_list(self.key, 'pk'))
+
+    def write(self, rows, columns, existing):
+        """Write one chunk of cleaned rows; `existing` maps keys already in the table to pks."""
+        update_fields = [name for name in columns if name != self.key]
+        objects = [self.model(**row) for row in rows]
+        if self.upsert:
+            # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target; other backends need it
+            unique_fields = [self.key] if connection.features.supports_update_conflicts_with_target else None
+            self.model.objects.bulk_create(objects, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+            return
+        for obj in objects:
+            obj.pk = existing.get(getattr(obj, self.key) or None)
+        self.model.objects.bulk_create([obj for obj in objects if obj.pk is None])
+        changed = [obj for obj in objects if obj.pk is not None]
+        if changed and update_fields:
+            self.model.objects.bulk_update(changed, update_fields)
+        if self.model is Customer and changed:
+            # Renamed customers: their bills carry the name in search_text
+            refresh_search_text(Bill.objects.filter(customer_id__in=[obj.pk for obj in changed]))
+
+
+IMPORTERS = {
+    'items': MasterDataImporter(Item, ItemForm, key='name', invalidate=invalidate_item_catalogue),
+    'customers': MasterDataImporter(Customer, CustomerForm, key='contact_number', invalidate=invalidate_customer_lookup),
+    'vendors': MasterDataImporter(Vendor, VendorForm, key='vendor_id', upsert=True),
+}
+
+
+class ImportResult:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.duplicates = 0  # rows repeating an earlier key in the file; the last one wins
+        self.error_count = 0
+        self.errors = []  # (line, message), at most IMPORT_MAX_ERRORS of them
+        self.ignored_columns = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < getattr(settings, 'IMPORT_MAX_ERRORS', 200):
+            self.errors.append((line, message))
+
+
+def _header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def _cell(value):
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheet numbers (contact numbers, ids) come back as floats
+        return str(int(value))
+    return '' if value is None else value
+
+
+def read_rows(file, filename):
+    """
+    Yield (line number, {column: value}) from a CSV or XLSX file without loading it
+    into memory. Headers are matched case-insensitively, with spaces as underscores.
+    A file that cannot be decoded or parsed raises ImportFileError, possibly part way
+    through (import_rows then rolls back what it wrote).
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    elif extension == '.xlsx':
+        if not OPENPYXL_AVAILABLE:
+            raise ImportFileError('XLSX import requires `openpyxl` package. Install with `pip install openpyxl`')
+        try:
+            sheet = load_workbook(file, read_only=True, data_only=True).active
+        except Exception as e:  # BadZipFile, InvalidFileException, KeyError for missing parts...
+            raise ImportFileError('The file is not a readable .xlsx workbook') from e
+        reader = ([_cell(value) for value in row] for row in sheet.iter_rows(values_only=True))
+    else:
+        raise ImportFileError('Upload a .csv or .xlsx file')
+
+    line = 1
+    try:
+        header = [_header(name) for name in next(reader, [])]
+        for line, values in enumerate(reader, start=2):
+            if any(str(value).strip() for value in values):
+                yield line, dict(zip(header, values))
+    except UnicodeDecodeError as e:
+        raise ImportFileError(f'Line {line + 1}: the file is not UTF-8 text; save it as "CSV UTF-8" and upload it again') from e
+    except csv.Error as e:
+        raise ImportFileError(f'Line {line + 1}: the file is not valid CSV ({e})') from e
+
+
+def import_rows(kind, rows, dry_run=False):
+    """
+    Validate and write `rows` (from read_rows) for one of IMPORTERS, IMPORT_CHUNK_SIZE
+    rows at a time inside one transaction, so memory stays flat whatever the file
+    size. Invalid rows are reported and skipped; the others are imported. A dry run
+    validates and counts (one key lookup per chunk) but writes nothing.
+    """
+    importer = IMPORTERS[kind]
+    result = ImportResult(dry_run)
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return result
+    columns = importer.columns(first[1])
+    result.ignored_columns = [name for name in first[1] if name not in importer.fields]
+
+    rows = chain([first], rows)
+    chunk_size = getattr(settings, 'IMPORT_CHUNK_SIZE', 1000)
+    seen = set()  # keys already imported from earlier chunks
+    with nullcontext() if dry_run else transaction.atomic():
+        while chunk := list(islice(rows, chunk_size)):
+            batch, unkeyed = {}, []
+            for line, row in chunk:
+                data, errors = importer.clean(row, columns)
+                if errors:
+                    result.add_error(line, '; '.join(errors))
+                elif not data[importer.key]:
+                    unkeyed.append(data)
+                else:
+                    if data[importer.key] in batch or data[importer.key] in seen:
+                        result.duplicates += 1
+                    batch[data[importer.key]] = data
+            existing = importer.existing(list(batch)) if batch else {}
+            new_keys = [key for key in batch if key not in seen]
+            result.updated += sum(key in existing for key in new_keys)
+            result.created += sum(key not in existing for key in new_keys) + len(unkeyed)
+            seen.update(batch)
+            if not dry_run:
+                importer.write(list(batch.values()) + unkeyed, columns, existing)
+    if not dry_run and importer.invalidate:
+        importer.invalidate()
+    return result
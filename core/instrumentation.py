@@ -0,0 +1,150 @@
+import logging
+import math
+import re
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.requests')
+
+# Most queries one GET of each view may issue, checked by core/test_instrumentation.py
+# against seeded data and logged as a warning in production when exceeded. The counts
+# must not depend on how many rows a page shows; raise one only with the reason in review.
+QUERY_BUDGETS = {
+    'dashboard': 9,
+    'billing_home': 6,
+    'bill_list': 6,
+    'invoice_list': 7,
+    'inventory_list': 7,
+    'item_list': 5,
+    'customer_list': 5,
+    'vendor_list': 5,
+    'purchase_list': 5,
+    'sales_report': 5,
+    'create_bill_inner': 5,
+    'create_inventory_session': 5,
+    'close_inventory_day': 5,
+}
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+_ROWS = re.compile(r'(\((?:%s, )*%s\))(?:, \((?:%s, )*%s\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """The shape of a query: its SQL with IN lists and multi-row VALUES collapsed (parameters are never in it)."""
+    sql = _SPACE.sub(' ', sql.strip())
+    sql = _ROWS.sub(r'\1, ...', sql)
+    return _IN_LIST.sub('(...)', sql)
+
+
+class RequestCost:
+    """Query count, database time and repeated query shapes of one request (an execute_wrapper)."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.wall_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    def duplicates(self, limit=3):
+        """The most repeated query shapes as [(count, sql)]: a loop issuing one query per row shows up here."""
+        return [(count, sql) for sql, count in self.shapes.most_common(limit) if count > 1]
+
+    def server_timing(self):
+        return (f'total;dur={self.wall_time * 1000:.1f}, '
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+                f'app;dur={(self.wall_time - self.db_time) * 1000:.1f}')
+
+
+# Per-process rolling window of (wall ms, queries) per URL name
+_samples = defaultdict(lambda: deque(maxlen=getattr(settings, 'REQUEST_STATS_WINDOW', 1000)))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty sequence."""
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def view_stats(view):
+    """{count, p50/p95/p99 wall ms, p95 queries} over the last REQUEST_STATS_WINDOW requests to `view` in this process."""
+    samples = list(_samples.get(view, ()))
+    if not samples:
+        return None
+    times = [ms for ms, _ in samples]
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(times, 0.5),
+        'p95_ms': percentile(times, 0.95),
+        'p99_ms': percentile(times, 0.99),
+        'p95_queries': percentile([queries for _, queries in samples], 0.95),
+    }
+
+
+def request_stats():
+    """view_stats() for every view seen by this process."""
+    return {view: stats for view in list(_samples) if (stats := view_stats(view))}
+
+
+def reset_request_stats():
+    _samples.clear()
+
+
+class RequestCostMiddleware:
+    """
+    Measure every request: wall time, query count, database time and repeated query
+    shapes, per URL name. Adds a Server-Timing header (REQUEST_SERVER_TIMING, off unless
+    DEBUG), logs one key=value line to `core.requests` (DEBUG, or WARNING when a GET goes
+    over the view's QUERY_BUDGETS entry), keeps rolling percentiles for request_stats() and
+    leaves the RequestCost on `request.request_cost` for tests.
+
+    Only what runs inside the view is measured: the body of a StreamingHttpResponse (the
+    CSV exports) is generated, and queried, after this returns, so those queries are not
+    counted; run_benchmarks() reads streamed bodies to the end to time them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cost = RequestCost()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(cost))
+            response = self.get_response(request)
+        cost.wall_time = time.perf_counter() - start
+        request.request_cost = cost
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unresolved'
+        _samples[view].append((cost.wall_time * 1000, cost.queries))
+        if getattr(settings, 'REQUEST_SERVER_TIMING', settings.DEBUG):
+            response['Server-Timing'] = cost.server_timing()
+
+        budget = QUERY_BUDGETS.get(view) if request.method == 'GET' else None
+        over = budget is not None and cost.queries > budget
+        level = logging.WARNING if over else logging.DEBUG
+        if logger.isEnabledFor(level):
+            duplicates = cost.duplicates()
+            logger.log(
+                level,
+                'view=%s method=%s status=%s wall_ms=%.1f db_ms=%.1f queries=%d budget=%s p95_ms=%.1f duplicates=%s',
+                view, request.method, response.status_code, cost.wall_time * 1000, cost.db_time * 1000, cost.queries,
+                budget if budget is not None else '-', view_stats(view)['p95_ms'],
+                '; '.join(f'{count}x {sql[:120]}' for count, sql in duplicates) or '-',
+            )
+        return response
@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .filters import local_day_start
+from .metrics import invalidate_dashboard_metrics
+from .models import Bill, BillItem, BillPayment, InventorySession, InventorySessionItem, InventorySessionPayment
+from .numbering import INVOICE_SERIES
+from .printing import invalidate_bill_invoice
+from .periods import invalidate_period_reports
+from .rollups import record_new_bills
+from .search import bill_search_text
+from .stock import sync_session_stock, sync_sessions_stock
+
+AMOUNT = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _session_sum(rows, expression, output_field):
+    # Correlated per-session SUM: one subquery on the session_id index, no join fan-out
+    total = rows.filter(session=OuterRef('pk')).order_by().values('session').annotate(total=Sum(expression)).values('total')
+    return Coalesce(Subquery(total, output_field=output_field), Value(0), output_field=output_field)
+
+
+def with_session_totals(sessions):
+    """
+    Annotate an InventorySession queryset with its line and payment totals, in the
+    same query: quantity_taken / quantity_returned / quantity_sold, expected_amount
+    (sold lines at catalogue price, as close_session() bills them), paid_amount and
+    balance (expected minus paid; non-zero means the session cannot be closed yet).
+    """
+    lines = InventorySessionItem.objects.all()
+    sold = lines.filter(quantity_taken__gt=F('quantity_returned'))
+    return sessions.annotate(
+        quantity_taken=_session_sum(lines, 'quantity_taken', IntegerField()),
+        quantity_returned=_session_sum(lines, 'quantity_returned', IntegerField()),
+        quantity_sold=_session_sum(sold, F('quantity_taken') - F('quantity_returned'), IntegerField()),
+        expected_amount=_session_sum(sold, (F('quantity_taken') - F('quantity_returned')) * F('item__price'), AMOUNT),
+        paid_amount=_session_sum(InventorySessionPayment.objects.all(), 'amount', AMOUNT),
+    ).annotate(balance=F('expected_amount') - F('paid_amount'))
+
+
+def session_errors(items, payments):
+    """
+    Why a session with these lines and payments cannot be closed (empty if it can):
+    nothing taken, more returned than taken, or payments not matching the sold total.
+    """
+    if not any(i.quantity_taken > 0 for i in items):
+        return ["Session has no items taken."]
+    errors = [
+        f"Error: Item {i.item.name} has more returned ({i.quantity_returned}) than taken ({i.quantity_taken})"
+        for i in items if i.quantity_returned > i.quantity_taken
+    ]
+    if errors:
+        return errors
+    total_amount = sale_total(items)
+    total_payments = sum((p.amount for p in payments), Decimal(0))
+    if total_payments != total_amount:
+        return [f"Cannot close session: Total Payments (₹{total_payments}) do not match Bill Amount (₹{total_amount}). Please update payment details."]
+    return []
+
+
+def sold_lines(items):
+    return [(i.item, i.quantity_sold) for i in items if i.quantity_sold > 0]
+
+
+def sale_total(items):
+    return sum((qty * item.price for item, qty in sold_lines(items)), Decimal(0))
+
+
+def _sales_bill(session, payments, user):
+    return Bill(
+        bill_type='SALES',
+        created_by=user,
+        outlet_name=session.outlet_name,
+        remarks=f"Generated from Inventory Session #{session.id}",
+        payment_status=session.payment_status,
+        # Default payment type for bill header (can be mixed)
+        payment_type=payments[0].payment_type if payments else 'CASH',
+    )
+
+
+def _copy_to_bills(closing):
+    """Insert the lines, payments and students of [(bill, items, payments, student ids)], one bulk insert each."""
+    BillItem.objects.bulk_create(
+        BillItem(bill=bill, item=item, quantity=qty, price=item.price)
+        for bill, items, _, _ in closing for item, qty in sold_lines(items)
+    )
+    BillPayment.objects.bulk_create(
+        BillPayment(bill=bill, payment_type=p.payment_type, amount=p.amount, reference_number=p.reference_number)
+        for bill, _, payments, _ in closing for p in payments
+    )
+    Students = Bill.student_employees.through
+    Students.objects.bulk_create(
+        Students(bill_id=bill.pk, user_id=user_id)
+        for bill, _, _, student_ids in closing for user_id in student_ids
+    )
+
+
+def close_session(pk, user):
+    """
+    Close an open inventory session into a SALES bill and return (bill, created).
+
+    The session row is locked for the whole close, so two concurrent or repeated
+    requests produce one bill: the second one gets the bill created by the first,
+    with created=False. Lines are priced once from the catalogue, the total is
+    computed before the bill is inserted, and lines, payments and students are
+    copied with one bulk insert each. Raises ValidationError (nothing is written)
+    when the session cannot be closed.
+    """
+    with transaction.atomic():
+        session = InventorySession.objects.select_for_update().get(pk=pk)
+        if session.bill_id:
+            return session.bill, False
+        if session.status == 'CLOSED':
+            raise ValidationError("Session is already closed.")
+
+        items = list(session.items.select_related('item').order_by('id'))
+        payments = list(session.payments.order_by('id'))
+        errors = session_errors(items, payments)
+        if errors:
+            raise ValidationError(errors)
+
+        bill = _sales_bill(session, payments, user)
+        bill.total_amount = sale_total(items)
+        bill.save()
+        _copy_to_bills([(bill, items, payments, session.student_employees.values_list('pk', flat=True))])
+
+        session.status = 'CLOSED'
+        session.bill = bill
+        session.save(update_fields=['status', 'bill'])
+        sync_session_stock(session, user)
+    invalidate_bill_invoice(bill.pk)
+    invalidate_period_reports()  # item quantities come from closed sessions
+    return bill, True
+
+
+def open_sessions(day=None, outlets=None):
+    """OPEN sessions started on `day` (IST) and/or at one of `outlets`, oldest first."""
+    sessions = InventorySession.objects.filter(status='OPEN', bill__isnull=True)
+    if day:
+        sessions = sessions.filter(created_at__gte=local_day_start(day), created_at__lt=local_day_start(day + timedelta(days=1)))
+    if outlets:
+        sessions = sessions.filter(outlet_name__in=outlets)
+    return sessions.order_by('created_at', 'id')
+
+
+def close_sessions(sessions, user):
+    """
+    End-of-day close: validate every OPEN session in `sessions` (a queryset) with the
+    rules of close_session() and close the valid ones together, in one transaction.
+    Returns (closed, rejected): [(session, bill)] and [(session, [error, ...])].
+
+    The sessions are locked, their lines, payments and students read with one query
+    each, invoice numbers reserved with one counter update, and bills, lines,
+    payments, students, session rows, stock movements and sales rollups written
+    with bulk statements, so the query count does not grow with the session count.
+    """
+    with transaction.atomic():
+        sessions = list(sessions.select_for_update().filter(status='OPEN', bill__isnull=True).order_by('created_at', 'id'))
+        items, payments, students = defaultdict(list), defaultdict(list), defaultdict(list)
+        for line in InventorySessionItem.objects.filter(session__in=sessions).select_related('item').order_by('id'):
+            items[line.session_id].append(line)
+        for payment in InventorySessionPayment.objects.filter(session__in=sessions).order_by('id'):
+            payments[payment.session_id].append(payment)
+        Assistants = InventorySession.student_employees.through
+        for session_id, user_id in Assistants.objects.filter(inventorysession__in=sessions).values_list('inventorysession_id', 'user_id'):
+            students[session_id].append(user_id)
+
+        closing, rejected = [], []
+        for session in sessions:
+            errors = session_errors(items[session.pk], payments[session.pk])
+            if errors:
+                rejected.append((session, errors))
+            else:
+                closing.append(session)
+        if not closing:
+            return [], rejected
+
+        bills = []
+        for session, number in zip(closing, INVOICE_SERIES['SALES'].reserve(len(closing))):
+            bill = _sales_bill(session, payments[session.pk], user)
+            bill.invoice_number = number
+            bill.total_amount = sale_total(items[session.pk])
+            bill.search_text = bill_search_text(bill)
+            bills.append(bill)
+        Bill.objects.bulk_create(bills)
+        # MySQL does not return the ids of bulk-inserted rows; the invoice number is unique
+        ids = dict(Bill.objects.filter(invoice_number__in=[b.invoice_number for b in bills]).values_list('invoice_number', 'pk'))
+        for bill in bills:
+            bill.pk = ids[bill.invoice_number]
+        record_new_bills(bills)
+        _copy_to_bills([(bill, items[s.pk], payments[s.pk], students[s.pk]) for s, bill in zip(closing, bills)])
+
+        for session, bill in zip(closing, bills):
+            session.status = 'CLOSED'
+            session.bill = bill
+        InventorySession.objects.bulk_update(closing, ['status', 'bill'])
+        sync_sessions_stock([session.pk for session in closing], user)
+    invalidate_dashboard_metrics()
+    invalidate_period_reports()
+    return list(zip(closing, bills)), rejected
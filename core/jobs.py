@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .filters import BillQuery
+from .models import Bill, ExportJob
+from .pagination import iter_keyset
+
+try:
+    from weasyprint import HTML
+    WEASYPRINT_AVAILABLE = True
+except Exception:
+    WEASYPRINT_AVAILABLE = False
+
+
+def export_root():
+    root = getattr(settings, 'EXPORT_ROOT', settings.BASE_DIR / 'exports')
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def enqueue_bill_pdf_export(user, params):
+    """Record a PDF export request; `manage.py run_export_jobs` renders it in the background."""
+    keys = ['bill_type', 'payment_status', 'start_date', 'end_date', 'sort_by']
+    return ExportJob.objects.create(
+        kind='BILLS_PDF',
+        params={k: params.get(k) for k in keys if params.get(k)},
+        created_by=user,
+    )
+
+
+def requeue_stale_jobs():
+    """Put RUNNING jobs started more than EXPORT_JOB_TIMEOUT seconds ago (their worker died) back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'EXPORT_JOB_TIMEOUT', 60 * 60))
+    return ExportJob.objects.filter(status='RUNNING', started_at__lt=cutoff).update(status='PENDING', started_at=None)
+
+
+def claim_next_job():
+    requeue_stale_jobs()
+    # The conditional UPDATE makes sure two workers never pick the same job
+    for job in ExportJob.objects.filter(status='PENDING').order_by('created_at')[:5]:
+        claimed = ExportJob.objects.filter(pk=job.pk, status='PENDING').update(status='RUNNING', started_at=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def write_pdf(html_string, path):
+    HTML(string=html_string).write_pdf(target=path)
+
+
+def render_bill_pdf_part(job_id, part, bill_ids):
+    """Render one part of a bills export to EXPORT_ROOT and return its file name."""
+    position = {pk: i for i, pk in enumerate(bill_ids)}
+    bills = sorted(Bill.objects.filter(pk__in=bill_ids).select_related('customer', 'created_by'), key=lambda b: position[b.pk])
+    html_string = render_to_string('core/bill_export_pdf.html', {'bills': bills, 'now': datetime.now()})
+    filename = f"bills_job{job_id}_part{part}.pdf"
+    write_pdf(html_string, os.path.join(export_root(), filename))
+    return filename
+
+
+def bill_export_queryset(job):
+    user = job.created_by
+    filters = BillQuery(job.params, search=False)
+    if user.is_supervisor_or_admin() or user.has_module_access('billing'):
+        return filters.queryset()
+    return filters.queryset(user=user)
+
+
+def run_job(job, processes=None):
+    """
+    Render a claimed job. Large exports are split into parts of EXPORT_PDF_BILLS_PER_PART
+    bills, rendered in parallel in a process pool.
+    """
+    per_part = getattr(settings, 'EXPORT_PDF_BILLS_PER_PART', 2000)
+    processes = processes if processes is not None else getattr(settings, 'EXPORT_WORKER_PROCESSES', 2)
+    try:
+        if not WEASYPRINT_AVAILABLE:
+            raise RuntimeError('PDF export requires `weasyprint` package. Install with `pip install weasyprint`')
+        ids = [row['id'] for row in iter_keyset(bill_export_queryset(job), ['id'])]
+        chunks = [ids[i:i + per_part] for i in range(0, len(ids), per_part)] or [[]]
+
+        if processes > 1 and len(chunks) > 1:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as pool:
+                files = list(pool.map(render_bill_pdf_part, [job.id] * len(chunks), range(1, len(chunks) + 1), chunks))
+        else:
+            files = [render_bill_pdf_part(job.id, part, chunk) for part, chunk in enumerate(chunks, 1)]
+
+        job.files = files
+        job.status = 'DONE'
+    except Exception as exc:
+        job.status = 'FAILED'
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['files', 'status', 'error', 'finished_at'])
+    return job
@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.inventory import close_sessions, open_sessions
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = "Close every balanced OPEN inventory session for a day and/or outlets into sales bills (end of day)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username recorded as the creator of the bills')
+        parser.add_argument('--date', help='Sessions started on this day (YYYY-MM-DD, default today)')
+        parser.add_argument('--any-date', action='store_true', help='Every open session, whatever day it started')
+        parser.add_argument('--outlet', action='append', default=[], help='Only this outlet (repeatable)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+            day = None if options['any_date'] else date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']}")
+        except ValueError as e:
+            raise CommandError(e)
+
+        closed, rejected = close_sessions(open_sessions(day, options['outlet']), user)
+        for session, bill in closed:
+            self.stdout.write(f"Closed #{session.pk} {session.outlet_name}: {bill.invoice_number} ({bill.total_amount})")
+        for session, errors in rejected:
+            self.stdout.write(f"Rejected #{session.pk} {session.outlet_name}: {'; '.join(errors)}")
+        self.stdout.write(f"Closed {len(closed)} session(s), rejected {len(rejected)}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Bill, PeriodSnapshot
+from core.periods import financial_year, financial_year_label, freeze_quarter, quarter_bounds
+
+
+class Command(BaseCommand):
+    help = "Freeze closed financial quarters into PeriodSnapshot rows (run after each quarter end, or with --refresh after late corrections)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fy', type=int, help='Only this financial year (start year, e.g. 2025 for 2025-26)')
+        parser.add_argument('--refresh', action='store_true', help='Recompute quarters that are already frozen')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['fy']:
+            years = [options['fy']]
+        else:
+            first = Bill.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            start = financial_year(timezone.localdate(first)) if first else financial_year(today)
+            years = range(start, financial_year(today) + 1)
+
+        frozen = set(PeriodSnapshot.objects.values_list('fy', 'quarter'))
+        for fy in years:
+            for quarter in range(1, 5):
+                if quarter_bounds(fy, quarter)[1] >= today:
+                    continue
+                if (fy, quarter) in frozen and not options['refresh']:
+                    continue
+                report = freeze_quarter(fy, quarter, refresh=True)
+                self.stdout.write(f"FY {financial_year_label(fy)} Q{quarter}: revenue {report['revenue']}, {report['bill_count']} bills")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.synthetic import ShopDataGenerator
+
+
+class Command(BaseCommand):
+    help = "Fill the database with realistic synthetic shop data for volume testing (never run against production)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users-per-role', type=int, default=3)
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--customers', type=int, default=5000)
+        parser.add_argument('--vendors', type=int, default=1000)
+        parser.add_argument('--bills', type=int, default=100000, help='e.g. 2000000 for production-like volume')
+        parser.add_argument('--sessions', type=int, default=5000)
+        parser.add_argument('--purchases', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365, help='Spread the data over this many days up to today')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        generator = ShopDataGenerator(seed=options['seed'], days=options['days'], batch_size=options['batch_size'],
+                                      log=self.stdout.write)
+        generator.run(
+            users_per_role=options['users_per_role'], items=options['items'], customers=options['customers'],
+            vendors=options['vendors'], bills=options['bills'], sessions=options['sessions'],
+            purchases=options['purchases'],
+        )
+        self.stdout.write(f"Done (run tag {generator.tag})")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORTERS, ImportFileError, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import items, customers or vendors from a CSV or XLSX file (columns named like the form fields)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count without writing anything')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_rows(options['kind'], read_rows(file, options['path']), dry_run=options['dry_run'])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(e)
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        prefix = 'Dry run: would create' if result.dry_run else 'Created'
+        self.stdout.write(
+            f"{prefix} {result.created}, update {result.updated}; {result.duplicates} duplicate row(s), "
+            f"{result.error_count} row(s) with errors"
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Bill
+from core.search import refresh_search_text
+
+
+class Command(BaseCommand):
+    help = "Recompute Bill.search_text for every bill (e.g. after customers were edited with queryset.update())."
+
+    def handle(self, *args, **options):
+        count = refresh_search_text(Bill.objects.all())
+        self.stdout.write(f"Refreshed search text on {count} bills")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.stock import rebuild_stock_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild StockMovement and StockBalance from every inventory session and log."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        movements, balances = rebuild_stock_ledger(batch_size=options['batch_size'])
+        self.stdout.write(f"Wrote {movements} stock movements and {balances} balances")
@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Bill
+from core.rollups import reconcile_sales_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild DailySalesRollup rows from the bill table (run nightly, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Reconcile this many days up to and including today')
+        parser.add_argument('--start', help='First date to reconcile (YYYY-MM-DD); overrides --days')
+        parser.add_argument('--end', help='Last date to reconcile (YYYY-MM-DD, default today)')
+        parser.add_argument('--all', action='store_true', help='Reconcile every day since the first bill')
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+            if options['all']:
+                first = Bill.objects.order_by('created_at').values_list('created_at', flat=True).first()
+                start = timezone.localdate(first) if first else end
+            elif options['start']:
+                start = date.fromisoformat(options['start'])
+            else:
+                start = end - timedelta(days=options['days'] - 1)
+        except ValueError as e:
+            raise CommandError(e)
+
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        fixed = reconcile_sales_rollup(days)
+        self.stdout.write(f"Reconciled {len(days)} day(s) from {start} to {end}; corrected {fixed} bucket(s)")
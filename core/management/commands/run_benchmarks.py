@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import CASES, compare_results, run_benchmarks
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = "Time the hot views against the configured database and save the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to run as (default: the first admin)')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--only', action='append', choices=[case.name for case in CASES], help='Run only this case (repeatable)')
+        parser.add_argument('--output', help='JSON file to write (default: BENCHMARK_ROOT/<commit>-<database>-<time>.json)')
+        parser.add_argument('--compare', help='Earlier results JSON to compare against')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username=options['user']) if options['user'] else User.objects.filter(role='ADMIN', is_active=True)
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to run as; pass --user or run generate_shop_data first')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        results = run_benchmarks(user, repeat=options['repeat'], only=options['only'], log=self.stdout.write)
+        if options['output']:
+            path = Path(options['output'])
+        else:
+            stamp = results['meta']['taken_at'][:19].replace(':', '')
+            path = Path(settings.BENCHMARK_ROOT) / f"{results['meta']['commit'] or 'unknown'}-{connection.vendor}-{stamp}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {path}")
+
+        if options['compare']:
+            try:
+                before = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+            self.stdout.write(f"Compared with {before['meta'].get('commit')} ({before['meta'].get('database')}):")
+            for name, old, new, change, old_queries, new_queries in compare_results(before, results):
+                self.stdout.write(f"{name:<28} {old:>9.1f} -> {new:>9.1f} ms ({change:+.1f}%)  queries {old_queries} -> {new_queries}")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Render queued export jobs (e.g. bill PDFs) in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the pending queue and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--processes', type=int, default=None, help='Parallel renderers per job (default EXPORT_WORKER_PROCESSES)')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            job = run_job(job, processes=options['processes'])
+            self.stdout.write(f"{job}: {job.error or ', '.join(job.files)}")
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
+
+from .caching import get_version, bump_version_on_commit
+from .filters import local_day_start
+from .models import Bill, Item, Customer, InventoryLog
+
+
+def invalidate_dashboard_metrics():
+    # Called whenever bills or inventory logs are written; the next dashboard load recomputes
+    bump_version_on_commit('dashboard_metrics')
+
+
+def dashboard_metrics(user, see_all):
+    """
+    Bill metrics and module counts shown on the dashboard.
+
+    All Bill figures come from one conditional-aggregation query. The result is cached
+    per scope (all bills, or one user's own bills for `invoices_count`) for
+    DASHBOARD_CACHE_TIMEOUT seconds, and dropped as soon as a bill, item, customer or
+    inventory log is saved or deleted.
+    """
+    today = timezone.localtime(timezone.now()).date()
+    scope = 'all' if see_all else f'user:{user.pk}'
+    # The module counts follow item and customer writes through those tables' own versions
+    versions = ':'.join(str(get_version(name)) for name in ('dashboard_metrics', 'item_catalogue', 'customer_lookup'))
+    key = f"core:dashboard:{versions}:{today.isoformat()}:{scope}"
+    metrics = cache.get(key)
+    if metrics is not None:
+        return metrics
+
+    today_start = local_day_start(today)
+    tomorrow_start = local_day_start(today + timedelta(days=1))
+    month_start = local_day_start(today.replace(day=1))
+    next_month_start = local_day_start((today.replace(day=1) + timedelta(days=32)).replace(day=1))
+
+    not_cancelled = ~Q(payment_status='CANCELLED')
+    is_today = Q(created_at__gte=today_start, created_at__lt=tomorrow_start)
+    this_month = Q(created_at__gte=month_start, created_at__lt=next_month_start)
+    own = None if see_all else Q(created_by=user)
+
+    metrics = Bill.objects.aggregate(
+        daily_sales=Sum('total_amount', filter=is_today & not_cancelled),
+        pending_payments=Count('id', filter=Q(payment_status='PENDING')),
+        invoices_this_month=Count('id', filter=this_month),
+        sales_this_month=Sum('total_amount', filter=this_month & not_cancelled),
+        cancelled_bills_count=Count('id', filter=Q(payment_status='CANCELLED')),
+        invoices_count=Count('id', filter=own),
+    )
+    metrics['daily_sales'] = metrics['daily_sales'] or 0
+    metrics['sales_this_month'] = metrics['sales_this_month'] or 0
+    metrics['items_count'] = Item.objects.count()
+    metrics['vendors_count'] = Customer.objects.count()
+    metrics['inventory_count'] = InventoryLog.objects.count()
+
+    cache.set(key, metrics, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60))
+    return metrics
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', 'timestamp'], name='activitylog_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['created_at'], name='bill_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['created_by', 'created_at'], name='bill_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['bill_type', 'created_at'], name='bill_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['payment_status', 'created_at'], name='bill_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorysession',
+            index=models.Index(fields=['status', 'created_at'], name='invsession_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserecord',
+            index=models.Index(fields=['payment_status', 'ordered_date'], name='purchase_status_ordered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserecord',
+            index=models.Index(fields=['ordered_date'], name='purchase_ordered_idx'),
+        ),
+    ]
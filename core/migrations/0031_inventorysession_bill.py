@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorysession',
+            name='bill',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_session', to='core.bill'),
+        ),
+    ]
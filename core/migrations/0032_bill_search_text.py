@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+
+
+def fill_search_text(apps, schema_editor):
+    Bill = apps.get_model('core', 'Bill')
+    Customer = apps.get_model('core', 'Customer')
+    customer = Subquery(Customer.objects.filter(pk=OuterRef('customer_id')).values('customer_name')[:1])
+    Bill.objects.update(search_text=Lower(Concat('invoice_number', Value(' '), Coalesce(customer, Value('')), Value(' '), 'customer_name')))
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE core_bill ADD FULLTEXT INDEX bill_search_ft (search_text)')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE core_bill DROP INDEX bill_search_ft')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_inventorysession_bill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='search_text',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:25
+
+from collections import defaultdict
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+
+
+def fill_rollup(apps, schema_editor):
+    Bill = apps.get_model('core', 'Bill')
+    DailySalesRollup = apps.get_model('core', 'DailySalesRollup')
+    ist = ZoneInfo('Asia/Kolkata')
+    buckets = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    fields = ('created_at', 'outlet_name', 'bill_type', 'payment_type', 'payment_status', 'total_amount', 'advance_payment')
+    for created_at, outlet_name, bill_type, payment_type, payment_status, total, advance in Bill.objects.values_list(*fields).iterator(chunk_size=2000):
+        bucket = buckets[(created_at.astimezone(ist).date(), outlet_name or '', bill_type, payment_type, payment_status)]
+        bucket[0] += 1
+        bucket[1] += total
+        bucket[2] += advance
+    DailySalesRollup.objects.bulk_create((
+        DailySalesRollup(date=date, outlet_name=outlet_name, bill_type=bill_type, payment_type=payment_type,
+                         payment_status=payment_status, bill_count=count, total_amount=total, advance_amount=advance)
+        for (date, outlet_name, bill_type, payment_type, payment_status), (count, total, advance) in buckets.items()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_customer_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('outlet_name', models.CharField(blank=True, max_length=50)),
+                ('bill_type', models.CharField(choices=[('INNER', 'Inner Bill'), ('OUTER', 'Outer Bill'), ('SALES', 'Sales Bill')], max_length=10)),
+                ('payment_type', models.CharField(choices=[('UPI', 'UPI'), ('CASH', 'Cash'), ('ONLINE', 'Online'), ('CHEQUE', 'Cheque'), ('CARD', 'Card'), ('NEFT', 'NEFT/IMPS')], max_length=20)),
+                ('payment_status', models.CharField(choices=[('PAID', 'Paid'), ('PENDING', 'Pending'), ('CANCELLED', 'Cancelled')], max_length=10)),
+                ('bill_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('advance_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'outlet_name', 'bill_type', 'payment_type', 'payment_status'), name='unique_daily_sales_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fy', models.PositiveSmallIntegerField()),
+                ('quarter', models.PositiveSmallIntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('bill_count', models.IntegerField(default=0)),
+                ('purchase_spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('purchase_payables', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendor_payments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('items', models.JSONField(blank=True, default=list)),
+                ('frozen_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fy', 'quarter'), name='unique_period_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def _moves(outlet_name, item_id, taken, returned, closed):
+    # Mirrors core.stock.expected_movements
+    moves = [('ISSUE', taken), ('RETURN', -returned)]
+    if closed:
+        moves.append(('SALE', returned - taken))
+    return [(kind, quantity) for kind, quantity in moves if quantity]
+
+
+def fill_ledger(apps, schema_editor):
+    InventorySessionItem = apps.get_model('core', 'InventorySessionItem')
+    InventoryLog = apps.get_model('core', 'InventoryLog')
+    StockMovement = apps.get_model('core', 'StockMovement')
+    StockBalance = apps.get_model('core', 'StockBalance')
+
+    movements = []
+    lines = (InventorySessionItem.objects
+             .values('session_id', 'session__outlet_name', 'session__status', 'session__created_at', 'item_id')
+             .annotate(taken=Sum('quantity_taken'), returned=Sum('quantity_returned')).order_by())
+    for line in lines:
+        for kind, quantity in _moves(line['session__outlet_name'], line['item_id'], line['taken'], line['returned'], line['session__status'] == 'CLOSED'):
+            movements.append(StockMovement(outlet_name=line['session__outlet_name'], item_id=line['item_id'], kind=kind,
+                                           quantity=quantity, session_id=line['session_id'], created_at=line['session__created_at']))
+    for log in InventoryLog.objects.all():
+        for kind, quantity in _moves(log.outlet_name, log.item_id, log.quantity_taken, log.quantity_returned or 0, log.is_closed):
+            movements.append(StockMovement(outlet_name=log.outlet_name, item_id=log.item_id, kind=kind, quantity=quantity,
+                                           inventory_log_id=log.pk, created_at=log.date_issued))
+    StockMovement.objects.bulk_create(movements, batch_size=1000)
+    StockBalance.objects.bulk_create((
+        StockBalance(outlet_name=row['outlet_name'], item_id=row['item_id'], on_hand=row['on_hand'])
+        for row in StockMovement.objects.values('outlet_name', 'item_id').annotate(on_hand=Sum('quantity')).order_by()
+        if row['on_hand']
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_period_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outlet_name', models.CharField(choices=[('EAT_RIGHT', 'Eat Right'), ('BED', 'B.Ed'), ('LIBA', 'Liba'), ('MOBILE_1', 'Mobile Shop 1'), ('MOBILE_2', 'Mobile Shop 2'), ('MOBILE_3', 'Mobile Shop 3')], max_length=50)),
+                ('on_hand', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.item')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('outlet_name', 'item'), name='unique_stock_balance')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outlet_name', models.CharField(choices=[('EAT_RIGHT', 'Eat Right'), ('BED', 'B.Ed'), ('LIBA', 'Liba'), ('MOBILE_1', 'Mobile Shop 1'), ('MOBILE_2', 'Mobile Shop 2'), ('MOBILE_3', 'Mobile Shop 3')], max_length=50)),
+                ('kind', models.CharField(choices=[('ISSUE', 'Issued'), ('RETURN', 'Returned'), ('SALE', 'Sold')], max_length=10)),
+                ('quantity', models.IntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('inventory_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='core.inventorylog')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.item')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='core.inventorysession')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['outlet_name', 'item', 'created_at'], name='stockmove_outlet_item_idx')],
+            },
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
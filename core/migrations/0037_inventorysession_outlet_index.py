@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorysession',
+            index=models.Index(fields=['outlet_name', 'created_at'], name='invsession_outlet_created_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -35,30 +35,19 @@ class User(AbstractUser):
     def has_module_access(self, module_name, action=None):
         if self.role == 'ADMIN':
             return True
-            
-        # 1. Check User-specific override
-        if self.module_permissions and module_name in self.module_permissions:
-            user_perm = self.module_permissions[module_name]
-            if isinstance(user_perm, bool): # Backward compatibility or simple switch
-                 return user_perm
-            if action and isinstance(user_perm, dict):
-                return user_perm.get(action, False)
-            return True # Fallback if just present? Or should strict check? 
-            # If we move to granular, we expect dict. 
-            # If it's a legacy simple 'billing': True, then it implies full access or at least 'view'.
-            # Let's assume True means full access for now to be safe, or just return True.
-
-        # 2. Check Role-based permissions
-        try:
-            role_perm = RolePermission.objects.get(role=self.role)
-            perms = role_perm.permissions.get(module_name, {})
-            if action:
-                return perms.get(action, False)
-            # If no action specified, check if they have 'view' or any access
-            return perms.get('view', False) or any(perms.values())
-        except RolePermission.DoesNotExist:
-            # Fallback to hardcoded defaults for safety during migration
-             return self._get_legacy_permission(module_name)
+        return self.get_permission_resolver().has_access(module_name, action)
+
+    def get_permission_resolver(self):
+        # Role permissions and user overrides are resolved once per instance (i.e. per request)
+        resolver = getattr(self, '_permission_resolver', None)
+        if resolver is None:
+            from .permissions import PermissionResolver
+            resolver = PermissionResolver(self)
+            self._permission_resolver = resolver
+        return resolver
+
+    def clear_permission_cache(self):
+        self._permission_resolver = None
 
     def _get_legacy_permission(self, module_name):
         # Default permissions based on role if not explicitly set
@@ -82,6 +71,12 @@ class User(AbstractUser):
             if not self.is_superuser:
                 self.is_staff = False
         super().save(*args, **kwargs)
+        # role / module_permissions may have changed
+        self.clear_permission_cache()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_permission_cache()
 
 class RolePermission(models.Model):
     role = models.CharField(max_length=20, choices=User.ROLE_CHOICES, unique=True)
@@ -91,6 +86,23 @@ class RolePermission(models.Model):
     def __str__(self):
         return self.get_role_display()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_cached_permissions()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cached_permissions()
+        return result
+
+    @staticmethod
+    def _invalidate_cached_permissions():
+        from .permissions import bump_role_permissions_version
+        # Bump now so this worker sees its own write, and again after commit so other
+        # workers cannot reload the old rows between the two.
+        bump_role_permissions_version()
+        transaction.on_commit(bump_role_permissions_version)
+
     @staticmethod
     def get_default_permissions():
         # Schema: { 'module': { 'action': boolean } }
@@ -98,11 +110,30 @@ class RolePermission(models.Model):
         modules = ['users', 'items', 'customers', 'sales_bill', 'outer_bill', 'inner_bill', 'inventory', 'vendors', 'employees', 'purchases', 'vendor_payments', 'reports']
         return {m: {'view': False, 'create': False, 'edit': False, 'delete': False, 'approve': False} for m in modules}
 
+class DocumentSequence(models.Model):
+    # One counter row per document prefix and numbering period, e.g. ('IB', '20260316')
+    prefix = models.CharField(max_length=20)
+    period = models.CharField(max_length=20)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'period'], name='unique_document_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}-{self.period}: {self.last_value}"
+
 class ActivityLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     action = models.CharField(max_length=255) # e.g., "Login", "Logout", "Created Bill #123"
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'timestamp'], name='activitylog_user_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.action} at {self.timestamp}"
 
@@ -114,15 +145,53 @@ class Item(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_catalogue()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_catalogue()
+        return result
+
+    @staticmethod
+    def _invalidate_catalogue():
+        from .catalogue import invalidate_item_catalogue
+        invalidate_item_catalogue()
+
 class Customer(models.Model):
     customer_name = models.CharField(max_length=200)
     address = models.TextField(blank=True)
     contact_number = models.CharField(max_length=30, blank=True)
     email_id = models.EmailField(blank=True, null=True)
 
+    class Meta:
+        # Prefix lookups from the bill forms' customer type-ahead (core.customers)
+        indexes = [
+            models.Index(fields=['customer_name'], name='customer_name_idx'),
+            models.Index(fields=['contact_number'], name='customer_contact_idx'),
+        ]
+
     def __str__(self):
         return self.customer_name
 
+    def save(self, *args, **kwargs):
+        from .search import refresh_search_text
+        super().save(*args, **kwargs)
+        # Bills carry the customer name in their search text
+        refresh_search_text(self.bill_set.all())
+        self._invalidate_lookup()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_lookup()
+        return result
+
+    @staticmethod
+    def _invalidate_lookup():
+        from .customers import invalidate_customer_lookup
+        invalidate_customer_lookup()
+
 class Vendor(models.Model):
     vendor_id = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
@@ -187,6 +256,17 @@ class Bill(models.Model):
     delivery_date = models.DateField(null=True, blank=True)
     
     student_employees = models.ManyToManyField(User, related_name='assisted_bills', blank=True, limit_choices_to={'role': 'STUDENT'})
+    # Invoice number and customer names, lower-cased; kept in sync by Bill.save/Customer.save (see core.search)
+    search_text = models.CharField(max_length=500, blank=True, editable=False)
+
+    class Meta:
+        # Match the list/dashboard access paths: optional equality filter + created_at range/order
+        indexes = [
+            models.Index(fields=['created_at'], name='bill_created_idx'),
+            models.Index(fields=['created_by', 'created_at'], name='bill_creator_created_idx'),
+            models.Index(fields=['bill_type', 'created_at'], name='bill_type_created_idx'),
+            models.Index(fields=['payment_status', 'created_at'], name='bill_status_created_idx'),
+        ]
 
     @property
     def balance_due(self):
@@ -195,27 +275,62 @@ class Bill(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.invoice_number:
-            today_str = timezone.now().strftime('%Y%m%d')
-            prefix_map = {'INNER': 'IB', 'OUTER': 'OB', 'SALES': 'SB'}
-            prefix = prefix_map.get(self.bill_type, 'INV')
-            base_id = f"{prefix}-{today_str}"
-            
-            # Find last bill with this prefix and date
-            last_bill = Bill.objects.filter(invoice_number__startswith=base_id).order_by('invoice_number').last()
-            
-            if last_bill:
-                try:
-                    # Extract sequence number (last 4 digits)
-                    last_seq = int(last_bill.invoice_number[-4:])
-                    new_seq = last_seq + 1
-                except ValueError:
-                    new_seq = 1
-            else:
-                new_seq = 1
-            
-            self.invoice_number = f"{base_id}{new_seq:04d}"
-        super().save(*args, **kwargs)
+        from .numbering import INVOICE_SERIES, DEFAULT_INVOICE_SERIES
+        from .rollups import ROLLUP_FIELDS, record_bill_change, rollup_values
+        from .search import bill_search_text
+        series = INVOICE_SERIES.get(self.bill_type, DEFAULT_INVOICE_SERIES)
+        # Invoices are gap-free: number allocation and insert share one transaction
+        with series.atomic():
+            if not self.invoice_number:
+                self.invoice_number = series.next()
+            self.search_text = bill_search_text(self)
+            old = None if self._state.adding else Bill.objects.filter(pk=self.pk).values(*ROLLUP_FIELDS).first()
+            super().save(*args, **kwargs)
+            record_bill_change(old, rollup_values(self))
+        self._invalidate_derived_data()
+        # student_employees and child rows are not part of the row fingerprint
+        _invalidate_bill_invoice(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from .rollups import ROLLUP_FIELDS, record_bill_change
+        with transaction.atomic():
+            old = Bill.objects.filter(pk=self.pk).values(*ROLLUP_FIELDS).first()
+            result = super().delete(*args, **kwargs)
+            record_bill_change(old, None)
+        self._invalidate_derived_data()
+        return result
+
+    @staticmethod
+    def _invalidate_derived_data():
+        from .metrics import invalidate_dashboard_metrics
+        from .periods import invalidate_period_reports
+        invalidate_dashboard_metrics()
+        invalidate_period_reports()
+
+def _invalidate_bill_invoice(bill_id):
+    from .printing import invalidate_bill_invoice as invalidate
+    invalidate(bill_id)
+
+
+class DailySalesRollup(models.Model):
+    # Bill counts and sums per IST day and bucket; maintained by Bill.save/delete and
+    # `manage.py reconcile_sales_rollup` (see core.rollups)
+    date = models.DateField()
+    outlet_name = models.CharField(max_length=50, blank=True)
+    bill_type = models.CharField(max_length=10, choices=Bill.BILL_TYPES)
+    payment_type = models.CharField(max_length=20, choices=Bill.PAYMENT_TYPE_CHOICES)
+    payment_status = models.CharField(max_length=10, choices=Bill.PAYMENT_STATUS)
+    bill_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    advance_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'outlet_name', 'bill_type', 'payment_type', 'payment_status'], name='unique_daily_sales_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.outlet_name or '-'} {self.bill_type} {self.payment_type} {self.payment_status}: {self.bill_count}"
 
 class BillPayment(models.Model):
     bill = models.ForeignKey(Bill, related_name='payments', on_delete=models.CASCADE)
@@ -226,6 +341,15 @@ class BillPayment(models.Model):
     def __str__(self):
         return f"{self.get_payment_type_display()} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_bill_invoice(self.bill_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_bill_invoice(self.bill_id)
+        return result
+
 class BillItem(models.Model):
     bill = models.ForeignKey(Bill, related_name='items', on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.SET_NULL, null=True, blank=True)
@@ -237,6 +361,15 @@ class BillItem(models.Model):
     def total(self):
         return self.quantity * self.price
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_bill_invoice(self.bill_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_bill_invoice(self.bill_id)
+        return result
+
 class InventoryLog(models.Model):
     outlet_name = models.CharField(max_length=50, choices=Bill.OUTLET_CHOICES)
     item = models.ForeignKey(Item, on_delete=models.PROTECT)
@@ -247,6 +380,20 @@ class InventoryLog(models.Model):
     is_closed = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, on_delete=models.PROTECT)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_dashboard()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_dashboard()
+        return result
+
+    @staticmethod
+    def _invalidate_dashboard():
+        from .metrics import invalidate_dashboard_metrics
+        invalidate_dashboard_metrics()
+
 class InventorySession(models.Model):
     STATUS_CHOICES = (
         ('OPEN', 'Open'),
@@ -260,7 +407,15 @@ class InventorySession(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.PROTECT)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
-    
+    # Sales bill generated when the session was closed; a repeated close returns it
+    bill = models.OneToOneField(Bill, null=True, blank=True, on_delete=models.SET_NULL, related_name='inventory_session')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='invsession_status_created_idx'),
+            models.Index(fields=['outlet_name', 'created_at'], name='invsession_outlet_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_outlet_name_display()} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
@@ -274,6 +429,44 @@ class InventorySessionItem(models.Model):
     def quantity_sold(self):
         return max(0, self.quantity_taken - self.quantity_returned)
 
+class StockMovement(models.Model):
+    # Append-only ledger of stock going out to and coming back from the outlets (see core.stock);
+    # quantity is the signed change to what is out on the floor
+    KIND_CHOICES = (
+        ('ISSUE', 'Issued'),
+        ('RETURN', 'Returned'),
+        ('SALE', 'Sold'),
+    )
+    outlet_name = models.CharField(max_length=50, choices=Bill.OUTLET_CHOICES)
+    item = models.ForeignKey(Item, on_delete=models.PROTECT)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    # PROTECT: deleting a session or log would leave its quantities in StockBalance for good
+    session = models.ForeignKey(InventorySession, null=True, blank=True, on_delete=models.PROTECT, related_name='stock_movements')
+    inventory_log = models.ForeignKey(InventoryLog, null=True, blank=True, on_delete=models.PROTECT, related_name='stock_movements')
+    created_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['outlet_name', 'item', 'created_at'], name='stockmove_outlet_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} {self.item_id} @ {self.outlet_name}"
+
+class StockBalance(models.Model):
+    # Running total of StockMovement.quantity per outlet and item: what is out on the floor now
+    outlet_name = models.CharField(max_length=50, choices=Bill.OUTLET_CHOICES)
+    item = models.ForeignKey(Item, on_delete=models.PROTECT)
+    on_hand = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['outlet_name', 'item'], name='unique_stock_balance'),
+        ]
+
 class InventorySessionPayment(models.Model):
     session = models.ForeignKey(InventorySession, on_delete=models.CASCADE, related_name='payments')
     payment_type = models.CharField(max_length=20, choices=Bill.PAYMENT_TYPE_CHOICES)
@@ -285,6 +478,11 @@ class InventorySessionPayment(models.Model):
 
 
 
+def _invalidate_period_reports():
+    from .periods import invalidate_period_reports
+    invalidate_period_reports()
+
+
 class PurchaseRecord(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.PROTECT)
     purchase_order_id = models.CharField(max_length=50, unique=True, blank=True)
@@ -299,27 +497,24 @@ class PurchaseRecord(models.Model):
     date = models.DateTimeField(default=timezone.now)
     purchased_by = models.ForeignKey(User, on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_status', 'ordered_date'], name='purchase_status_ordered_idx'),
+            models.Index(fields=['ordered_date'], name='purchase_ordered_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.purchase_order_id:
-            today_str = timezone.now().strftime('%Y%m%d')
-            prefix = "PO"
-            base_id = f"{prefix}-{today_str}"
-            
-            # Find last PO with this prefix and date
-            last_po = PurchaseRecord.objects.filter(purchase_order_id__startswith=base_id).order_by('purchase_order_id').last()
-            
-            if last_po:
-                try:
-                    # Extract sequence number (last 4 digits)
-                    last_seq = int(last_po.purchase_order_id[-4:])
-                    new_seq = last_seq + 1
-                except ValueError:
-                    new_seq = 1
-            else:
-                new_seq = 1
-            
-            self.purchase_order_id = f"{base_id}{new_seq:04d}"
-        super().save(*args, **kwargs)
+        from .numbering import PURCHASE_ORDER_SERIES
+        with PURCHASE_ORDER_SERIES.atomic():
+            if not self.purchase_order_id:
+                self.purchase_order_id = PURCHASE_ORDER_SERIES.next()
+            super().save(*args, **kwargs)
+        _invalidate_period_reports()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_period_reports()
+        return result
 
 class PurchaseItem(models.Model):
     purchase = models.ForeignKey(PurchaseRecord, related_name='items', on_delete=models.CASCADE)
@@ -341,4 +536,61 @@ class VendorPayment(models.Model):
     date = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default='PENDING')
     approval_status = models.BooleanField(default=False) # Approved by supervisor/accountant
-    details = models.TextField(blank=True)
\ No newline at end of file
+    details = models.TextField(blank=True)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_period_reports()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_period_reports()
+        return result
+
+class PeriodSnapshot(models.Model):
+    # Frozen figures for a closed financial quarter (see core.periods); fy is the start year, 2025 for 2025-26
+    fy = models.PositiveSmallIntegerField()
+    quarter = models.PositiveSmallIntegerField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bill_count = models.IntegerField(default=0)
+    purchase_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    purchase_payables = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    vendor_payments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    items = models.JSONField(default=list, blank=True)  # [{"item_id", "name", "quantity"}], most sold first
+    frozen_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fy', 'quarter'], name='unique_period_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"FY {self.fy}-{(self.fy + 1) % 100:02d} Q{self.quarter}"
+
+class ExportJob(models.Model):
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+    KIND_CHOICES = (
+        ('BILLS_PDF', 'Bills PDF'),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='BILLS_PDF')
+    params = models.JSONField(default=dict, blank=True)  # request filters the export was started with
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    files = models.JSONField(default=list, blank=True)  # file names under EXPORT_ROOT, one per part
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.status})"
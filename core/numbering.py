@@ -0,0 +1,105 @@
+from contextlib import nullcontext
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+
+def next_sequence_value(prefix, period, seed=None, count=1):
+    """
+    Atomically advance the (prefix, period) counter by `count` and return the new last value.
+
+    The increment is a single `UPDATE ... SET last_value = last_value + count` on the
+    unique (prefix, period) index, which takes the row lock before anything is read,
+    so concurrent callers are serialised by the database and never see the same value.
+    `seed` is called only when the row does not exist yet and returns the last value
+    already in use for that period (for numbers issued before the table existed).
+    """
+    counters = DocumentSequence.objects.filter(prefix=prefix, period=period)
+    with transaction.atomic():
+        if not counters.update(last_value=F('last_value') + count):
+            start = seed() if seed else 0
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(prefix=prefix, period=period, last_value=start + count)
+                return start + count
+            except IntegrityError:
+                # Another worker created the row first; take the next values from it
+                counters.update(last_value=F('last_value') + count)
+        return counters.values_list('last_value', flat=True).get()
+
+
+class NumberSeries:
+    """
+    A document numbering scheme backed by DocumentSequence, e.g. IB-202603160001.
+
+    reset     -- DAILY (period '20260316') or FINANCIAL_YEAR (April-March, period '2025-26')
+    gap_free  -- when True, `atomic()` holds the counter row lock until the document itself
+                 is committed, so a failed save hands its number back. When False the number
+                 is committed on allocation and the lock is released immediately; a failed
+                 save leaves a gap but concurrent writers wait less.
+    seed_from -- optional 'app_label.Model.field' holding numbers issued before the
+                 sequence table existed; read once per period to seed the counter.
+    """
+    DAILY = 'DAILY'
+    FINANCIAL_YEAR = 'FINANCIAL_YEAR'
+
+    def __init__(self, prefix, reset=DAILY, width=4, gap_free=True, seed_from=None):
+        self.prefix = prefix
+        self.reset = reset
+        self.width = width
+        self.gap_free = gap_free
+        self.seed_from = seed_from
+
+    def period(self, when=None):
+        when = when or timezone.now()
+        if self.reset == self.FINANCIAL_YEAR:
+            start_year = when.year if when.month >= 4 else when.year - 1
+            return f"{start_year}-{(start_year + 1) % 100:02d}"
+        return when.strftime('%Y%m%d')
+
+    def format(self, period, value):
+        return f"{self.prefix}-{period}{value:0{self.width}d}"
+
+    def atomic(self):
+        return transaction.atomic() if self.gap_free else nullcontext()
+
+    def next(self, when=None):
+        return self.reserve(1, when)[0]
+
+    def reserve(self, count, when=None):
+        """Claim `count` consecutive numbers with one counter update (e.g. for a batch import)."""
+        if count < 1:
+            return []
+        period = self.period(when)
+        last = next_sequence_value(self.prefix, period, seed=lambda: self._last_issued(period), count=count)
+        return [self.format(period, value) for value in range(last - count + 1, last + 1)]
+
+    def _last_issued(self, period):
+        if not self.seed_from:
+            return 0
+        app_label, model_name, field = self.seed_from.split('.')
+        model = apps.get_model(app_label, model_name)
+        base_id = self.format(period, 0)[:-self.width]
+        last = (model.objects.filter(**{f'{field}__startswith': base_id})
+                .order_by(field).values_list(field, flat=True).last())
+        if last:
+            try:
+                # Extract sequence number (last `width` digits)
+                return int(last[-self.width:])
+            except ValueError:
+                pass
+        return 0
+
+
+INVOICE_SERIES = {
+    'INNER': NumberSeries('IB', seed_from='core.Bill.invoice_number'),
+    'OUTER': NumberSeries('OB', seed_from='core.Bill.invoice_number'),
+    'SALES': NumberSeries('SB', seed_from='core.Bill.invoice_number'),
+}
+DEFAULT_INVOICE_SERIES = NumberSeries('INV', seed_from='core.Bill.invoice_number')
+
+PURCHASE_ORDER_SERIES = NumberSeries('PO', gap_free=False, seed_from='core.PurchaseRecord.purchase_order_id')
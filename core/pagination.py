@@ -0,0 +1,153 @@
+import hashlib
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Q
+
+
+def with_unique_ordering(ordering):
+    # Keyset iteration needs a total order; `id` breaks ties in the direction of the last key
+    ordering = tuple(ordering) or ('-id',)
+    if ordering[-1].lstrip('-') not in ('id', 'pk'):
+        ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+    return ordering
+
+
+def keyset_filter(ordering, values):
+    """
+    Q matching rows that come strictly after `values` in `ordering`, e.g. for
+    ('-created_at', '-id'): created_at < c OR (created_at = c AND id < i).
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def iter_keyset(qs, fields, chunk_size=2000):
+    """
+    Yield `qs.values(*fields)` rows in the queryset's order, one chunk per query.
+
+    Each chunk seeks past the last row of the previous one instead of using OFFSET,
+    and only one chunk is held in memory at a time on every backend (MySQL's default
+    cursor buffers a whole result set client side, so `.iterator()` alone is not enough).
+    """
+    ordering = with_unique_ordering(qs.query.order_by)
+    keys = [f.lstrip('-') for f in ordering]
+    columns = list(dict.fromkeys([*fields, *keys]))
+    base = qs.order_by(*ordering).values(*columns)
+    last = None
+    while True:
+        chunk = base if last is None else base.filter(keyset_filter(ordering, last))
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = [rows[-1][k] for k in keys]
+
+
+def reverse_ordering(ordering):
+    return tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+
+
+class KeysetPage(Sequence):
+    """One page of a KeysetPaginator; iterates like the object list it holds."""
+
+    def __init__(self, object_list, has_next, has_previous, next_token, previous_token, paginator):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_token = next_token
+        self.previous_token = previous_token
+        self.paginator = paginator
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def approximate_count(self):
+        return self.paginator.approximate_count() if self.paginator.count else None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over `queryset` in `ordering` (default: the queryset's own
+    order_by), made unique with a trailing `id`.
+
+    Pages are fetched with a keyset filter and LIMIT per_page + 1, so every page costs
+    one indexed query however deep it is, and no COUNT(*) is issued. Next/previous
+    tokens are signed, opaque encodings of the boundary row's sort keys; a tampered or
+    stale token falls back to the first page. Ordering fields must be non-null
+    columns of the model itself. With count=True the page also offers an approximate
+    total, cached per query for LIST_COUNT_CACHE_TIMEOUT seconds.
+    """
+    TOKEN_SALT = 'core.pagination.keyset'
+
+    def __init__(self, queryset, per_page, ordering=None, count=False):
+        self.ordering = with_unique_ordering(ordering or queryset.query.order_by)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        self.count = count
+        opts = queryset.model._meta
+        self.fields = [opts.pk if f.lstrip('-') == 'pk' else opts.get_field(f.lstrip('-')) for f in self.ordering]
+
+    def _token(self, direction, obj):
+        keys = [field.value_to_string(obj) for field in self.fields]
+        return signing.dumps({'d': direction, 'k': keys}, salt=self.TOKEN_SALT, compress=True)
+
+    def _decode(self, token):
+        try:
+            data = signing.loads(token, salt=self.TOKEN_SALT)
+            keys = data['k']
+            if data['d'] not in ('n', 'p') or len(keys) != len(self.fields):
+                return None, None
+            return data['d'], [field.to_python(value) for field, value in zip(self.fields, keys)]
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            return None, None
+
+    def page(self, token=None):
+        direction, values = self._decode(token) if token else (None, None)
+        if direction == 'p':
+            ordering = reverse_ordering(self.ordering)
+            rows = list(self.queryset.order_by(*ordering).filter(keyset_filter(ordering, values))[:self.per_page + 1])
+            has_previous, has_next = len(rows) > self.per_page, True
+            rows = rows[:self.per_page][::-1]
+        else:
+            qs = self.queryset if direction is None else self.queryset.filter(keyset_filter(self.ordering, values))
+            rows = list(qs[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, direction == 'n'
+            rows = rows[:self.per_page]
+
+        if not rows and direction is not None:
+            # Everything around the cursor is gone (deleted rows, changed filters)
+            return self.page()
+        return KeysetPage(
+            rows, has_next, has_previous,
+            next_token=self._token('n', rows[-1]) if has_next else None,
+            previous_token=self._token('p', rows[0]) if has_previous else None,
+            paginator=self,
+        )
+
+    def approximate_count(self):
+        qs = self.queryset.order_by()
+        try:
+            sql = str(qs.query)
+        except EmptyResultSet:
+            return 0
+        key = f"core:list_count:{hashlib.sha1(sql.encode()).hexdigest()}"
+        return cache.get_or_set(key, qs.count, getattr(settings, 'LIST_COUNT_CACHE_TIMEOUT', 300))
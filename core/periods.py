@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .caching import get_version, bump_version_on_commit
+from .filters import local_day_start
+from .models import DailySalesRollup, PurchaseRecord, VendorPayment, InventorySessionItem, PeriodSnapshot
+
+AMOUNT_FIELDS = ('revenue', 'purchase_spend', 'purchase_payables', 'vendor_payments')
+
+
+def invalidate_period_reports():
+    # Called whenever bills, purchases, vendor payments or inventory sessions are written
+    bump_version_on_commit('period_report')
+
+
+def financial_year(day):
+    """Start year of the April-March financial year containing `day` (2025 for 2025-26)."""
+    return day.year if day.month >= 4 else day.year - 1
+
+
+def financial_quarter(day):
+    """1-4, counted from April (Q1 = Apr-Jun, Q4 = Jan-Mar)."""
+    return (day.month - 4) % 12 // 3 + 1
+
+
+def financial_year_label(fy):
+    return f"{fy}-{(fy + 1) % 100:02d}"
+
+
+def quarter_bounds(fy, quarter):
+    """First and last date (inclusive) of a financial quarter."""
+    month = 3 * (quarter - 1) + 4
+    year = fy + (month > 12)
+    month = (month - 1) % 12 + 1
+    start = date(year, month, 1)
+    end = (start + timedelta(days=92)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def _empty(fy, quarter):
+    start, end = quarter_bounds(fy, quarter)
+    return {
+        'fy': fy, 'quarter': quarter, 'start': start, 'end': end, 'frozen': False,
+        'bill_count': 0, **{name: Decimal(0) for name in AMOUNT_FIELDS}, 'items': [],
+    }
+
+
+def compute_quarter(fy, quarter):
+    """
+    One quarter's figures from the source tables: revenue and bill count from
+    DailySalesRollup (cancelled bills excluded), purchase spend and still-pending
+    purchases by ordered_date, paid vendor payments, and quantities sold per item in
+    closed inventory sessions.
+    """
+    report = _empty(fy, quarter)
+    start, end = report['start'], report['end']
+    # Timestamps are compared against the IST day boundaries so the created_at / date indexes apply
+    since, until = local_day_start(start), local_day_start(end + timedelta(days=1))
+    sales = (DailySalesRollup.objects.filter(date__gte=start, date__lte=end)
+             .exclude(payment_status='CANCELLED')
+             .aggregate(revenue=Sum('total_amount'), bill_count=Sum('bill_count')))
+    purchases = PurchaseRecord.objects.filter(ordered_date__gte=start, ordered_date__lte=end)
+    spend = purchases.exclude(payment_status='CANCELLED').aggregate(total=Sum('total_amount'))['total']
+    payables = purchases.filter(payment_status='PENDING').aggregate(total=Sum('total_amount'))['total']
+    paid = (VendorPayment.objects.filter(status='PAID', date__gte=since, date__lt=until)
+            .aggregate(total=Sum('amount'))['total'])
+    sold = (InventorySessionItem.objects
+            .filter(session__status='CLOSED', session__created_at__gte=since, session__created_at__lt=until,
+                    quantity_taken__gt=F('quantity_returned'))
+            .values('item_id', 'item__name')
+            .annotate(quantity=Sum(F('quantity_taken') - F('quantity_returned')))
+            .order_by('-quantity', 'item__name'))
+
+    report.update(
+        revenue=sales['revenue'] or Decimal(0),
+        bill_count=sales['bill_count'] or 0,
+        purchase_spend=spend or Decimal(0),
+        purchase_payables=payables or Decimal(0),
+        vendor_payments=paid or Decimal(0),
+        items=[{'item_id': row['item_id'], 'name': row['item__name'], 'quantity': row['quantity']} for row in sold],
+    )
+    return report
+
+
+def _from_snapshot(snapshot):
+    report = _empty(snapshot.fy, snapshot.quarter)
+    report.update(
+        frozen=True,
+        bill_count=snapshot.bill_count,
+        items=snapshot.items,
+        **{name: getattr(snapshot, name) for name in AMOUNT_FIELDS},
+    )
+    return report
+
+
+def freeze_quarter(fy, quarter, refresh=False):
+    """
+    Store a closed quarter's figures in PeriodSnapshot and return them. An existing
+    snapshot is returned as is unless `refresh` is set (e.g. after a late correction
+    to an old bill or purchase).
+    """
+    snapshot = PeriodSnapshot.objects.filter(fy=fy, quarter=quarter).first()
+    if snapshot is not None and not refresh:
+        return _from_snapshot(snapshot)
+    report = compute_quarter(fy, quarter)
+    fields = {'bill_count': report['bill_count'], 'items': report['items'], **{name: report[name] for name in AMOUNT_FIELDS}}
+    try:
+        with transaction.atomic():
+            PeriodSnapshot.objects.update_or_create(fy=fy, quarter=quarter, defaults=fields)
+    except IntegrityError:
+        # Another request froze it first; both computed the same closed period
+        pass
+    report['frozen'] = True
+    return report
+
+
+def quarter_report(fy, quarter, today=None):
+    """
+    A quarter's figures. Quarters that ended more than PERIOD_FREEZE_AFTER_DAYS ago
+    come from (or are frozen into) PeriodSnapshot and are never recomputed. The open
+    quarter (and one still inside that grace period) is computed and cached for
+    PERIOD_REPORT_CACHE_TIMEOUT seconds; any write to the source tables starts a new
+    cache version. Future quarters are empty.
+    """
+    today = today or timezone.localdate()
+    start, end = quarter_bounds(fy, quarter)
+    if start > today:
+        return _empty(fy, quarter)
+    if end < today - timedelta(days=getattr(settings, 'PERIOD_FREEZE_AFTER_DAYS', 7)):
+        return freeze_quarter(fy, quarter)
+
+    key = f"core:period_report:{get_version('period_report')}:{fy}:{quarter}"
+    report = cache.get(key)
+    if report is None:
+        report = compute_quarter(fy, quarter)
+        cache.set(key, report, getattr(settings, 'PERIOD_REPORT_CACHE_TIMEOUT', 60 * 10))
+    return report
+
+
+def financial_year_report(fy, today=None):
+    """The four quarter_report()s of a financial year and their totals (items merged by id)."""
+    quarters = [quarter_report(fy, quarter, today=today) for quarter in range(1, 5)]
+    items = {}
+    for report in quarters:
+        for row in report['items']:
+            merged = items.setdefault(row['item_id'], {**row, 'quantity': 0})
+            merged['quantity'] += row['quantity']
+    start, end = quarters[0]['start'], quarters[-1]['end']
+    return {
+        'fy': fy,
+        'label': financial_year_label(fy),
+        'start': start,
+        'end': end,
+        'quarters': quarters,
+        'bill_count': sum(report['bill_count'] for report in quarters),
+        **{name: sum((report[name] for report in quarters), Decimal(0)) for name in AMOUNT_FIELDS},
+        'items': sorted(items.values(), key=lambda row: (-row['quantity'], row['name'])),
+    }
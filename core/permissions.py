@@ -0,0 +1,68 @@
+from .caching import get_version, bump_version
+from .models import RolePermission
+
+# Process-wide copy of every role's permission matrix, valid for `version`
+_role_matrix = {'version': None, 'roles': {}}
+
+
+def get_role_permissions_version():
+    return get_version('role_permissions')
+
+
+def bump_role_permissions_version():
+    """Invalidate the role matrix held by every worker sharing the cache backend."""
+    bump_version('role_permissions')
+    _role_matrix['version'] = None
+
+
+def load_role_permissions(role):
+    # Returns the role's permission JSON, or None if the role has no RolePermission row.
+    # All roles are loaded in a single query and reused until the shared version changes.
+    version = get_role_permissions_version()
+    if version is None or version != _role_matrix['version']:
+        _role_matrix['roles'] = dict(RolePermission.objects.values_list('role', 'permissions'))
+        _role_matrix['version'] = version
+    return _role_matrix['roles'].get(role)
+
+
+class PermissionResolver:
+    """
+    Flattens a user's role permissions and personal `module_permissions` overrides
+    into a single lookup table: {module: (actions or None, access without action)}.
+
+    One resolver is built per User instance. `request.user` is loaded once per request
+    by the auth middleware, so every `has_module_access` check in the views and templates
+    of a request is answered from memory after the first one.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        role_perms = load_role_permissions(user.role)
+        # Without a RolePermission row we fall back to the hardcoded legacy defaults
+        self.has_role_entry = role_perms is not None
+        self.table = {}
+
+        for module, perms in (role_perms or {}).items():
+            if isinstance(perms, dict):
+                self.table[module] = (perms, perms.get('view', False) or any(perms.values()))
+
+        # User-specific overrides replace the role entry for that module
+        for module, user_perm in (user.module_permissions or {}).items():
+            if isinstance(user_perm, bool):  # Backward compatibility or simple switch
+                self.table[module] = (None, user_perm)
+            elif isinstance(user_perm, dict):
+                self.table[module] = (user_perm, True)
+            else:
+                self.table[module] = (None, True)
+
+    def has_access(self, module_name, action=None):
+        entry = self.table.get(module_name)
+        if entry is None:
+            if self.has_role_entry:
+                return False
+            return self.user._get_legacy_permission(module_name)
+
+        actions, default = entry
+        if action and actions is not None:
+            return actions.get(action, False)
+        return default
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import get_version, bump_version
+from .catalogue import get_item_catalogue_version
+from .customers import get_customer_version
+from .models import Bill, BillItem
+
+
+def invalidate_bill_invoice(bill_id):
+    # Called when a bill, one of its items or one of its payments is written
+    bump_version(f'bill_invoice:{bill_id}')
+
+
+def bill_fingerprint(bill):
+    """
+    Digest of every column of the bill row plus the version of its items and payments,
+    and of the customer and item catalogues whose names and contact details it prints.
+
+    The row part also catches writes that skip Bill.save (queryset.update(), e.g. the
+    admin "mark as paid" action); child rows bump the version from their save/delete.
+    """
+    values = [getattr(bill, field.attname) for field in Bill._meta.concrete_fields]
+    values += [get_version(f'bill_invoice:{bill.pk}'), get_customer_version(), get_item_catalogue_version()]
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def prefetch_bill_lines(bill):
+    """Load the items (with their catalogue item), payments and students the invoice shows: three queries."""
+    prefetch_related_objects(
+        [bill],
+        Prefetch('items', queryset=BillItem.objects.select_related('item').order_by('id')),
+        'payments',
+        'student_employees',
+    )
+    return bill
+
+
+def render_bill_invoice(bill):
+    """
+    HTML of the invoice body (core/bill_invoice.html) for `bill`, cached for
+    BILL_INVOICE_CACHE_TIMEOUT seconds under its fingerprint. Load `bill` with
+    customer and created_by selected; a miss then costs a fixed three queries.
+    """
+    key = f'core:bill_invoice:{bill.pk}:{bill_fingerprint(bill)}'
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('core/bill_invoice.html', {'bill': prefetch_bill_lines(bill)})
+        cache.set(key, html, getattr(settings, 'BILL_INVOICE_CACHE_TIMEOUT', 60 * 60 * 24))
+    return mark_safe(html)
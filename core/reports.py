@@ -0,0 +1,79 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import Bill
+from .periods import financial_year, financial_quarter, financial_year_label, financial_year_report
+from .rollups import sales_summary
+
+BREAKDOWNS = {
+    'outlet': ('outlet_name', 'Outlet', dict(Bill.OUTLET_CHOICES)),
+    'payment_type': ('payment_type', 'Payment Mode', dict(Bill.PAYMENT_TYPE_CHOICES)),
+    'bill_type': ('bill_type', 'Bill Type', dict(Bill.BILL_TYPES)),
+    'payment_status': ('payment_status', 'Payment Status', dict(Bill.PAYMENT_STATUS)),
+}
+FILTERS = ('outlet_name', 'bill_type', 'payment_type', 'payment_status')
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+@login_required
+@user_passes_test(lambda u: u.has_module_access('reports'))
+def sales_report(request):
+    # Reads the DailySalesRollup table only, so the cost depends on the number of days, not bills
+    today = timezone.localdate()
+    start = _parse_date(request.GET.get('start_date')) or today.replace(day=1)
+    end = _parse_date(request.GET.get('end_date')) or today
+    group_by = 'month' if request.GET.get('group_by') == 'month' else 'day'
+    breakdown = request.GET.get('breakdown') if request.GET.get('breakdown') in BREAKDOWNS else 'outlet'
+    column, heading, labels = BREAKDOWNS[breakdown]
+    filters = {name: request.GET[name] for name in FILTERS if request.GET.get(name)}
+
+    rows = list(sales_summary(start, end, group_by=group_by, breakdown=column, **filters))
+    for row in rows:
+        row['label'] = labels.get(row[column], row[column] or '-')
+
+    context = {
+        'rows': rows,
+        'total_bills': sum(row['bills'] for row in rows),
+        'total_amount': sum(row['total'] for row in rows),
+        'total_advance': sum(row['advance'] for row in rows),
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'group_by': group_by,
+        'breakdown': breakdown,
+        'breakdown_heading': heading,
+        'breakdowns': [(key, value[1]) for key, value in BREAKDOWNS.items()],
+        'filters': filters,
+        'outlet_choices': Bill.OUTLET_CHOICES,
+        'bill_type_choices': Bill.BILL_TYPES,
+        'payment_type_choices': Bill.PAYMENT_TYPE_CHOICES,
+        'payment_status_choices': Bill.PAYMENT_STATUS,
+    }
+    return render(request, 'core/sales_report.html', context)
+
+
+@login_required
+@user_passes_test(lambda u: u.has_module_access('reports'))
+def financial_report(request):
+    # Closed quarters are read from PeriodSnapshot; only the open one is computed (and cached)
+    today = timezone.localdate()
+    current = financial_year(today)
+    years = [(year, financial_year_label(year)) for year in range(current, current - 6, -1)]
+    # Only the listed years: any other one would write snapshots for it (or fail outside date range)
+    fy = next((year for year, _ in years if str(year) == request.GET.get('fy')), current)
+    report = financial_year_report(fy, today=today)
+    context = {
+        'report': report,
+        'items': report['items'][:50],
+        'years': years,
+        'current_quarter': financial_quarter(today) if fy == current else None,
+    }
+    return render(request, 'core/financial_report.html', context)
@@ -0,0 +1,157 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .filters import IST, local_day_start
+from .models import Bill, DailySalesRollup
+
+# Bill fields that decide a bill's rollup bucket and its contribution to it
+ROLLUP_FIELDS = ('created_at', 'outlet_name', 'bill_type', 'payment_type', 'payment_status', 'total_amount', 'advance_payment')
+BUCKET_FIELDS = ('outlet_name', 'bill_type', 'payment_type', 'payment_status')
+AMOUNT_FIELDS = ('bill_count', 'total_amount', 'advance_amount')
+
+
+def rollup_values(bill):
+    """The ROLLUP_FIELDS of an in-memory bill, in the shape of Bill.objects.values(*ROLLUP_FIELDS)."""
+    values = {name: getattr(bill, name) for name in ROLLUP_FIELDS}
+    # Unsaved defaults are floats (advance_payment=0.00)
+    for name in ('total_amount', 'advance_payment'):
+        values[name] = Decimal(str(values[name] or 0))
+    return values
+
+
+def _bucket(values):
+    return (
+        timezone.localtime(values['created_at'], IST).date(),
+        values['outlet_name'] or '',
+        values['bill_type'],
+        values['payment_type'],
+        values['payment_status'],
+    )
+
+
+def _add(bucket, bill_count, total_amount, advance_amount):
+    key = dict(zip(('date',) + BUCKET_FIELDS, bucket))
+    rows = DailySalesRollup.objects.filter(**key)
+    deltas = dict(
+        bill_count=F('bill_count') + bill_count,
+        total_amount=F('total_amount') + total_amount,
+        advance_amount=F('advance_amount') + advance_amount,
+    )
+    if rows.update(**deltas):
+        if bill_count < 0:
+            rows.filter(bill_count__lte=0).delete()
+        return
+    if bill_count <= 0:
+        # Nothing to take away from; the nightly reconcile owns buckets written outside Bill.save
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(**key, bill_count=bill_count, total_amount=total_amount, advance_amount=advance_amount)
+    except IntegrityError:
+        # Another writer created the bucket first
+        rows.update(**deltas)
+
+
+def record_bill_change(old, new):
+    """
+    Move one bill's contribution in DailySalesRollup from `old` to `new`.
+
+    Both are dicts of ROLLUP_FIELDS (None for a created / deleted bill). Buckets are
+    adjusted with `UPDATE ... SET col = col + delta` on the unique bucket index, like
+    DocumentSequence counters, so concurrent bill writes never overwrite each other.
+    Call inside the transaction that writes the bill.
+    """
+    old_bucket = _bucket(old) if old else None
+    new_bucket = _bucket(new) if new else None
+    if old_bucket == new_bucket:
+        total = new['total_amount'] - old['total_amount']
+        advance = new['advance_payment'] - old['advance_payment']
+        if total or advance:
+            _add(new_bucket, 0, total, advance)
+        return
+    if old_bucket:
+        _add(old_bucket, -1, -old['total_amount'], -old['advance_payment'])
+    if new_bucket:
+        _add(new_bucket, 1, new['total_amount'], new['advance_payment'])
+
+
+def record_new_bills(bills):
+    """
+    record_bill_change(None, bill) for bills inserted with bulk_create(), with one
+    counter update per bucket rather than per bill. Call inside the inserting transaction.
+    """
+    buckets = {}
+    for bill in bills:
+        values = rollup_values(bill)
+        count, total, advance = buckets.get(_bucket(values), (0, Decimal(0), Decimal(0)))
+        buckets[_bucket(values)] = (count + 1, total + values['total_amount'], advance + values['advance_payment'])
+    for bucket, amounts in buckets.items():
+        _add(bucket, *amounts)
+
+
+def _daily_buckets(day):
+    bills = Bill.objects.filter(created_at__gte=local_day_start(day), created_at__lt=local_day_start(day + timedelta(days=1)))
+    return {
+        (row['outlet_name'] or '', row['bill_type'], row['payment_type'], row['payment_status']): (
+            row['bill_count'], row['total_amount'] or Decimal(0), row['advance_amount'] or Decimal(0),
+        )
+        for row in bills.values(*BUCKET_FIELDS).order_by().annotate(
+            bill_count=Count('id'), total_amount=Sum('total_amount'), advance_amount=Sum('advance_payment'),
+        )
+    }
+
+
+def reconcile_day(day):
+    """
+    Rebuild one day's DailySalesRollup rows from the bill table (one grouped query on
+    the created_at index) and return how many buckets were wrong. Catches bills
+    written with queryset.update() or raw SQL, which bypass the incremental path.
+    """
+    expected = _daily_buckets(day)
+    with transaction.atomic():
+        stored = {
+            (row.outlet_name, row.bill_type, row.payment_type, row.payment_status): row
+            for row in DailySalesRollup.objects.select_for_update().filter(date=day)
+        }
+        wrong = {key for key, row in stored.items() if expected.get(key) != tuple(getattr(row, name) for name in AMOUNT_FIELDS)}
+        wrong |= expected.keys() - stored.keys()
+        DailySalesRollup.objects.filter(pk__in=[stored[key].pk for key in wrong if key in stored]).delete()
+        DailySalesRollup.objects.bulk_create(
+            DailySalesRollup(date=day, **dict(zip(BUCKET_FIELDS, key)), **dict(zip(AMOUNT_FIELDS, expected[key])))
+            for key in wrong if key in expected
+        )
+    return len(wrong)
+
+
+def reconcile_sales_rollup(days):
+    """reconcile_day() for each date in `days`; returns the total number of corrected buckets."""
+    return sum(reconcile_day(day) for day in days)
+
+
+def bill_dates(bills):
+    """The local (IST) dates a Bill queryset spans, for reconciling after a bulk update."""
+    return sorted({timezone.localtime(created_at, IST).date() for created_at in bills.values_list('created_at', flat=True)})
+
+
+def sales_summary(start, end, group_by='day', breakdown='outlet_name', **filters):
+    """
+    Bill counts and sums per period and `breakdown` column between two dates (inclusive),
+    read from DailySalesRollup only. `group_by` is 'day' or 'month'; `filters` are
+    equality filters on the bucket columns (e.g. outlet_name='LIBA'). Cancelled bills
+    are left out unless a payment_status filter is given.
+    """
+    rows = DailySalesRollup.objects.filter(date__gte=start, date__lte=end, **filters)
+    if 'payment_status' not in filters:
+        rows = rows.exclude(payment_status='CANCELLED')
+    period = F('date') if group_by == 'day' else TruncMonth('date')
+    return (
+        rows.annotate(period=period)
+        .values('period', breakdown)
+        .annotate(bills=Sum('bill_count'), total=Sum('total_amount'), advance=Sum('advance_amount'))
+        .order_by('period', breakdown)
+    )
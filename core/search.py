@@ -0,0 +1,117 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+
+from .numbering import INVOICE_SERIES, DEFAULT_INVOICE_SERIES
+
+INVOICE_PREFIXES = sorted({series.prefix for series in INVOICE_SERIES.values()} | {DEFAULT_INVOICE_SERIES.prefix})
+INVOICE_PREFIX_RE = re.compile(rf"^({'|'.join(INVOICE_PREFIXES)})-\d*$")
+
+# InnoDB's default innodb_ft_min_token_size; shorter words are not in the FULLTEXT index
+FULLTEXT_MIN_TOKEN = 3
+
+
+def bill_search_text(bill):
+    """The denormalised Bill.search_text: invoice number and both customer names, lower-cased."""
+    customer = bill.customer.customer_name if bill.customer_id else ''
+    return f"{bill.invoice_number} {customer} {bill.customer_name}".lower()
+
+
+def search_text_expression():
+    """bill_search_text() as a SQL expression, for bulk UPDATEs of existing bills."""
+    from .models import Customer
+    customer = Subquery(Customer.objects.filter(pk=OuterRef('customer_id')).values('customer_name')[:1])
+    return Lower(Concat('invoice_number', Value(' '), Coalesce(customer, Value('')), Value(' '), 'customer_name'))
+
+
+def refresh_search_text(bills):
+    """Recompute search_text for a Bill queryset in one UPDATE (e.g. after a customer is renamed)."""
+    return bills.update(search_text=search_text_expression())
+
+
+class MatchAgainst(Func):
+    """MySQL FULLTEXT relevance of `search_text` for a BOOLEAN MODE query (bill_search_ft index)."""
+    output_field = FloatField()
+
+    def __init__(self, expression, query):
+        super().__init__(expression)
+        self.query = query
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        return f"MATCH ({column}) AGAINST (%s IN BOOLEAN MODE)", (*params, self.query)
+
+
+def _terms(q):
+    return re.findall(r'\w+', q.lower())
+
+
+def _invoice_prefix(q):
+    q = q.strip().upper()
+    return q if INVOICE_PREFIX_RE.match(q) else None
+
+
+def _uses_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def _number_prefix(digits):
+    from .models import Customer
+    match = Q(customer_id__in=Customer.objects.filter(contact_number__startswith=digits).values('pk'))
+    for prefix in INVOICE_PREFIXES:
+        match |= Q(invoice_number__startswith=f'{prefix}-{digits}')
+    return match
+
+
+def _matching(qs, q):
+    """(queryset, ranked) for the bills in `qs` matching `q`."""
+    prefix = _invoice_prefix(q)
+    if prefix:
+        # "SB-2026..." style input: a range scan on the unique invoice_number index
+        return qs.filter(invoice_number__startswith=prefix), False
+    terms = _terms(q)
+    if not terms:
+        return qs.none(), False
+    # Numbers are the start of an invoice number after its prefix, or of the customer's
+    # contact number: range scans on those two indexes
+    for term in terms:
+        if term.isdigit():
+            qs = qs.filter(_number_prefix(term))
+    words = [term for term in terms if not term.isdigit()]
+    # Other databases (SQLite in development) and short words: a scan of the denormalised column, no join
+    indexed = [term for term in words if len(term) >= FULLTEXT_MIN_TOKEN] if _uses_fulltext() else []
+    for term in words:
+        if term not in indexed:
+            qs = qs.filter(search_text__contains=term)
+    if indexed:
+        boolean_query = ' '.join(f'+{term}*' for term in indexed)
+        return qs.alias(relevance=MatchAgainst('search_text', boolean_query)).filter(relevance__gt=0), True
+    return qs, False
+
+
+def filter_bills(qs, q):
+    """Restrict `qs` to bills matching the search box `q`; the caller keeps its own ordering."""
+    return _matching(qs, q)[0]
+
+
+def search_bills(qs, q, limit=None):
+    """
+    The best `limit` (default SEARCH_RESULT_LIMIT) bills in `qs` for `q`.
+
+    Invoice-number prefixes go through the unique index, newest first. Numbers match the
+    start of an invoice number (after its prefix) or of the customer's contact number.
+    Other words are matched against Bill.search_text: ranked by FULLTEXT relevance on
+    MySQL, newest first elsewhere.
+    """
+    limit = limit or getattr(settings, 'SEARCH_RESULT_LIMIT', 25)
+    matches, ranked = _matching(qs, q)
+    if _invoice_prefix(q):
+        ordering = ('-invoice_number',)
+    elif ranked:
+        ordering = ('-relevance', '-created_at', '-id')
+    else:
+        ordering = ('-created_at', '-id')
+    return matches.order_by(*ordering)[:limit]
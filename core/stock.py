@@ -0,0 +1,169 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+
+from .models import InventoryLog, InventorySession, InventorySessionItem, StockBalance, StockMovement
+
+
+def expected_movements(outlet_name, item_id, taken, returned, closed):
+    """
+    The ledger entries one session line (or inventory log) should have produced so far,
+    as {(outlet_name, item_id, kind): quantity}. Issued stock is out on the floor until
+    it is returned or, when the session closes, sold.
+    """
+    movements = {
+        (outlet_name, item_id, 'ISSUE'): taken,
+        (outlet_name, item_id, 'RETURN'): -returned,
+    }
+    if closed:
+        movements[(outlet_name, item_id, 'SALE')] = returned - taken
+    return movements
+
+
+def apply_to_balances(deltas):
+    """
+    Add {(outlet_name, item_id): change} to StockBalance. The rows are locked, then
+    written with one bulk_create and one bulk_update, so the number of queries does
+    not depend on the number of items. Call inside a transaction.
+    """
+    deltas = {key: change for key, change in deltas.items() if change}
+    if not deltas:
+        return
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                rows = StockBalance.objects.select_for_update().filter(
+                    outlet_name__in={outlet for outlet, _ in deltas}, item_id__in={item for _, item in deltas},
+                )
+                balances = {(row.outlet_name, row.item_id): row for row in rows}
+                changed = []
+                for key, change in deltas.items():
+                    if key in balances:
+                        balances[key].on_hand += change
+                        changed.append(balances[key])
+                StockBalance.objects.bulk_create(
+                    StockBalance(outlet_name=outlet, item_id=item, on_hand=change)
+                    for (outlet, item), change in deltas.items() if (outlet, item) not in balances
+                )
+                if changed:
+                    StockBalance.objects.bulk_update(changed, ['on_hand'])
+            return
+        except IntegrityError:
+            # Another writer created one of the balance rows first; lock it and retry
+            if attempt:
+                raise
+
+
+def _sync(recorded_movements, source, expected, user):
+    """
+    Append the difference between `expected` and what `recorded_movements` already hold.
+    Both are keyed (source id, outlet_name, item_id, kind); `source` is the StockMovement
+    column the id goes in ('session_id' or 'inventory_log_id').
+    """
+    recorded = defaultdict(int)
+    rows = recorded_movements.values(source, 'outlet_name', 'item_id', 'kind').annotate(total=Sum('quantity')).order_by()
+    for row in rows:
+        recorded[(row[source], row['outlet_name'], row['item_id'], row['kind'])] = row['total']
+
+    movements, deltas = [], defaultdict(int)
+    for key in expected.keys() | recorded.keys():
+        change = expected.get(key, 0) - recorded[key]
+        if change:
+            source_id, outlet_name, item_id, kind = key
+            movements.append(StockMovement(outlet_name=outlet_name, item_id=item_id, kind=kind, quantity=change,
+                                           created_by=user, **{source: source_id}))
+            deltas[(outlet_name, item_id)] += change
+    StockMovement.objects.bulk_create(movements)
+    apply_to_balances(deltas)
+    return movements
+
+
+def sync_sessions_stock(session_ids, user=None):
+    """
+    Bring the ledger in line with inventory sessions after their lines were created,
+    edited or deleted, their outlet changed, or they were closed. Only the difference
+    from what was already recorded is appended, so calling it again is a no-op. The
+    query count does not depend on how many sessions or lines there are.
+    """
+    with transaction.atomic():
+        sessions = dict(
+            (pk, (outlet_name, status == 'CLOSED'))
+            for pk, outlet_name, status in InventorySession.objects.select_for_update().filter(pk__in=session_ids)
+            .order_by('pk').values_list('pk', 'outlet_name', 'status')
+        )
+        expected = defaultdict(int)
+        lines = (InventorySessionItem.objects.filter(session_id__in=sessions).values('session_id', 'item_id')
+                 .annotate(taken=Sum('quantity_taken'), returned=Sum('quantity_returned')).order_by())
+        for line in lines:
+            outlet_name, closed = sessions[line['session_id']]
+            for key, quantity in expected_movements(outlet_name, line['item_id'], line['taken'], line['returned'], closed).items():
+                expected[(line['session_id'], *key)] += quantity
+        return _sync(StockMovement.objects.filter(session_id__in=sessions), 'session_id', expected, user)
+
+
+def sync_session_stock(session, user=None):
+    """sync_sessions_stock() for one session."""
+    return sync_sessions_stock([session.pk], user)
+
+
+def sync_log_stock(log, user=None):
+    """sync_session_stock() for the older single-item InventoryLog."""
+    with transaction.atomic():
+        # Concurrent closes wait here and then diff against the movements the first one wrote
+        log = InventoryLog.objects.select_for_update().get(pk=log.pk)
+        expected = {
+            (log.pk, *key): quantity
+            for key, quantity in expected_movements(log.outlet_name, log.item_id, log.quantity_taken,
+                                                    log.quantity_returned or 0, log.is_closed).items()
+        }
+        return _sync(StockMovement.objects.filter(inventory_log=log), 'inventory_log_id', expected, user)
+
+
+def on_floor(outlet_name=None):
+    """Items currently out at an outlet (or all outlets), from StockBalance alone."""
+    balances = StockBalance.objects.exclude(on_hand=0).select_related('item').order_by('outlet_name', 'item__name')
+    if outlet_name:
+        balances = balances.filter(outlet_name=outlet_name)
+    return balances
+
+
+def rebuild_stock_ledger(batch_size=1000):
+    """
+    Replace the ledger and balances with a replay of every inventory session and log:
+    one ISSUE / RETURN / SALE entry per session line item, then balances summed from
+    the ledger. Returns (movements, balances) written.
+    """
+    def replay():
+        lines = (InventorySessionItem.objects
+                 .values('session_id', 'session__outlet_name', 'session__status', 'session__created_at', 'item_id')
+                 .annotate(taken=Sum('quantity_taken'), returned=Sum('quantity_returned'))
+                 .order_by('session_id', 'item_id'))
+        for line in lines.iterator(chunk_size=batch_size):
+            moves = expected_movements(line['session__outlet_name'], line['item_id'], line['taken'], line['returned'],
+                                       line['session__status'] == 'CLOSED')
+            for (outlet_name, item_id, kind), quantity in moves.items():
+                if quantity:
+                    yield StockMovement(outlet_name=outlet_name, item_id=item_id, kind=kind, quantity=quantity,
+                                        session_id=line['session_id'], created_at=line['session__created_at'])
+        for log in InventoryLog.objects.order_by('id').iterator(chunk_size=batch_size):
+            moves = expected_movements(log.outlet_name, log.item_id, log.quantity_taken, log.quantity_returned or 0, log.is_closed)
+            for (outlet_name, item_id, kind), quantity in moves.items():
+                if quantity:
+                    yield StockMovement(outlet_name=outlet_name, item_id=item_id, kind=kind, quantity=quantity,
+                                        inventory_log=log, created_at=log.date_issued)
+
+    with transaction.atomic():
+        StockMovement.objects.all().delete()
+        StockBalance.objects.all().delete()
+        movements, pending = 0, replay()
+        while batch := list(islice(pending, batch_size)):
+            StockMovement.objects.bulk_create(batch)
+            movements += len(batch)
+        balances = StockBalance.objects.bulk_create((
+            StockBalance(outlet_name=row['outlet_name'], item_id=row['item_id'], on_hand=row['on_hand'])
+            for row in StockMovement.objects.values('outlet_name', 'item_id').annotate(on_hand=Sum('quantity')).order_by()
+            if row['on_hand']
+        ), batch_size=batch_size)
+    return movements, len(balances)
@@ -0,0 +1,312 @@
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .catalogue import invalidate_item_catalogue
+from .customers import invalidate_customer_lookup
+from .filters import IST
+from .metrics import invalidate_dashboard_metrics
+from .models import (
+    User, Item, Customer, Vendor, Bill, BillItem, BillPayment, InventorySession, InventorySessionItem,
+    InventorySessionPayment, PurchaseRecord, VendorPayment,
+)
+from .numbering import INVOICE_SERIES, PURCHASE_ORDER_SERIES
+from .periods import invalidate_period_reports
+from .rollups import reconcile_sales_rollup
+from .search import bill_search_text
+from .stock import rebuild_stock_ledger
+
+OUTLETS = [value for value, _ in Bill.OUTLET_CHOICES]
+MOBILE_OUTLETS = ['MOBILE_1', 'MOBILE_2', 'MOBILE_3']
+BILL_TYPE_WEIGHTS = {'SALES': 6, 'INNER': 2, 'OUTER': 2}
+PAYMENT_STATUS_WEIGHTS = {'PAID': 80, 'PENDING': 17, 'CANCELLED': 3}
+PAYMENT_TYPES = [value for value, _ in Bill.PAYMENT_TYPE_CHOICES]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create() keep the created_at values set on the objects instead of stamping now()."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    try:
+        for field in fields:
+            field.auto_now_add = False
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def insert(model, objects, batch_size):
+    """
+    bulk_create() `objects` and make sure each has its pk. MySQL returns no ids from a
+    bulk insert; the generator is the only writer, so the new rows are the ids above
+    the previous maximum, in insertion order.
+    """
+    if not objects:
+        return objects
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    if objects[0].pk is None:
+        pks = model.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)
+        for obj, pk in zip(objects, pks):
+            obj.pk = pk
+    return objects
+
+
+class ShopDataGenerator:
+    """
+    Realistic synthetic shop data for local volume testing: users of every role, the
+    catalogue, customers and vendors, bills across all outlets over `days` days with
+    line items and split payments, closed and still-open inventory sessions, and
+    purchases with vendor payments. Everything is bulk inserted `batch_size` rows at a
+    time, so millions of bills take minutes and memory stays flat. Derived tables
+    (sales rollup, stock ledger) are rebuilt at the end. Names carry a run tag, so
+    repeated runs add to the data instead of colliding.
+    """
+
+    def __init__(self, seed=0, days=365, batch_size=2000, log=None):
+        self.random = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.tag = timezone.now().strftime('%Y%m%d%H%M%S')
+        self.today = timezone.localdate()
+
+    def choose(self, weights):
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def moment(self, day):
+        """A time during opening hours on `day` (IST)."""
+        return datetime.combine(day, time(8), tzinfo=IST) + timedelta(seconds=self.random.randrange(12 * 3600))
+
+    def spread(self, total):
+        """Split `total` rows over the last `days` days (oldest first), busier on weekdays."""
+        days = [self.today - timedelta(days=n) for n in range(self.days - 1, -1, -1)]
+        weights = [1.0 if day.weekday() < 5 else 0.6 for day in days]
+        counts = defaultdict(int)
+        for day in self.random.choices(days, weights=weights, k=total):
+            counts[day] += 1
+        return sorted(counts.items())
+
+    def users(self, per_role):
+        password = make_password(None)
+        users = insert(User, [
+            User(username=f'{role.lower()}_{self.tag}_{n}', role=role, password=password)
+            for role, _ in User.ROLE_CHOICES for n in range(per_role)
+        ], self.batch_size)
+        self.admins = [u for u in users if u.role == 'ADMIN'] or list(User.objects.filter(role='ADMIN')[:1])
+        self.staff = [u for u in users if u.role != 'STUDENT'] or self.admins
+        self.students = [u for u in users if u.role == 'STUDENT']
+        return len(users)
+
+    def master_data(self, items, customers, vendors):
+        self.items = insert(Item, [
+            Item(name=f'Item {self.tag}-{n}', price=Decimal(self.random.randrange(5, 500)))
+            for n in range(items)
+        ], self.batch_size)
+        self.customers = insert(Customer, [
+            Customer(customer_name=f'Customer {self.tag}-{n}', contact_number=f'9{self.random.randrange(10 ** 9):09d}',
+                     address=f'{n} Main Road')
+            for n in range(customers)
+        ], self.batch_size)
+        self.vendors = insert(Vendor, [
+            Vendor(vendor_id=f'V{self.tag}-{n}', name=f'Vendor {n}', bank_name='State Bank')
+            for n in range(vendors)
+        ], self.batch_size)
+
+    def lines(self, count_range=(1, 5)):
+        count = min(len(self.items), self.random.randint(*count_range))
+        return [(item, self.random.randint(1, 4)) for item in self.random.sample(self.items, count)]
+
+    def split(self, total):
+        """One payment, or a cash and UPI split, adding up to `total`."""
+        if total <= 0 or self.random.random() < 0.6:
+            return [(self.random.choice(PAYMENT_TYPES), total)]
+        first = (total * Decimal(self.random.randint(20, 80)) / 100).quantize(Decimal('1'))
+        return [('CASH', first), ('UPI', total - first)]
+
+    def bills(self, total):
+        pending = []
+        for day, count in self.spread(total):
+            types = defaultdict(int)
+            kinds = [self.choose(BILL_TYPE_WEIGHTS) for _ in range(count)]
+            for kind in kinds:
+                types[kind] += 1
+            numbers = {kind: iter(INVOICE_SERIES[kind].reserve(n, self.moment(day))) for kind, n in types.items()}
+            for kind in kinds:
+                pending.append(self.bill(kind, day, next(numbers[kind])))
+                if len(pending) >= self.batch_size:
+                    self.write_bills(pending)
+                    pending = []
+        self.write_bills(pending)
+
+    def bill(self, kind, day, number):
+        lines = self.lines()
+        total = sum((item.price * qty for item, qty in lines), Decimal(0))
+        customer = self.random.choice(self.customers) if kind != 'SALES' and self.customers else None
+        outlet = self.random.choice(OUTLETS) if kind == 'SALES' else None
+        status = self.choose(PAYMENT_STATUS_WEIGHTS)
+        payments = self.split(total) if kind == 'SALES' and status == 'PAID' else []
+        advance = (total / 2).quantize(Decimal('1')) if kind != 'SALES' and self.random.random() < 0.5 else Decimal(0)
+        bill = Bill(
+            invoice_number=number, bill_type=kind, created_at=self.moment(day), created_by=self.random.choice(self.staff),
+            customer=customer, outlet_name=outlet, total_amount=total, payment_status=status,
+            payment_type=payments[0][0] if payments else 'CASH',
+            advance_payment=advance, advance_payment_type='CASH' if advance else None,
+            delivery_date=day + timedelta(days=2) if kind != 'SALES' else None,
+        )
+        bill.search_text = bill_search_text(bill)
+        students = self.random.sample(self.students, min(2, len(self.students))) if outlet in MOBILE_OUTLETS else []
+        return bill, lines, payments, students
+
+    def write_bills(self, pending):
+        if not pending:
+            return
+        with explicit_timestamps(Bill), transaction.atomic():
+            insert(Bill, [bill for bill, _, _, _ in pending], self.batch_size)
+            BillItem.objects.bulk_create((
+                BillItem(bill=bill, item=item, quantity=qty, price=item.price)
+                for bill, lines, _, _ in pending for item, qty in lines
+            ), batch_size=self.batch_size)
+            BillPayment.objects.bulk_create((
+                BillPayment(bill=bill, payment_type=kind, amount=amount)
+                for bill, _, payments, _ in pending if len(payments) > 1 for kind, amount in payments
+            ), batch_size=self.batch_size)
+            Students = Bill.student_employees.through
+            Students.objects.bulk_create((
+                Students(bill_id=bill.pk, user_id=student.pk)
+                for bill, _, _, students in pending for student in students
+            ), batch_size=self.batch_size)
+        self.log(f"  {pending[-1][0].created_at.date()}: {len(pending)} bills")
+
+    def session(self, day, status):
+        session = InventorySession(
+            outlet_name=self.random.choice(MOBILE_OUTLETS), created_by=self.random.choice(self.staff),
+            created_at=self.moment(day), status=status, payment_status='PAID',
+        )
+        lines = [(item, qty + 2, self.random.randint(0, 2)) for item, qty in self.lines((2, 6))]
+        sold = [(item, taken - returned) for item, taken, returned in lines if taken > returned]
+        total = sum((item.price * qty for item, qty in sold), Decimal(0))
+        students = self.random.sample(self.students, min(2, len(self.students)))
+        return session, lines, sold, total, self.split(total), students
+
+    def sessions(self, total):
+        """
+        `total` closed sessions spread over the period, each with the SALES bill
+        close_session() would have generated, plus today's still-open, balanced
+        sessions: one per mobile outlet, ready to be closed.
+        """
+        pending = []
+        for day, count in self.spread(total):
+            numbers = INVOICE_SERIES['SALES'].reserve(count, self.moment(day))
+            for number in numbers:
+                session, lines, sold, amount, payments, students = self.session(day, 'CLOSED')
+                session.bill = Bill(
+                    invoice_number=number, bill_type='SALES', created_by=session.created_by,
+                    created_at=session.created_at + timedelta(minutes=self.random.randrange(30, 180)),
+                    outlet_name=session.outlet_name, payment_status='PAID', payment_type=payments[0][0],
+                    total_amount=amount,
+                )
+                session.bill.search_text = bill_search_text(session.bill)
+                pending.append((session, lines, sold, payments, students))
+                if len(pending) >= self.batch_size:
+                    self.write_sessions(pending)
+                    pending = []
+        self.write_sessions(pending)
+
+        today = []
+        for outlet in MOBILE_OUTLETS:
+            session, lines, _, _, payments, students = self.session(self.today, 'OPEN')
+            session.outlet_name = outlet
+            today.append((session, lines, [], payments, students))
+        self.write_sessions(today)
+
+    def write_sessions(self, pending):
+        if not pending:
+            return
+        with explicit_timestamps(Bill, InventorySession), transaction.atomic():
+            closed = [(session.bill, sold, payments, students) for session, _, sold, payments, students in pending if session.bill]
+            insert(Bill, [bill for bill, _, _, _ in closed], self.batch_size)
+            BillItem.objects.bulk_create((
+                BillItem(bill=bill, item=item, quantity=qty, price=item.price)
+                for bill, sold, _, _ in closed for item, qty in sold
+            ), batch_size=self.batch_size)
+            BillPayment.objects.bulk_create((
+                BillPayment(bill=bill, payment_type=kind, amount=amount)
+                for bill, _, payments, _ in closed for kind, amount in payments
+            ), batch_size=self.batch_size)
+            BillStudents = Bill.student_employees.through
+            BillStudents.objects.bulk_create((
+                BillStudents(bill_id=bill.pk, user_id=student.pk)
+                for bill, _, _, students in closed for student in students
+            ), batch_size=self.batch_size)
+
+            for session, *_ in pending:
+                if session.bill:
+                    session.bill_id = session.bill.pk  # insert() may only have set the pk after assignment
+            insert(InventorySession, [session for session, *_ in pending], self.batch_size)
+            InventorySessionItem.objects.bulk_create((
+                InventorySessionItem(session=session, item=item, quantity_taken=taken, quantity_returned=returned)
+                for session, lines, _, _, _ in pending for item, taken, returned in lines
+            ), batch_size=self.batch_size)
+            InventorySessionPayment.objects.bulk_create((
+                InventorySessionPayment(session=session, payment_type=kind, amount=amount)
+                for session, _, _, payments, _ in pending for kind, amount in payments
+            ), batch_size=self.batch_size)
+            Students = InventorySession.student_employees.through
+            Students.objects.bulk_create((
+                Students(inventorysession_id=session.pk, user_id=student.pk)
+                for session, _, _, _, students in pending for student in students
+            ), batch_size=self.batch_size)
+
+    def purchases(self, total):
+        purchases, payments, written = [], [], 0
+        for day, count in self.spread(total):
+            for number in PURCHASE_ORDER_SERIES.reserve(count, self.moment(day)):
+                vendor = self.random.choice(self.vendors)
+                status = self.choose({'PAID': 70, 'PENDING': 28, 'CANCELLED': 2})
+                amount = Decimal(self.random.randrange(500, 50000))
+                purchases.append(PurchaseRecord(
+                    vendor=vendor, purchase_order_id=number, description='Stock purchase', total_amount=amount,
+                    ordered_date=day, received_date=day + timedelta(days=1), payment_status=status,
+                    payment_type=self.random.choice(['NEFT', 'CHEQUE', 'UPI']),
+                    payment_date=day + timedelta(days=7) if status == 'PAID' else None,
+                    date=self.moment(day), purchased_by=self.random.choice(self.staff),
+                ))
+                if status == 'PAID':
+                    payments.append(VendorPayment(vendor=vendor, amount=amount, date=self.moment(day), status='PAID',
+                                                  approval_status=True))
+                if len(purchases) >= self.batch_size:
+                    written += self.write_purchases(purchases, payments)
+                    purchases, payments = [], []
+        return written + self.write_purchases(purchases, payments)
+
+    def write_purchases(self, purchases, payments):
+        with transaction.atomic():
+            PurchaseRecord.objects.bulk_create(purchases, batch_size=self.batch_size)
+            VendorPayment.objects.bulk_create(payments, batch_size=self.batch_size)
+        return len(purchases)
+
+    def run(self, users_per_role, items, customers, vendors, bills, sessions, purchases):
+        self.log(f"Users ({users_per_role} per role), {items} items, {customers} customers, {vendors} vendors")
+        self.users(users_per_role)
+        self.master_data(items, customers, vendors)
+        self.log(f"{bills} bills over {self.days} days")
+        self.bills(bills)
+        self.log(f"{sessions} closed inventory sessions (plus today's open ones), {purchases} purchases")
+        self.sessions(sessions)
+        self.purchases(purchases)
+
+        self.log("Rebuilding the sales rollup and stock ledger")
+        reconcile_sales_rollup([self.today - timedelta(days=n) for n in range(self.days)])
+        rebuild_stock_ledger(batch_size=self.batch_size)
+        invalidate_item_catalogue()
+        invalidate_customer_lookup()
+        invalidate_dashboard_metrics()
+        invalidate_period_reports()
@@ -0,0 +1,13 @@
+from django import template
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, token=None):
+    # Current query string (filters, sort, search) with the page cursor swapped for `token`
+    params = context['request'].GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    if token:
+        params['cursor'] = token
+    return f"?{params.urlencode()}"
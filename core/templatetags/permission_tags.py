@@ -33,7 +33,7 @@ def has_bill_permission(user, bill, action='view'):
             
         # Legacy/Creator fallback
         if action == 'edit' or action == 'delete':
-             if bill.created_by == user:
+             if bill.created_by_id == user.id:
                  return True
                  
     return False
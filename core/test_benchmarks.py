@@ -0,0 +1,72 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from core.benchmarks import CASES, compare_results, run_benchmarks
+from core.jobs import WEASYPRINT_AVAILABLE
+from core.models import Bill, BillItem, BillPayment, InventorySession, PurchaseRecord, StockMovement, User
+from core.rollups import reconcile_sales_rollup
+from core.synthetic import MOBILE_OUTLETS, OUTLETS, ShopDataGenerator
+
+
+class SyntheticDataTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        generator = ShopDataGenerator(seed=1, days=10, batch_size=40)
+        generator.run(users_per_role=2, items=20, customers=15, vendors=5, bills=120, sessions=12, purchases=20)
+        self.today = timezone.localdate()
+
+    def test_volumes_and_consistency(self):
+        self.assertEqual(User.objects.count(), 2 * len(User.ROLE_CHOICES))
+        self.assertEqual(Bill.objects.count(), 120 + 12)
+        self.assertEqual(InventorySession.objects.filter(status='CLOSED', bill__bill_type='SALES').count(), 12)
+        open_sessions = InventorySession.objects.filter(status='OPEN', created_at__date=self.today)
+        self.assertEqual(sorted(open_sessions.values_list('outlet_name', flat=True)), MOBILE_OUTLETS)
+        self.assertEqual(InventorySession.objects.count(), 12 + len(MOBILE_OUTLETS))
+        self.assertEqual(PurchaseRecord.objects.count(), 20)
+        self.assertEqual(Bill.objects.values('invoice_number').distinct().count(), 120 + 12)
+        self.assertEqual(set(Bill.objects.filter(bill_type='SALES').values_list('outlet_name', flat=True)), set(OUTLETS))
+        self.assertFalse(Bill.objects.filter(created_at__lt=timezone.now() - timedelta(days=11)).exists())
+        self.assertGreater(Bill.objects.filter(created_at__lt=timezone.now() - timedelta(days=2)).count(), 0)
+        for bill in Bill.objects.prefetch_related('items', 'payments'):
+            self.assertEqual(sum(i.total for i in bill.items.all()), bill.total_amount)
+            if bill.payments.exists():
+                self.assertEqual(bill.payments.aggregate(total=Sum('amount'))['total'], bill.total_amount)
+        self.assertTrue(BillPayment.objects.exists())
+        self.assertTrue(StockMovement.objects.exists())
+        self.assertEqual(reconcile_sales_rollup([self.today - timedelta(days=n) for n in range(10)]), 0)
+
+    def test_benchmarks_leave_data_unchanged(self):
+        admin = User.objects.filter(role='ADMIN').first()
+        bills, items = Bill.objects.count(), BillItem.objects.count()
+        results = run_benchmarks(admin, repeat=2)
+        self.assertEqual(set(results['results']), {case.name for case in CASES})
+        for name, result in results['results'].items():
+            if name == 'export_bills_pdf' and not WEASYPRINT_AVAILABLE:
+                continue
+            self.assertIn(result['status'], (200, 302), name)
+            self.assertEqual(result['runs'], 2)
+        self.assertEqual(results['meta']['rows']['Bill'], bills)
+        self.assertEqual((Bill.objects.count(), BillItem.objects.count()), (bills, items))
+        self.assertEqual(results['results']['create_bill']['status'], 302)
+
+        rows = compare_results(results, results)
+        self.assertEqual({change for _, _, _, change, _, _ in rows}, {0.0})
+
+    def test_command_writes_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'run.json'
+            call_command('run_benchmarks', '--repeat', '1', '--only', 'bill_list', '--output', str(path), stdout=StringIO())
+            out = StringIO()
+            call_command('run_benchmarks', '--repeat', '1', '--only', 'bill_list', '--output', str(path),
+                         '--compare', str(path), stdout=out)
+            self.assertEqual(list(json.loads(path.read_text())['results']), ['bill_list'])
+            self.assertIn('queries', out.getvalue())
@@ -0,0 +1,87 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.billing import BillWriter
+from core.forms import BillForm, BillPaymentFormSet
+from core.models import User, Bill, BillItem, Item
+
+
+def writes(queries):
+    return [q['sql'] for q in queries if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+
+class BillWriterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cashier', password='password', role='EMPLOYEE')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.tea = Item.objects.create(name='Tea', price=Decimal('10'))
+        self.form_data = {'payment_type': 'CASH', 'advance_payment': '0', 'payment_status': 'PAID', 'outlet_name': 'LIBA'}
+
+    def line(self, item, quantity, price=None, custom=''):
+        return {'item': item, 'custom_item_name': custom, 'quantity': quantity, 'price': Decimal(price or item.price)}
+
+    def test_create_writes_lines_in_bulk(self):
+        form = BillForm(self.form_data)
+        self.assertTrue(form.is_valid(), form.errors)
+        lines = [self.line(self.coffee, 2), self.line(self.tea, 3), self.line(None, 1, '15', 'Muffin')]
+        with CaptureQueriesContext(connection) as ctx:
+            bill = BillWriter(form, lines).save(bill_type='SALES', created_by=self.user)
+
+        bill.refresh_from_db()
+        self.assertEqual(bill.total_amount, Decimal('85'))
+        self.assertEqual(bill.items.count(), 3)
+        item_inserts = [sql for sql in writes(ctx.captured_queries) if 'core_billitem' in sql]
+        self.assertEqual(len(item_inserts), 1)
+
+    def test_edit_applies_only_the_diff(self):
+        form = BillForm(self.form_data)
+        form.is_valid()
+        bill = BillWriter(form, [self.line(self.coffee, 2), self.line(self.tea, 1)]).save(bill_type='SALES', created_by=self.user)
+        coffee_line = bill.items.get(item=self.coffee)
+
+        form = BillForm(self.form_data, instance=bill)
+        self.assertTrue(form.is_valid(), form.errors)
+        BillWriter(form, [self.line(self.coffee, 5), self.line(None, 1, '15', 'Muffin')]).save()
+
+        bill.refresh_from_db()
+        self.assertEqual(bill.total_amount, Decimal('115'))
+        self.assertEqual(bill.items.get(item=self.coffee).pk, coffee_line.pk)
+        self.assertEqual(bill.items.get(item=self.coffee).quantity, 5)
+        self.assertFalse(bill.items.filter(item=self.tea).exists())
+        self.assertTrue(bill.items.filter(custom_item_name='Muffin').exists())
+
+    def test_unchanged_edit_writes_no_lines(self):
+        form = BillForm(self.form_data)
+        form.is_valid()
+        bill = BillWriter(form, [self.line(self.coffee, 2)]).save(bill_type='SALES', created_by=self.user)
+
+        form = BillForm(self.form_data, instance=bill)
+        form.is_valid()
+        with CaptureQueriesContext(connection) as ctx:
+            BillWriter(form, [{'item': self.coffee, 'custom_item_name': '', 'quantity': 2, 'price': Decimal('20')}]).save()
+        self.assertFalse([sql for sql in writes(ctx.captured_queries) if 'core_billitem' in sql])
+
+    def test_payments_saved_with_bill(self):
+        form = BillForm(self.form_data)
+        form.is_valid()
+        payments = BillPaymentFormSet({
+            'payments-TOTAL_FORMS': '2', 'payments-INITIAL_FORMS': '0',
+            'payments-0-payment_type': 'CASH', 'payments-0-amount': '30',
+            'payments-1-payment_type': 'UPI', 'payments-1-amount': '10',
+        }, prefix='payments')
+        self.assertTrue(payments.is_valid(), payments.errors)
+        bill = BillWriter(form, [self.line(self.coffee, 2)], payments).save(bill_type='SALES', created_by=self.user)
+        self.assertEqual(sorted(p.payment_type for p in bill.payments.all()), ['CASH', 'UPI'])
+
+    def test_failure_rolls_back_everything(self):
+        form = BillForm(self.form_data)
+        form.is_valid()
+        with mock.patch.object(BillItem.objects, 'bulk_create', side_effect=RuntimeError('db gone')):
+            with self.assertRaises(RuntimeError):
+                BillWriter(form, [self.line(self.coffee, 2)]).save(bill_type='SALES', created_by=self.user)
+        self.assertFalse(Bill.objects.exists())
+        self.assertFalse(BillItem.objects.exists())
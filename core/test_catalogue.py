@@ -0,0 +1,94 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.catalogue import get_item_catalogue_version, item_catalogue
+from core.models import User, Item
+
+
+def item_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'FROM "core_item"' in q['sql']]
+
+
+def prices(catalogue):
+    return {item['id']: item['price'] for item in json.loads(catalogue['json'])['items']}
+
+
+class ItemCatalogueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='password', role='ADMIN')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.old = Item.objects.create(name='Old Stock', price=Decimal('5'), is_active=False)
+
+    def test_catalogue_contents(self):
+        catalogue = item_catalogue()
+        self.assertEqual(catalogue['items'], [self.coffee, self.old])
+        self.assertEqual(catalogue['choices'][1:], [(self.coffee.pk, 'Coffee'), (self.old.pk, 'Old Stock')])
+        self.assertEqual(json.loads(item_catalogue(active_only=True)['json']),
+                         {'items': [{'id': self.coffee.pk, 'name': 'Coffee', 'price': '20.00'}]})
+
+    def test_bill_form_renders_without_item_queries(self):
+        self.client.force_login(self.admin)
+        url = reverse('create_bill', args=['SALES'])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Coffee')
+        self.assertEqual(item_queries(ctx), [])
+
+    def test_item_changes_start_a_new_version(self):
+        item_catalogue()
+        self.coffee.price = Decimal('25')
+        self.coffee.save()
+        self.assertEqual(prices(item_catalogue())[self.coffee.pk], '25.00')
+
+        self.coffee.delete()
+        self.assertEqual(item_catalogue()['items'], [self.old])
+
+    def test_bumped_again_after_commit(self):
+        # Another worker may read the old rows between the first bump and the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coffee.price = Decimal('25')
+            self.coffee.save()
+            in_transaction = get_item_catalogue_version()
+        self.assertNotEqual(get_item_catalogue_version(), in_transaction)
+
+    def test_admin_list_editable_invalidates(self):
+        item_catalogue()
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:core_item_changelist'), {
+            'form-TOTAL_FORMS': '2', 'form-INITIAL_FORMS': '2',
+            'form-0-id': str(self.coffee.pk), 'form-0-price': '30', 'form-0-is_active': 'on',
+            'form-1-id': str(self.old.pk), 'form-1-price': '5',
+            '_save': 'Save',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(prices(item_catalogue())[self.coffee.pk], '30.00')
+
+    def test_endpoint_etag_and_304(self):
+        self.client.force_login(self.admin)
+        url = reverse('item_catalogue')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual([item['name'] for item in response.json()['items']], ['Coffee'])
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.assertNotEqual(self.client.get(url + '?scope=all')['ETag'], etag)
+
+        Item.objects.create(name='Tea', price=Decimal('10'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 2)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.customers import customer_suggestions
+from core.forms import BillForm
+from core.models import User, Bill, Customer
+
+
+class CustomerLookupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.asha = Customer.objects.create(customer_name='Asha Traders', contact_number='9840012345')
+        self.ashok = Customer.objects.create(customer_name='Ashok Stores')
+        self.ravi = Customer.objects.create(customer_name='Ravi', contact_number='9840099999')
+
+    def test_prefix_on_name_and_contact(self):
+        self.assertEqual([r['id'] for r in customer_suggestions('ash')], [self.asha.pk, self.ashok.pk])
+        self.assertEqual(customer_suggestions('ASHA')[0]['text'], 'Asha Traders (9840012345)')
+        self.assertEqual([r['id'] for r in customer_suggestions('98400')], [self.asha.pk, self.ravi.pk])
+        self.assertEqual(customer_suggestions('traders'), [])
+        self.assertEqual(customer_suggestions('  '), [])
+
+    @override_settings(CUSTOMER_LOOKUP_LIMIT=1)
+    def test_limit(self):
+        self.assertEqual(len(customer_suggestions('ash')), 1)
+
+    def test_cached_per_prefix_until_customers_change(self):
+        customer_suggestions('ash')
+        with self.assertNumQueries(0):
+            customer_suggestions('Ash ')
+        Customer.objects.create(customer_name='Ashwin')
+        self.assertEqual(len(customer_suggestions('ash')), 3)
+        self.ashok.delete()
+        self.assertEqual(len(customer_suggestions('ash')), 2)
+
+    def test_endpoint(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('customer_lookup'), {'q': 'rav'})
+        self.assertEqual(response.json(), {'results': [{'id': self.ravi.pk, 'text': 'Ravi (9840099999)'}]})
+
+    def test_endpoint_refuses_students(self):
+        student = User.objects.create_user(username='student', password='password', role='STUDENT')
+        self.client.force_login(student)
+        response = self.client.get(reverse('customer_lookup'), {'q': 'rav'})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(b'Ravi', response.content)
+
+    def test_form_renders_only_selected_customer(self):
+        for n in range(30):
+            Customer.objects.create(customer_name=f'Bulk {n}')
+        self.assertNotIn('Asha', str(BillForm()['customer']))
+
+        bill = Bill.objects.create(bill_type='OUTER', created_by=self.admin, customer=self.ravi)
+        html = str(BillForm(instance=bill)['customer'])
+        self.assertIn(f'value="{self.ravi.pk}" selected', html)
+        self.assertEqual(html.count('<option'), 2)
+
+        form = BillForm({'customer': str(self.asha.pk)})
+        self.assertIn('Asha Traders', str(form['customer']))
+        form.is_valid()
+        self.assertEqual(form.cleaned_data['customer'], self.asha)
+
+    def test_outer_bill_page_does_not_list_customers(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('create_bill', args=['OUTER']))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Ashok Stores')
+        self.assertContains(response, reverse('customer_lookup'))
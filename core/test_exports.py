@@ -0,0 +1,55 @@
+import csv
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import User, Bill, Customer, Vendor, PurchaseRecord
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+
+@mock.patch('core.exports.EXPORT_CHUNK_SIZE', 3)
+class StreamingExportTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        customer = Customer.objects.create(customer_name='Loyola Canteen')
+        for n in range(7):
+            Bill.objects.create(bill_type='INNER', created_by=self.admin, customer=customer if n % 2 else None,
+                                customer_name='Walk-in', total_amount=Decimal(n))
+        vendor = Vendor.objects.create(vendor_id='V1', name='Fresh Farms', bank_name='SBI')
+        for n in range(5):
+            PurchaseRecord.objects.create(vendor=vendor, description='veg', total_amount=Decimal('10.50'), purchased_by=self.admin)
+        self.client.force_login(self.admin)
+
+    def test_bill_export_streams_every_row_in_order(self):
+        response = self.client.get(reverse('export_bills'))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = read_csv(response)
+        self.assertEqual(rows[0][0], 'Invoice')
+        expected = list(Bill.objects.order_by('-created_at', '-id').values_list('invoice_number', flat=True))
+        self.assertEqual([r[0] for r in rows[1:]], expected)
+        self.assertEqual({r[2] for r in rows[1:]}, {'Loyola Canteen', 'Walk-in'})
+
+    def test_invoice_export(self):
+        rows = read_csv(self.client.get(reverse('invoice_export')))
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[1][3], 'Inner Bill')
+
+    def test_purchase_export_grand_total(self):
+        rows = read_csv(self.client.get(reverse('export_purchases')))
+        self.assertEqual(len(rows), 1 + 5 + 3)
+        self.assertEqual(rows[-1][5], '52.50')
+
+        rows = read_csv(self.client.get(reverse('export_pending_purchases')))
+        self.assertEqual(rows[-1][-1], '52.50')
+        self.assertEqual(rows[3][4], 'SBI')
+
+    def test_vendor_export(self):
+        rows = read_csv(self.client.get(reverse('export_vendors')))
+        self.assertEqual(rows[1][:2], ['1', 'Fresh Farms'])
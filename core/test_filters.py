@@ -0,0 +1,64 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.filters import BillQuery
+from core.models import User, Bill, Customer
+
+
+class BillQueryTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.student = User.objects.create_user(username='student', password='password', role='STUDENT')
+        self.customer = Customer.objects.create(customer_name='Loyola Canteen')
+
+    def make_bill(self, created_at, **kwargs):
+        bill = Bill.objects.create(bill_type='SALES', created_by=self.admin, outlet_name='MOBILE_1', **kwargs)
+        Bill.objects.filter(pk=bill.pk).update(created_at=created_at)
+        bill.student_employees.add(self.student)
+        return bill
+
+    def test_date_range_is_inclusive_ist_days(self):
+        ist = ZoneInfo('Asia/Kolkata')
+        early = self.make_bill(datetime(2026, 3, 16, 0, 30, tzinfo=ist))
+        late = self.make_bill(datetime(2026, 3, 16, 23, 30, tzinfo=ist))
+        self.make_bill(datetime(2026, 3, 17, 0, 5, tzinfo=ist))
+
+        qs = BillQuery({'start_date': '2026-03-16', 'end_date': '2026-03-16'}).queryset()
+        self.assertEqual(set(qs), {early, late})
+
+    def test_invalid_dates_are_ignored(self):
+        self.make_bill(datetime(2026, 3, 16, 12, 0, tzinfo=ZoneInfo('Asia/Kolkata')))
+        self.assertEqual(BillQuery({'start_date': 'garbage'}).queryset().count(), 1)
+
+    def test_search_matches_customer(self):
+        bill = self.make_bill(datetime(2026, 3, 16, 12, 0, tzinfo=ZoneInfo('Asia/Kolkata')), customer=self.customer)
+        self.assertEqual(list(BillQuery({'q': 'canteen'}).queryset()), [bill])
+        self.assertEqual(list(BillQuery({'q': 'canteen'}, search=False).queryset()), [bill])
+
+    def test_bill_list_query_count_is_constant(self):
+        self.client.force_login(self.admin)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('bill_list'))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.make_bill(datetime(2026, 3, 16, 12, 0, tzinfo=ZoneInfo('Asia/Kolkata')), customer=self.customer)
+        few = count_queries()
+        for _ in range(10):
+            self.make_bill(datetime(2026, 3, 16, 12, 0, tzinfo=ZoneInfo('Asia/Kolkata')), customer=self.customer)
+        self.assertEqual(count_queries(), few)
+
+    def test_filtered_list_views_render(self):
+        self.make_bill(datetime(2026, 3, 16, 12, 0, tzinfo=ZoneInfo('Asia/Kolkata')), customer=self.customer)
+        self.client.force_login(self.admin)
+        params = {'bill_type': 'SALES', 'start_date': '2026-03-01', 'end_date': '2026-03-31', 'q': 'Loyola'}
+        for name in ['billing_home', 'bill_list', 'invoice_list', 'export_bills', 'invoice_export']:
+            response = self.client.get(reverse(name), params)
+            self.assertEqual(response.status_code, 200, name)
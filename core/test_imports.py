@@ -0,0 +1,106 @@
+import io
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.catalogue import item_catalogue
+from core.imports import OPENPYXL_AVAILABLE, ImportFileError, import_rows, read_rows
+from core.models import User, Bill, Item, Customer, Vendor
+
+
+def csv_rows(text, name='data.csv'):
+    return read_rows(io.BytesIO(text.encode('utf-8-sig')), name)
+
+
+class MasterDataImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+
+    def test_items_upsert_on_name(self):
+        Item.objects.create(name='Coffee', price=Decimal('20'))
+        item_catalogue()
+        result = import_rows('items', csv_rows(
+            "Name,Price,Notes\n"
+            "Coffee,25,cheaper elsewhere\n"
+            "Tea,10,\n"
+            "Cake,abc,\n"
+            "Tea,12,\n"
+            ",,\n"
+        ))
+        self.assertEqual((result.created, result.updated, result.duplicates, result.error_count), (1, 1, 1, 1))
+        self.assertEqual(result.errors, [(4, 'price: Enter a number.')])
+        self.assertEqual(result.ignored_columns, ['notes'])
+        self.assertEqual(dict(Item.objects.values_list('name', 'price')), {'Coffee': Decimal('25'), 'Tea': Decimal('12')})
+        self.assertTrue(Item.objects.get(name='Tea').is_active)  # no is_active column: model default
+        self.assertEqual(len(item_catalogue()['items']), 2)
+
+    def test_dry_run_writes_nothing(self):
+        Item.objects.create(name='Coffee', price=Decimal('20'))
+        with self.assertNumQueries(1):  # one key lookup for the chunk
+            result = import_rows('items', csv_rows("name,price,is_active\nCoffee,25,no\nTea,10,yes\n"), dry_run=True)
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual(Item.objects.get().price, Decimal('20'))
+
+    @override_settings(IMPORT_CHUNK_SIZE=2)
+    def test_chunks_and_cross_chunk_duplicates(self):
+        rows = "name,price\n" + "".join(f"Snack {n % 3},{n}\n" for n in range(7))
+        result = import_rows('items', csv_rows(rows))
+        self.assertEqual((result.created, result.updated, result.duplicates), (3, 0, 4))
+        self.assertEqual(Item.objects.get(name='Snack 0').price, Decimal('6'))
+
+    def test_vendors_upsert_on_vendor_id(self):
+        Vendor.objects.create(vendor_id='V1', name='Old Name', bank_name='SBI')
+        result = import_rows('vendors', csv_rows("vendor_id,name\nV1,Acme\nV2,Beans Co\n"))
+        self.assertEqual((result.created, result.updated), (1, 1))
+        vendor = Vendor.objects.get(vendor_id='V1')
+        self.assertEqual((vendor.name, vendor.bank_name), ('Acme', 'SBI'))
+        self.assertEqual(Vendor.objects.count(), 2)
+
+    def test_customers_dedupe_on_contact(self):
+        customer = Customer.objects.create(customer_name='Asha', contact_number='98400')
+        bill = Bill.objects.create(bill_type='OUTER', created_by=self.admin, customer=customer)
+        result = import_rows('customers', csv_rows(
+            "customer_name,contact_number,email_id\n"
+            "Asha Traders,98400,\n"
+            "Walk-in,,\n"
+            "Walk-in,,\n"
+            "Bad Mail,1,not-an-email\n"
+        ))
+        self.assertEqual((result.created, result.updated, result.error_count), (2, 1, 1))
+        self.assertEqual(Customer.objects.filter(customer_name='Walk-in').count(), 2)
+        bill.refresh_from_db()
+        self.assertIn('asha traders', bill.search_text)
+
+    def test_missing_required_column(self):
+        with self.assertRaisesMessage(ImportFileError, 'Missing column(s): price'):
+            import_rows('items', csv_rows("name\nCoffee\n"))
+        with self.assertRaises(ImportFileError):
+            list(csv_rows("name,price\n", name='data.txt'))
+
+    def test_unreadable_files(self):
+        self.client.force_login(self.admin)
+        url = reverse('import_master_data', args=['items'])
+        upload = SimpleUploadedFile('items.csv', "name,price\nCoffee,20\nCafé,30\n".encode('cp1252'), content_type='text/csv')
+        response = self.client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Line 3: the file is not UTF-8 text')
+        self.assertFalse(Item.objects.exists())
+        with self.assertRaisesMessage(ImportFileError, 'not valid CSV'):
+            list(csv_rows('name,price\n"%s",20\n' % ('x' * 200000)))
+        if OPENPYXL_AVAILABLE:
+            with self.assertRaisesMessage(ImportFileError, 'not a readable .xlsx workbook'):
+                list(read_rows(io.BytesIO(b'name,price\n'), 'data.xlsx'))
+
+    def test_upload_view(self):
+        self.client.force_login(self.admin)
+        url = reverse('import_master_data', args=['items'])
+        upload = SimpleUploadedFile('items.csv', b"name,price\nCoffee,20\nTea,x\n", content_type='text/csv')
+        response = self.client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertContains(response, 'price: Enter a number.')
+        self.assertEqual(self.client.get(reverse('import_master_data', args=['bills'])).status_code, 404)
@@ -0,0 +1,53 @@
+import re
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from core.filters import BillQuery, local_day_start
+from core.models import User, Bill, PurchaseRecord, InventorySession, ActivityLog
+
+
+@skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN parsing is implemented for SQLite and MySQL')
+class AccessPathIndexTest(TestCase):
+    """Fails if any of the hot list/dashboard queries falls back to a full table scan."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cashier', password='password', role='EMPLOYEE')
+        today = date(2026, 3, 16)
+        self.day_start = local_day_start(today)
+        self.day_end = local_day_start(today + timedelta(days=1))
+
+    def assertNoFullScan(self, qs):
+        if connection.vendor == 'mysql':
+            plan = qs.explain(format='json')
+            self.assertNotRegex(plan, r'"access_type":\s*"ALL"', msg=f"{qs.query}\n{plan}")
+        else:
+            plan = qs.explain()
+            full_scans = [line for line in plan.splitlines()
+                          if re.search(r'\bSCAN core_\w+\s*$', line)]
+            self.assertEqual(full_scans, [], msg=f"{qs.query}\n{plan}")
+
+    def test_dashboard_queries(self):
+        today = Bill.objects.filter(created_at__gte=self.day_start, created_at__lt=self.day_end)
+        self.assertNoFullScan(today.exclude(payment_status='CANCELLED'))
+        self.assertNoFullScan(today)
+        self.assertNoFullScan(Bill.objects.filter(payment_status='PENDING'))
+        self.assertNoFullScan(Bill.objects.filter(payment_status='CANCELLED'))
+        self.assertNoFullScan(Bill.objects.order_by('-created_at')[:10])
+        self.assertNoFullScan(Bill.objects.filter(created_by=self.user))
+
+    def test_bill_list_queries(self):
+        params = {'start_date': '2026-03-01', 'end_date': '2026-03-16'}
+        self.assertNoFullScan(BillQuery(params).queryset())
+        self.assertNoFullScan(BillQuery({**params, 'bill_type': 'SALES'}).queryset())
+        self.assertNoFullScan(BillQuery({'payment_status': 'PENDING'}).queryset())
+        self.assertNoFullScan(BillQuery({}).queryset(user=self.user))
+        self.assertNoFullScan(BillQuery({}).queryset()[:25])
+
+    def test_purchase_session_and_activity_queries(self):
+        self.assertNoFullScan(PurchaseRecord.objects.filter(payment_status='PENDING', ordered_date__gte=date(2026, 3, 1)).order_by('ordered_date'))
+        self.assertNoFullScan(PurchaseRecord.objects.order_by('-ordered_date')[:25])
+        self.assertNoFullScan(InventorySession.objects.filter(status='OPEN').order_by('-created_at'))
+        self.assertNoFullScan(ActivityLog.objects.filter(user=self.user).order_by('-timestamp')[:20])
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.instrumentation import QUERY_BUDGETS, RequestCost, fingerprint, percentile, request_stats, reset_request_stats
+from core.models import (
+    User, Bill, BillItem, BillPayment, Customer, Item, InventorySession, InventorySessionItem, InventorySessionPayment,
+    PurchaseRecord, Vendor,
+)
+from core.stock import sync_session_stock
+
+ROWS = 15  # rows per table; a view issuing a query per row goes over its budget
+
+
+class RequestCostTest(TestCase):
+    def setUp(self):
+        reset_request_stats()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.client.force_login(self.admin)
+
+    def test_fingerprint_collapses_lists(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'), 'SELECT * FROM t WHERE id IN (...)')
+        self.assertEqual(fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'), 'INSERT INTO t (a, b) VALUES (...), ...')
+        self.assertEqual(fingerprint('SELECT  *\n FROM t WHERE id = %s'), 'SELECT * FROM t WHERE id = %s')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_duplicates(self):
+        cost = RequestCost()
+        for sql in ['SELECT a FROM t WHERE id = %s'] * 3 + ['SELECT b FROM u']:
+            cost(lambda *args: None, sql, (), False, {})
+        self.assertEqual(cost.queries, 4)
+        self.assertEqual(cost.duplicates(), [(3, 'SELECT a FROM t WHERE id = %s')])
+
+    @override_settings(REQUEST_SERVER_TIMING=True)
+    def test_header_stats_and_log(self):
+        with self.assertLogs('core.requests', level='DEBUG') as logs:
+            response = self.client.get(reverse('item_list'))
+        cost = response.wsgi_request.request_cost
+        self.assertGreater(cost.queries, 0)
+        self.assertIn(f'desc="{cost.queries} queries"', response['Server-Timing'])
+        self.assertIn('view=item_list method=GET status=200', logs.output[0])
+        self.assertEqual(request_stats()['item_list']['count'], 1)
+
+    @override_settings(REQUEST_SERVER_TIMING=False)
+    def test_header_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('item_list')))
+        del settings.REQUEST_SERVER_TIMING  # unset: follows DEBUG, off in tests
+        self.assertNotIn('Server-Timing', self.client.get(reverse('item_list')))
+
+
+class QueryBudgetTest(TestCase):
+    """Every view in QUERY_BUDGETS, against a few rows in each table, stays within its budget."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        students = User.objects.bulk_create(User(username=f'student{n}', role='STUDENT') for n in range(3))
+        items = Item.objects.bulk_create(Item(name=f'Item {n}', price=Decimal('10')) for n in range(ROWS))
+        customers = [Customer.objects.create(customer_name=f'Customer {n}', contact_number=f'90000000{n:02d}') for n in range(ROWS)]
+        vendors = Vendor.objects.bulk_create(Vendor(vendor_id=f'V{n}', name=f'Vendor {n}') for n in range(ROWS))
+        for n in range(ROWS):
+            bill = Bill.objects.create(bill_type='OUTER', created_by=self.admin, customer=customers[n], outlet_name='LIBA',
+                                       total_amount=Decimal('20'))
+            bill.student_employees.set(students)
+            BillItem.objects.create(bill=bill, item=items[n], quantity=2, price=Decimal('10'))
+            BillPayment.objects.create(bill=bill, payment_type='CASH', amount=Decimal('20'))
+            PurchaseRecord.objects.create(vendor=vendors[n], description='Stock', total_amount=Decimal('100'), purchased_by=self.admin)
+            session = InventorySession.objects.create(outlet_name='MOBILE_1', created_by=self.admin, customer=customers[n])
+            session.student_employees.set(students)
+            InventorySessionItem.objects.create(session=session, item=items[n], quantity_taken=3, quantity_returned=1)
+            InventorySessionPayment.objects.create(session=session, payment_type='CASH', amount=Decimal('20'))
+            sync_session_stock(session, self.admin)
+        self.client.force_login(self.admin)
+
+    def test_views_within_budget(self):
+        for view, budget in QUERY_BUDGETS.items():
+            with self.subTest(view=view):
+                response = self.client.get(reverse(view))
+                self.assertEqual(response.status_code, 200)
+                cost = response.wsgi_request.request_cost
+                self.assertLessEqual(cost.queries, budget, cost.duplicates())
@@ -0,0 +1,217 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.inventory import close_session, close_sessions, open_sessions
+from core.models import (
+    User, Bill, BillItem, BillPayment, Item, InventorySession, InventorySessionItem, InventorySessionPayment, StockBalance,
+)
+from core.rollups import reconcile_day
+from core.search import bill_search_text
+from core.stock import sync_session_stock
+
+
+class CloseInventorySessionTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.student = User.objects.create_user(username='student', password='password', role='STUDENT')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.tea = Item.objects.create(name='Tea', price=Decimal('10'))
+        self.session = InventorySession.objects.create(outlet_name='MOBILE_1', created_by=self.admin, payment_status='PAID')
+        self.session.student_employees.add(self.student)
+        InventorySessionItem.objects.create(session=self.session, item=self.coffee, quantity_taken=5, quantity_returned=2)
+        InventorySessionItem.objects.create(session=self.session, item=self.tea, quantity_taken=4, quantity_returned=0)
+        InventorySessionItem.objects.create(session=self.session, item=self.tea, quantity_taken=1, quantity_returned=1)
+        InventorySessionPayment.objects.create(session=self.session, payment_type='UPI', amount=Decimal('70'), reference_number='R1')
+        InventorySessionPayment.objects.create(session=self.session, payment_type='CASH', amount=Decimal('30'))
+
+    def test_total_matches_lines(self):
+        # Regression: the lines used to be added to total_amount a second time
+        bill, created = close_session(self.session.pk, self.admin)
+        bill.refresh_from_db()
+        self.assertTrue(created)
+        self.assertEqual(bill.total_amount, Decimal('100'))
+        self.assertEqual(sum(i.total for i in bill.items.all()), bill.total_amount)
+        self.assertEqual(bill.items.count(), 2)
+        self.assertEqual(bill.payment_type, 'UPI')
+        self.assertEqual([p.amount for p in bill.payments.order_by('id')], [Decimal('70'), Decimal('30')])
+        self.assertEqual(list(bill.student_employees.all()), [self.student])
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'CLOSED')
+        self.assertEqual(self.session.bill, bill)
+
+    def test_query_count_independent_of_lines(self):
+        Bill.objects.create(bill_type='SALES', created_by=self.admin)  # today's invoice sequence already exists
+        with CaptureQueriesContext(connection) as small:
+            close_session(self.session.pk, self.admin)
+
+        large = InventorySession.objects.create(outlet_name='LIBA', created_by=self.admin)
+        large.student_employees.add(self.student)
+        snacks = Item.objects.bulk_create(Item(name=f'Snack {n}', price=Decimal('1')) for n in range(20))
+        InventorySessionItem.objects.bulk_create(InventorySessionItem(session=large, item=i, quantity_taken=1) for i in snacks)
+        InventorySessionPayment.objects.create(session=large, payment_type='CASH', amount=Decimal('20'))
+        with CaptureQueriesContext(connection) as big:
+            close_session(large.pk, self.admin)
+        self.assertEqual(len(big.captured_queries), len(small.captured_queries))
+
+    def test_repeated_close_returns_same_bill(self):
+        bill, _ = close_session(self.session.pk, self.admin)
+        again, created = close_session(self.session.pk, self.admin)
+        self.assertFalse(created)
+        self.assertEqual(again, bill)
+        self.assertEqual(Bill.objects.count(), 1)
+
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('close_inventory_session', args=[self.session.pk]))
+        self.assertRedirects(response, reverse('bill_detail', args=[bill.pk]), fetch_redirect_response=False)
+        self.assertEqual(Bill.objects.count(), 1)
+
+    def test_payment_mismatch_writes_nothing(self):
+        InventorySessionPayment.objects.create(session=self.session, payment_type='CASH', amount=Decimal('1'))
+        with self.assertRaises(ValidationError):
+            close_session(self.session.pk, self.admin)
+        self.assertFalse(Bill.objects.exists())
+        self.assertFalse(BillItem.objects.exists())
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'OPEN')
+
+
+class InventoryListTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.student = User.objects.create_user(username='student', password='password', role='STUDENT')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.tea = Item.objects.create(name='Tea', price=Decimal('10'))
+        self.client.force_login(self.admin)
+
+    def add_session(self, outlet='MOBILE_1', paid=None):
+        session = InventorySession.objects.create(outlet_name=outlet, created_by=self.admin)
+        session.student_employees.add(self.student)
+        InventorySessionItem.objects.create(session=session, item=self.coffee, quantity_taken=5, quantity_returned=2)
+        InventorySessionItem.objects.create(session=session, item=self.tea, quantity_taken=1, quantity_returned=3)
+        if paid is not None:
+            InventorySessionPayment.objects.create(session=session, payment_type='CASH', amount=paid)
+        return session
+
+    def test_totals(self):
+        self.add_session(paid=Decimal('40'))
+        self.add_session(outlet='LIBA')
+        response = self.client.get(reverse('inventory_list'), {'outlet_name': 'MOBILE_1'})
+        [session] = response.context['sessions']
+        self.assertEqual((session.quantity_taken, session.quantity_returned, session.quantity_sold), (6, 5, 3))
+        self.assertEqual(session.expected_amount, Decimal('60'))
+        self.assertEqual(session.paid_amount, Decimal('40'))
+        self.assertEqual(session.balance, Decimal('20'))
+        self.assertContains(response, 'Unbalanced')
+
+    def test_filters(self):
+        closed = self.add_session()
+        closed.status = 'CLOSED'
+        closed.save()
+        self.add_session(outlet='LIBA')
+        response = self.client.get(reverse('inventory_list'), {'status': 'CLOSED'})
+        self.assertEqual([s.pk for s in response.context['sessions']], [closed.pk])
+        response = self.client.get(reverse('inventory_list'), {'start_date': '2000-01-01', 'end_date': '2000-01-31'})
+        self.assertEqual(len(response.context['sessions']), 0)
+
+    def test_query_count_independent_of_sessions(self):
+        self.add_session(paid=Decimal('60'))
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(reverse('inventory_list'))
+        for _ in range(10):
+            self.add_session(paid=Decimal('60'))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('inventory_list'))
+        self.assertEqual(len(response.context['sessions']), 11)
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+
+
+class CloseInventoryDayTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.student = User.objects.create_user(username='student', password='password', role='STUDENT')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+
+    def add_session(self, outlet='MOBILE_1', taken=3, returned=1, paid=Decimal('40')):
+        session = InventorySession.objects.create(outlet_name=outlet, created_by=self.admin)
+        session.student_employees.add(self.student)
+        InventorySessionItem.objects.create(session=session, item=self.coffee, quantity_taken=taken, quantity_returned=returned)
+        InventorySessionPayment.objects.create(session=session, payment_type='UPI', amount=paid)
+        sync_session_stock(session, self.admin)
+        return session
+
+    def test_closes_valid_and_reports_rejected(self):
+        good = [self.add_session(), self.add_session(outlet='LIBA')]
+        unpaid = self.add_session(paid=Decimal('1'))
+        over_returned = self.add_session(returned=5)
+
+        closed, rejected = close_sessions(open_sessions(timezone.localdate()), self.admin)
+        self.assertEqual([session.pk for session, _ in closed], [s.pk for s in good])
+        self.assertEqual({session.pk: len(errors) for session, errors in rejected}, {unpaid.pk: 1, over_returned.pk: 1})
+        self.assertIn('do not match', rejected[0][1][0])
+
+        bills = Bill.objects.order_by('invoice_number')
+        self.assertEqual([b.pk for b in bills], [bill.pk for _, bill in closed])
+        self.assertEqual(len({b.invoice_number for b in bills}), 2)
+        for bill in bills:
+            self.assertEqual(bill.total_amount, Decimal('40'))
+            self.assertEqual(bill.search_text, bill_search_text(bill))
+            self.assertEqual([(i.quantity, i.price) for i in bill.items.all()], [(2, Decimal('20'))])
+            self.assertEqual(list(bill.student_employees.all()), [self.student])
+            self.assertEqual(bill.inventory_session.status, 'CLOSED')
+        self.assertEqual(BillPayment.objects.count(), 2)
+        self.assertEqual(reconcile_day(timezone.localdate()), 0)
+        self.assertFalse(StockBalance.objects.filter(outlet_name='LIBA').exclude(on_hand=0).exists())
+        unpaid.refresh_from_db()
+        self.assertEqual(unpaid.status, 'OPEN')
+
+    def test_outlet_filter(self):
+        self.add_session()
+        liba = self.add_session(outlet='LIBA')
+        closed, rejected = close_sessions(open_sessions(outlets=['LIBA']), self.admin)
+        self.assertEqual([session.pk for session, _ in closed], [liba.pk])
+        self.assertEqual(InventorySession.objects.filter(status='OPEN').count(), 1)
+
+    def test_query_count_independent_of_sessions(self):
+        Bill.objects.create(bill_type='SALES', created_by=self.admin)  # today's invoice sequence already exists
+        self.add_session(outlet='LIBA')
+        with CaptureQueriesContext(connection) as one:
+            close_sessions(open_sessions(outlets=['LIBA']), self.admin)
+        for _ in range(10):
+            self.add_session(outlet='BED')
+        with CaptureQueriesContext(connection) as many:
+            closed, _ = close_sessions(open_sessions(outlets=['BED']), self.admin)
+        self.assertEqual(len(closed), 10)
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+
+    def test_view_and_command(self):
+        session = self.add_session()
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('close_inventory_day'))
+        self.assertEqual([s.pk for s in response.context['sessions']], [session.pk])
+        response = self.client.post(reverse('close_inventory_day'), {'date': timezone.localdate().isoformat()})
+        self.assertContains(response, Bill.objects.get().invoice_number)
+
+        other = self.add_session()
+        for data in ({'date': ''}, {'date': 'yesterday'}):
+            response = self.client.post(reverse('close_inventory_day'), data)
+            self.assertEqual(response.status_code, 400)
+            self.assertContains(response, 'Enter a valid date', status_code=400)
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'OPEN')
+        response = self.client.post(reverse('close_inventory_day'), {'date': '', 'any_date': '1'})
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'CLOSED')
+
+        self.add_session(paid=Decimal('0'))
+        out = StringIO()
+        call_command('close_inventory_sessions', '--user', 'admin', '--any-date', stdout=out)
+        self.assertIn('Closed 0 session(s), rejected 1', out.getvalue())
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import claim_next_job, run_job
+from core.models import User, Bill, ExportJob
+
+
+@override_settings(EXPORT_ROOT=tempfile.mkdtemp(), EXPORT_PDF_BILLS_PER_PART=2)
+class BillPdfExportJobTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        for n in range(5):
+            Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal(n))
+        self.client.force_login(self.admin)
+
+    def fake_write_pdf(self, html_string, path):
+        with open(path, 'w') as f:
+            f.write(html_string)
+
+    @mock.patch('core.views.WEASYPRINT_AVAILABLE', True)
+    def test_pdf_export_is_queued(self):
+        response = self.client.get(reverse('export_bills'), {'format': 'pdf', 'bill_type': 'SALES'})
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('export_job_detail', args=[job.id]))
+        self.assertEqual(job.params, {'bill_type': 'SALES'})
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.id])).json()['status'], 'PENDING')
+
+    @mock.patch('core.jobs.WEASYPRINT_AVAILABLE', True)
+    def test_worker_renders_parts(self):
+        job = ExportJob.objects.create(created_by=self.admin, params={})
+        with mock.patch('core.jobs.write_pdf', self.fake_write_pdf):
+            claimed = claim_next_job()
+            self.assertEqual(claimed.pk, job.pk)
+            self.assertIsNone(claim_next_job())
+            run_job(claimed, processes=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual(len(job.files), 3)
+        status = self.client.get(reverse('export_job_status', args=[job.id])).json()
+        self.assertEqual(len(status['files']), 3)
+        response = self.client.get(status['files'][0]['url'])
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_stale_running_job_is_requeued(self):
+        job = ExportJob.objects.create(created_by=self.admin, params={})
+        self.assertEqual(claim_next_job().pk, job.pk)
+        self.assertIsNone(claim_next_job())
+        ExportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        claimed = claim_next_job()
+        self.assertEqual((claimed.pk, claimed.status), (job.pk, 'RUNNING'))
+        self.assertGreater(claimed.started_at, timezone.now() - timedelta(minutes=1))
+
+    def test_other_users_cannot_download(self):
+        other = User.objects.create_user(username='other', password='password', role='EMPLOYEE')
+        job = ExportJob.objects.create(created_by=other, params={}, status='DONE', files=['x.pdf'])
+        self.client.force_login(User.objects.create_user(username='third', password='password', role='EMPLOYEE'))
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job.id, 1])).status_code, 404)
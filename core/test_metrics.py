@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.caching import get_version
+from core.metrics import dashboard_metrics
+from core.models import User, Bill, Customer, InventoryLog, Item
+
+
+class DashboardMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.employee = User.objects.create_user(username='employee', password='password', role='EMPLOYEE')
+        Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal('100'), payment_status='PAID')
+        Bill.objects.create(bill_type='SALES', created_by=self.employee, total_amount=Decimal('50'))
+        Bill.objects.create(bill_type='INNER', created_by=self.employee, total_amount=Decimal('30'), payment_status='CANCELLED')
+
+    def test_metrics_in_one_query(self):
+        with self.assertNumQueries(4):  # one Bill aggregate + three module counts
+            metrics = dashboard_metrics(self.admin, see_all=True)
+        self.assertEqual(metrics['daily_sales'], Decimal('150'))
+        self.assertEqual(metrics['sales_this_month'], Decimal('150'))
+        self.assertEqual(metrics['pending_payments'], 1)
+        self.assertEqual(metrics['cancelled_bills_count'], 1)
+        self.assertEqual(metrics['invoices_this_month'], 3)
+        self.assertEqual(metrics['invoices_count'], 3)
+        self.assertEqual(dashboard_metrics(self.employee, see_all=False)['invoices_count'], 2)
+
+    def test_cached_until_bill_changes(self):
+        dashboard_metrics(self.admin, see_all=True)
+        with self.assertNumQueries(0):
+            dashboard_metrics(self.admin, see_all=True)
+
+        Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal('25'))
+        self.assertEqual(dashboard_metrics(self.admin, see_all=True)['pending_payments'], 2)
+
+    def test_bumped_again_after_commit(self):
+        # A worker that read the old rows before the commit must not keep them under the new version
+        with self.captureOnCommitCallbacks(execute=True):
+            Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal('25'))
+            in_transaction = get_version('dashboard_metrics'), get_version('period_report')
+        self.assertNotEqual((get_version('dashboard_metrics'), get_version('period_report')), in_transaction)
+
+    def test_module_counts_follow_writes(self):
+        dashboard_metrics(self.admin, see_all=True)
+        coffee = Item.objects.create(name='Coffee', price=Decimal('10'))
+        Customer.objects.create(customer_name='Asha')
+        InventoryLog.objects.create(outlet_name='MOBILE_1', item=coffee, quantity_taken=2, created_by=self.admin)
+        metrics = dashboard_metrics(self.admin, see_all=True)
+        self.assertEqual((metrics['items_count'], metrics['vendors_count'], metrics['inventory_count']), (1, 1, 1))
+
+    def test_dashboard_renders(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['daily_sales'], Decimal('150'))
@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import User, Bill, DocumentSequence, Vendor, PurchaseRecord
+from core.numbering import NumberSeries
+
+
+class InvoiceNumberTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cashier', password='password', role='EMPLOYEE')
+
+    def test_sequential_numbers_per_prefix(self):
+        today_str = timezone.now().strftime('%Y%m%d')
+        first = Bill.objects.create(bill_type='INNER', created_by=self.user)
+        second = Bill.objects.create(bill_type='INNER', created_by=self.user)
+        sales = Bill.objects.create(bill_type='SALES', created_by=self.user)
+        self.assertEqual(first.invoice_number, f"IB-{today_str}0001")
+        self.assertEqual(second.invoice_number, f"IB-{today_str}0002")
+        self.assertEqual(sales.invoice_number, f"SB-{today_str}0001")
+
+    def test_sequence_seeded_from_existing_bills(self):
+        today_str = timezone.now().strftime('%Y%m%d')
+        Bill.objects.create(bill_type='OUTER', created_by=self.user, invoice_number=f"OB-{today_str}0041")
+        bill = Bill.objects.create(bill_type='OUTER', created_by=self.user)
+        self.assertEqual(bill.invoice_number, f"OB-{today_str}0042")
+        self.assertEqual(DocumentSequence.objects.get(prefix='OB', period=today_str).last_value, 42)
+
+
+class NumberSeriesTest(TestCase):
+    def test_purchase_order_ids(self):
+        user = User.objects.create_user(username='buyer', password='password', role='ACCOUNTANT')
+        vendor = Vendor.objects.create(vendor_id='V1', name='Vendor')
+        today_str = timezone.now().strftime('%Y%m%d')
+        ids = [
+            PurchaseRecord.objects.create(vendor=vendor, description='x', total_amount=Decimal('10'), purchased_by=user).purchase_order_id
+            for _ in range(2)
+        ]
+        self.assertEqual(ids, [f"PO-{today_str}0001", f"PO-{today_str}0002"])
+
+    def test_financial_year_reset(self):
+        series = NumberSeries('GRN', reset=NumberSeries.FINANCIAL_YEAR)
+        self.assertEqual(series.next(datetime(2026, 3, 31)), 'GRN-2025-260001')
+        self.assertEqual(series.next(datetime(2026, 4, 1)), 'GRN-2026-270001')
+        self.assertEqual(series.next(datetime(2026, 12, 1)), 'GRN-2026-270002')
+
+    def test_bulk_reserve_single_update(self):
+        series = NumberSeries('IMP')
+        when = datetime(2026, 3, 16)
+        series.next(when)
+        with CaptureQueriesContext(connection) as ctx:
+            numbers = series.reserve(3, when)
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(numbers, ['IMP-202603160002', 'IMP-202603160003', 'IMP-202603160004'])
+        self.assertEqual(series.next(when), 'IMP-202603160005')
+
+
+# SQLite locks the whole database instead of the sequence row, so concurrent writers fail
+# with "database table is locked" rather than wait; the stress test needs MySQL
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentInvoiceNumberTest(TransactionTestCase):
+    THREADS = 8
+    BILLS_PER_THREAD = 15
+
+    def test_concurrent_bill_creation_has_no_duplicates(self):
+        user = User.objects.create_user(username='cashier', password='password', role='EMPLOYEE')
+        bill_types = ['INNER', 'OUTER', 'SALES']
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            try:
+                start.wait()
+                for n in range(self.BILLS_PER_THREAD):
+                    Bill.objects.create(bill_type=bill_types[(index + n) % 3], created_by=user)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        numbers = list(Bill.objects.values_list('invoice_number', flat=True))
+        self.assertEqual(len(numbers), self.THREADS * self.BILLS_PER_THREAD)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        # Each prefix is numbered 1..N with no gaps
+        for prefix in ['IB', 'OB', 'SB']:
+            seqs = sorted(int(n[-4:]) for n in numbers if n.startswith(prefix))
+            self.assertEqual(seqs, list(range(1, len(seqs) + 1)))
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import User, Bill, Item, Customer, Vendor, PurchaseRecord
+from core.pagination import KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        # Repeated totals exercise the id tie-breaker
+        self.bills = [Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal(n % 3)) for n in range(7)]
+
+    def walk(self, paginator):
+        pages, page = [], paginator.page()
+        pages.append(page)
+        while page.has_next:
+            page = paginator.page(page.next_token)
+            pages.append(page)
+        return pages
+
+    def test_forward_and_back(self):
+        paginator = KeysetPaginator(Bill.objects.all(), 3, ordering=['-total_amount'])
+        pages = self.walk(paginator)
+        expected = list(Bill.objects.order_by('-total_amount', '-id'))
+        self.assertEqual([b for page in pages for b in page], expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginator.page(pages[2].previous_token)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_previous and back.has_next)
+        first = paginator.page(back.previous_token)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous)
+
+    def test_deep_page_is_one_query(self):
+        paginator = KeysetPaginator(Bill.objects.all(), 2, ordering=['-created_at'])
+        token = self.walk(paginator)[-2].next_token
+        with self.assertNumQueries(1):
+            list(paginator.page(token))
+
+    def test_bad_token_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Bill.objects.all(), 3, ordering=['-created_at'])
+        self.assertEqual(list(paginator.page('garbage')), list(paginator.page()))
+
+    def test_cached_approximate_count(self):
+        paginator = KeysetPaginator(Bill.objects.all(), 3, ordering=['-created_at'], count=True)
+        page = paginator.page()
+        self.assertEqual(page.approximate_count, 7)
+        Bill.objects.create(bill_type='SALES', created_by=self.admin)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.approximate_count(), 7)
+        self.assertIsNone(KeysetPaginator(Bill.objects.all(), 3).page().approximate_count)
+
+
+class ListViewPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.client.force_login(self.admin)
+        vendor = Vendor.objects.create(vendor_id='V1', name='Acme')
+        for n in range(60):
+            Item.objects.create(name=f'Item {n}', price=Decimal('1'))
+            Customer.objects.create(customer_name=f'Customer {n}')
+        for n in range(30):
+            PurchaseRecord.objects.create(vendor=vendor, description='Stock', total_amount=Decimal('10'), purchased_by=self.admin)
+        for n in range(30):
+            Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal('5'))
+
+    def test_lists_render_one_page_with_next_link(self):
+        for name, key, size in [('item_list', 'items', 50), ('customer_list', 'customers', 50),
+                                ('purchase_list', 'purchases', 25), ('bill_list', 'bills', 25),
+                                ('billing_home', 'bills', 20), ('invoice_list', 'invoices', 25)]:
+            response = self.client.get(reverse(name), {'sort_by': 'date_desc'})
+            self.assertEqual(response.status_code, 200, name)
+            page = response.context[key]
+            self.assertEqual(len(page), size, name)
+            self.assertContains(response, 'cursor=', msg_prefix=name)
+
+            response = self.client.get(reverse(name), {'sort_by': 'date_desc', 'cursor': page.next_token})
+            self.assertEqual(response.status_code, 200, name)
+            self.assertTrue(response.context[key].has_previous, name)
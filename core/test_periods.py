@@ -0,0 +1,108 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import (User, Bill, Item, Vendor, PurchaseRecord, VendorPayment, InventorySession,
+                         InventorySessionItem, PeriodSnapshot)
+from core.periods import financial_quarter, quarter_bounds, quarter_report, financial_year_report
+
+IST = ZoneInfo('Asia/Kolkata')
+TODAY = date(2026, 5, 10)  # FY 2026-27, Q1 open
+
+
+class FinancialPeriodsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.vendor = Vendor.objects.create(vendor_id='V1', name='Acme')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('10'))
+
+    def bill(self, when, amount, **fields):
+        bill = Bill.objects.create(created_by=self.admin, bill_type='SALES', payment_status='PAID', total_amount=Decimal(amount), **fields)
+        Bill.objects.filter(pk=bill.pk).update(created_at=datetime(*when, 12, tzinfo=IST))
+        return bill
+
+    def reconcile(self):
+        call_command('reconcile_sales_rollup', '--all', '--end', '2026-05-10', stdout=StringIO())
+
+    def test_calendar(self):
+        self.assertEqual([financial_quarter(date(2026, m, 1)) for m in (4, 6, 7, 10, 12, 1, 3)], [1, 1, 2, 3, 3, 4, 4])
+        self.assertEqual(quarter_bounds(2025, 3), (date(2025, 10, 1), date(2025, 12, 31)))
+        self.assertEqual(quarter_bounds(2025, 4), (date(2026, 1, 1), date(2026, 3, 31)))
+
+    def test_closed_quarter_is_frozen(self):
+        self.bill((2026, 2, 10), '100')
+        cancelled = self.bill((2026, 3, 31), '40')
+        PurchaseRecord.objects.create(vendor=self.vendor, description='Beans', total_amount=Decimal('60'),
+                                      ordered_date=date(2026, 1, 5), purchased_by=self.admin)
+        payment = VendorPayment.objects.create(vendor=self.vendor, amount=Decimal('25'), status='PAID')
+        VendorPayment.objects.filter(pk=payment.pk).update(date=datetime(2026, 3, 1, tzinfo=IST))
+        self.reconcile()
+
+        report = quarter_report(2025, 4, today=TODAY)
+        self.assertTrue(report['frozen'])
+        self.assertEqual((report['revenue'], report['bill_count']), (Decimal('140'), 2))
+        self.assertEqual((report['purchase_spend'], report['purchase_payables'], report['vendor_payments']),
+                         (Decimal('60'), Decimal('60'), Decimal('25')))
+
+        Bill.objects.filter(pk=cancelled.pk).update(payment_status='CANCELLED')
+        self.reconcile()
+        with self.assertNumQueries(1):
+            self.assertEqual(quarter_report(2025, 4, today=TODAY)['revenue'], Decimal('140'))
+
+        call_command('freeze_periods', '--fy', '2025', '--refresh', stdout=StringIO())
+        self.assertEqual(quarter_report(2025, 4, today=TODAY)['revenue'], Decimal('100'))
+        self.assertEqual(PeriodSnapshot.objects.filter(fy=2025).count(), 4)
+
+    def test_open_quarter_is_cached_until_a_write(self):
+        self.bill((2026, 4, 2), '30')
+        self.reconcile()
+        self.assertFalse(quarter_report(2026, 1, today=TODAY)['frozen'])
+        with self.assertNumQueries(0):
+            self.assertEqual(quarter_report(2026, 1, today=TODAY)['revenue'], Decimal('30'))
+        self.bill((2026, 4, 3), '5')  # Bill.save starts a new report version
+        self.reconcile()
+        self.assertEqual(quarter_report(2026, 1, today=TODAY)['revenue'], Decimal('35'))
+        self.assertFalse(PeriodSnapshot.objects.filter(fy=2026).exists())
+
+    def test_year_combines_quarters_and_items(self):
+        for when, taken, returned in [((2025, 5, 1), 5, 1), ((2025, 11, 1), 3, 0)]:
+            session = InventorySession.objects.create(outlet_name='LIBA', created_by=self.admin, status='CLOSED')
+            InventorySessionItem.objects.create(session=session, item=self.coffee, quantity_taken=taken, quantity_returned=returned)
+            InventorySession.objects.filter(pk=session.pk).update(created_at=datetime(*when, 12, tzinfo=IST))
+        open_session = InventorySession.objects.create(outlet_name='LIBA', created_by=self.admin)
+        InventorySessionItem.objects.create(session=open_session, item=self.coffee, quantity_taken=9)
+        self.bill((2025, 5, 1), '10')
+        self.bill((2025, 11, 1), '20')
+        self.reconcile()
+
+        report = financial_year_report(2025, today=TODAY)
+        self.assertEqual(report['label'], '2025-26')
+        self.assertEqual(report['revenue'], Decimal('30'))
+        self.assertEqual([q['revenue'] for q in report['quarters']], [Decimal('10'), 0, Decimal('20'), 0])
+        self.assertEqual(report['items'], [{'item_id': self.coffee.pk, 'name': 'Coffee', 'quantity': 7}])
+
+    def test_report_view(self):
+        self.bill((2025, 5, 1), '10')
+        self.reconcile()
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('financial_report'), {'fy': '2025'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Financial Year 2025-26')
+        self.assertEqual(response.context['report']['revenue'], Decimal('10'))
+
+    def test_report_view_ignores_unlisted_years(self):
+        self.client.force_login(self.admin)
+        current = self.client.get(reverse('financial_report')).context['report']['label']
+        snapshots = PeriodSnapshot.objects.count()
+        for fy in ('0', '10000', '1990', 'abc'):
+            response = self.client.get(reverse('financial_report'), {'fy': fy})
+            self.assertEqual(response.status_code, 200, fy)
+            self.assertEqual(response.context['report']['label'], current)
+        self.assertEqual(PeriodSnapshot.objects.count(), snapshots)
@@ -1,6 +1,7 @@
 from django.test import TestCase, Client
 from django.urls import reverse
-from core.models import User
+from core.models import User, RolePermission
+from core.permissions import bump_role_permissions_version
 
 class GranularPermissionsTest(TestCase):
     def setUp(self):
@@ -64,3 +65,52 @@ class GranularPermissionsTest(TestCase):
         # Check model logic for accountant inventory access... 
         # In model: ACCOUNTANT gets 'billing', 'invoices', 'reports', 'purchases', 'vendor_payments', 'worklogs'
         self.assertFalse(accountant.has_module_access('inventory')) 
+
+
+class PermissionResolverCacheTest(TestCase):
+    def setUp(self):
+        perms = RolePermission.get_default_permissions()
+        perms['inventory']['view'] = True
+        perms['inventory']['create'] = True
+        RolePermission.objects.create(role='STUDENT', permissions=perms)
+        self.student = User.objects.create_user(username='student', password='password', role='STUDENT')
+
+    def tearDown(self):
+        # The process-wide role matrix must not outlive the test transaction
+        bump_role_permissions_version()
+
+    def test_role_permissions_loaded_once(self):
+        user = User.objects.get(pk=self.student.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_module_access('inventory'))
+            self.assertTrue(user.has_module_access('inventory', 'create'))
+            self.assertFalse(user.has_module_access('inventory', 'delete'))
+            self.assertFalse(user.has_module_access('billing'))
+            self.assertFalse(user.has_module_access('vendors', 'view'))
+
+        # Steady state: other users (other requests) hit the process-wide matrix
+        other = User.objects.create_user(username='student2', password='password', role='STUDENT')
+        with self.assertNumQueries(0):
+            self.assertTrue(other.has_module_access('inventory'))
+
+    def test_role_permission_save_invalidates_matrix(self):
+        self.assertFalse(self.student.has_module_access('billing', 'view'))
+        role_perm = RolePermission.objects.get(role='STUDENT')
+        role_perm.permissions['billing'] = {'view': True}
+        role_perm.save()
+
+        user = User.objects.get(pk=self.student.pk)
+        self.assertTrue(user.has_module_access('billing', 'view'))
+
+    def test_user_override_takes_precedence(self):
+        self.student.module_permissions = {'billing': True, 'inventory': {'view': True}}
+        self.student.save()
+        self.assertTrue(self.student.has_module_access('billing', 'delete'))
+        self.assertTrue(self.student.has_module_access('inventory'))
+        self.assertFalse(self.student.has_module_access('inventory', 'create'))
+
+    def test_cache_dropped_on_save(self):
+        self.assertFalse(self.student.has_module_access('billing'))
+        self.student.module_permissions = {'billing': True}
+        self.student.save()
+        self.assertTrue(self.student.has_module_access('billing'))
@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import User, Bill, BillItem, BillPayment, Customer, Item
+from core.printing import render_bill_invoice
+
+
+class BillInvoiceCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.item = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.bill = Bill.objects.create(bill_type='SALES', created_by=self.admin, total_amount=Decimal('40'), payment_status='PAID')
+        BillItem.objects.create(bill=self.bill, item=self.item, quantity=2, price=Decimal('20'))
+        BillPayment.objects.create(bill=self.bill, payment_type='CASH', amount=Decimal('40'))
+
+    def load(self):
+        return Bill.objects.select_related('customer', 'created_by').get(pk=self.bill.pk)
+
+    def test_miss_costs_three_queries_then_hits(self):
+        bill = self.load()
+        with self.assertNumQueries(3):  # items with item, payments, student_employees
+            html = render_bill_invoice(bill)
+        self.assertIn('Coffee', html)
+        self.assertIn(bill.invoice_number, html)
+        bill = self.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(render_bill_invoice(bill), html)
+
+    def test_customer_and_item_renames_invalidate(self):
+        customer = Customer.objects.create(customer_name='Asha Traders', contact_number='9840012345')
+        Bill.objects.filter(pk=self.bill.pk).update(customer=customer)
+        self.assertIn('Asha Traders', render_bill_invoice(self.load()))
+
+        customer.customer_name = 'Asha Stores'
+        customer.save()
+        self.item.name = 'Filter Coffee'
+        self.item.save()
+        html = render_bill_invoice(self.load())
+        self.assertIn('Asha Stores', html)
+        self.assertIn('Filter Coffee', html)
+
+    def test_payment_and_item_changes_invalidate(self):
+        render_bill_invoice(self.load())
+        BillPayment.objects.create(bill=self.bill, payment_type='UPI', amount=Decimal('5'))
+        self.assertIn('UPI', render_bill_invoice(self.load()))
+
+        BillItem.objects.create(bill=self.bill, custom_item_name='Muffin', quantity=1, price=Decimal('15'))
+        self.assertIn('Muffin', render_bill_invoice(self.load()))
+
+    def test_row_update_without_save_changes_fingerprint(self):
+        self.assertIn('Paid', render_bill_invoice(self.load()))
+        Bill.objects.filter(pk=self.bill.pk).update(payment_status='CANCELLED')
+        self.assertIn('CANCELLED', render_bill_invoice(self.load()))
+
+    def test_bill_detail_renders_cached_invoice(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('bill_detail', args=[self.bill.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Coffee')
+        self.assertContains(response, 'Print Invoice')
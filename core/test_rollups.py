@@ -0,0 +1,113 @@
+from datetime import datetime, date
+from decimal import Decimal
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import User, Bill, DailySalesRollup
+from core.rollups import reconcile_day, sales_summary
+
+IST = ZoneInfo('Asia/Kolkata')
+
+
+def buckets():
+    return {
+        (r.date, r.outlet_name, r.bill_type, r.payment_type, r.payment_status): (r.bill_count, r.total_amount, r.advance_amount)
+        for r in DailySalesRollup.objects.all()
+    }
+
+
+class DailySalesRollupTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+
+    def bill(self, **fields):
+        fields.setdefault('bill_type', 'SALES')
+        fields.setdefault('payment_status', 'PAID')
+        return Bill.objects.create(created_by=self.admin, **fields)
+
+    def backdate(self, bill, *args):
+        Bill.objects.filter(pk=bill.pk).update(created_at=datetime(*args, tzinfo=IST))
+
+    def test_bill_writes_update_buckets(self):
+        a = self.bill(outlet_name='LIBA', payment_type='UPI', total_amount=Decimal('100'))
+        b = self.bill(outlet_name='LIBA', payment_type='UPI', total_amount=Decimal('50'), advance_payment=Decimal('10'))
+        self.bill(payment_type='CASH', total_amount=Decimal('20'))
+        day = a.created_at.astimezone(IST).date()
+        self.assertEqual(buckets(), {
+            (day, 'LIBA', 'SALES', 'UPI', 'PAID'): (2, Decimal('150'), Decimal('10')),
+            (day, '', 'SALES', 'CASH', 'PAID'): (1, Decimal('20'), Decimal('0')),
+        })
+
+        a.total_amount = Decimal('120')
+        a.save()
+        b.payment_type = 'CASH'
+        b.outlet_name = None
+        b.save()
+        self.assertEqual(buckets(), {
+            (day, 'LIBA', 'SALES', 'UPI', 'PAID'): (1, Decimal('120'), Decimal('0')),
+            (day, '', 'SALES', 'CASH', 'PAID'): (2, Decimal('70'), Decimal('10')),
+        })
+
+        a.delete()
+        self.assertEqual(set(buckets()), {(day, '', 'SALES', 'CASH', 'PAID')})
+        self.assertEqual(reconcile_day(day), 0)
+
+    def test_reconcile_fixes_bulk_updates(self):
+        bill = self.bill(outlet_name='BED', total_amount=Decimal('40'))
+        day = bill.created_at.astimezone(IST).date()
+        Bill.objects.filter(pk=bill.pk).update(payment_status='CANCELLED')
+        Bill.objects.create(created_by=self.admin, bill_type='INNER', total_amount=Decimal('5'))
+        DailySalesRollup.objects.filter(bill_type='INNER').delete()
+
+        out = StringIO()
+        call_command('reconcile_sales_rollup', '--days', '1', stdout=out)
+        self.assertIn('corrected 3 bucket(s)', out.getvalue())
+        self.assertEqual(buckets(), {
+            (day, 'BED', 'SALES', 'CASH', 'CANCELLED'): (1, Decimal('40'), Decimal('0')),
+            (day, '', 'INNER', 'CASH', 'PENDING'): (1, Decimal('5'), Decimal('0')),
+        })
+
+    def test_day_follows_ist(self):
+        bill = self.bill(total_amount=Decimal('10'))
+        self.backdate(bill, 2026, 3, 31, 23, 59)
+        call_command('reconcile_sales_rollup', '--start', '2026-03-31', '--end', '2026-04-01', stdout=StringIO())
+        days = DailySalesRollup.objects.filter(date__lte=date(2026, 4, 1)).values_list('date', flat=True)
+        self.assertEqual(list(days), [date(2026, 3, 31)])
+
+    def test_monthly_summary_and_report(self):
+        for args, outlet, amount in [((2026, 1, 5, 10), 'LIBA', '100'), ((2026, 1, 20, 10), 'LIBA', '50'),
+                                     ((2026, 2, 1, 10), 'BED', '30'), ((2026, 2, 2, 10), 'BED', '99')]:
+            bill = self.bill(outlet_name=outlet, total_amount=Decimal(amount))
+            self.backdate(bill, *args)
+        Bill.objects.filter(total_amount=Decimal('99')).update(payment_status='CANCELLED')
+        call_command('reconcile_sales_rollup', '--all', stdout=StringIO())
+
+        rows = list(sales_summary(date(2026, 1, 1), date(2026, 2, 28), group_by='month'))
+        self.assertEqual([(r['period'], r['outlet_name'], r['bills'], r['total']) for r in rows], [
+            (date(2026, 1, 1), 'LIBA', 2, Decimal('150')),
+            (date(2026, 2, 1), 'BED', 1, Decimal('30')),
+        ])
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('sales_report'), {
+            'start_date': '2026-01-01', 'end_date': '2026-02-28', 'group_by': 'month', 'breakdown': 'outlet',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_amount'], Decimal('180'))
+        self.assertContains(response, 'Liba')
+
+    def test_admin_bulk_delete_updates_buckets(self):
+        kept = self.bill(total_amount=Decimal('10'))
+        gone = self.bill(total_amount=Decimal('20'))
+        superuser = User.objects.create_superuser(username='root', password='password', role='ADMIN')
+        self.client.force_login(superuser)
+        response = self.client.post(reverse('admin:core_bill_changelist'), {
+            'action': 'delete_selected', '_selected_action': [gone.pk], 'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Bill.objects.all()), [kept])
+        self.assertEqual([(count, total) for count, total, _ in buckets().values()], [(1, Decimal('10'))])
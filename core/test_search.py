@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.filters import BillQuery
+from core.models import User, Bill, Customer
+from core.search import search_bills, filter_bills
+
+
+class BillSearchTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.asha = Customer.objects.create(customer_name='Asha Traders')
+        self.ravi = Customer.objects.create(customer_name='Ravi Stores')
+        self.sales = Bill.objects.create(bill_type='SALES', created_by=self.admin, customer=self.asha)
+        self.inner = Bill.objects.create(bill_type='INNER', created_by=self.admin, customer=self.ravi)
+        self.walk_in = Bill.objects.create(bill_type='SALES', created_by=self.admin, customer_name='Walk-in Meena')
+
+    def test_search_text_kept_in_sync(self):
+        self.sales.refresh_from_db()
+        self.assertIn('asha traders', self.sales.search_text)
+        self.assertTrue(self.sales.search_text.startswith(self.sales.invoice_number.lower()))
+
+        self.asha.customer_name = 'Asha Wholesale'
+        self.asha.save()
+        self.assertEqual(list(filter_bills(Bill.objects.all(), 'wholesale')), [self.sales])
+        self.assertFalse(filter_bills(Bill.objects.all(), 'traders').exists())
+
+    def test_invoice_prefix_uses_startswith(self):
+        self.assertEqual(list(search_bills(Bill.objects.all(), 'ib-')), [self.inner])
+        results = search_bills(Bill.objects.all(), 'SB-')
+        self.assertEqual(list(results), [self.walk_in, self.sales])
+        self.assertIn('LIKE', str(results.query))
+        self.assertNotIn('search_text', str(results.query).split('WHERE')[1])
+
+    def test_words_match_either_customer_name(self):
+        self.assertEqual(list(search_bills(Bill.objects.all(), 'ravi')), [self.inner])
+        self.assertEqual(list(search_bills(Bill.objects.all(), 'MEENA walk')), [self.walk_in])
+        self.assertEqual(list(search_bills(Bill.objects.all(), 'ravi meena')), [])
+        self.assertEqual(list(search_bills(Bill.objects.all(), '  ')), [])
+
+    @mock.patch('core.search._uses_fulltext', return_value=True)
+    def test_numbers_use_indexed_prefixes(self, _):
+        self.ravi.contact_number = '9876543210'
+        self.ravi.save()
+        self.assertEqual(list(search_bills(Bill.objects.all(), '98765')), [self.inner])
+        self.assertEqual(list(search_bills(Bill.objects.all(), '43210')), [])
+
+        period = self.inner.invoice_number.split('-', 1)[1][:8]
+        results = search_bills(Bill.objects.filter(bill_type='INNER'), period)
+        self.assertEqual(list(results), [self.inner])
+        self.assertNotIn('search_text', str(results.query).split('WHERE')[1])
+        self.assertNotIn('MATCH', str(results.query))
+
+    @override_settings(SEARCH_RESULT_LIMIT=2)
+    def test_dashboard_results_are_limited(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('dashboard'), {'q': 'SB-'})
+        self.assertEqual(list(response.context['recent_bills']), [self.walk_in, self.sales])
+        response = self.client.get(reverse('dashboard'), {'q': 'e'})
+        self.assertEqual(len(response.context['recent_bills']), 2)
+
+    def test_bill_query_q(self):
+        qs = BillQuery({'q': 'asha'}).filter(Bill.objects.all())
+        self.assertEqual(list(qs), [self.sales])
@@ -0,0 +1,99 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import ProtectedError
+from django.test import TestCase
+from django.urls import reverse
+
+from core.inventory import close_session
+from core.models import (
+    User, Item, InventoryLog, InventorySession, InventorySessionItem, InventorySessionPayment, StockBalance, StockMovement,
+)
+from core.stock import on_floor, rebuild_stock_ledger, sync_log_stock, sync_session_stock
+
+
+def balances():
+    return {(row.outlet_name, row.item.name): row.on_hand for row in on_floor()}
+
+
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN')
+        self.coffee = Item.objects.create(name='Coffee', price=Decimal('20'))
+        self.tea = Item.objects.create(name='Tea', price=Decimal('10'))
+        self.session = InventorySession.objects.create(outlet_name='MOBILE_1', created_by=self.admin)
+        self.coffee_line = InventorySessionItem.objects.create(session=self.session, item=self.coffee, quantity_taken=5)
+        InventorySessionItem.objects.create(session=self.session, item=self.tea, quantity_taken=3)
+        sync_session_stock(self.session, self.admin)
+
+    def test_issue_return_and_close(self):
+        self.assertEqual(balances(), {('MOBILE_1', 'Coffee'): 5, ('MOBILE_1', 'Tea'): 3})
+
+        self.coffee_line.quantity_returned = 2
+        self.coffee_line.save()
+        sync_session_stock(self.session, self.admin)
+        self.assertEqual(balances(), {('MOBILE_1', 'Coffee'): 3, ('MOBILE_1', 'Tea'): 3})
+
+        InventorySessionPayment.objects.create(session=self.session, payment_type='CASH', amount=Decimal('90'))
+        close_session(self.session.pk, self.admin)
+        self.assertEqual(balances(), {})
+        sold = StockMovement.objects.filter(kind='SALE').order_by('item__name')
+        self.assertEqual([(m.item.name, m.quantity) for m in sold], [('Coffee', -3), ('Tea', -3)])
+
+    def test_sync_is_idempotent(self):
+        count = StockMovement.objects.count()
+        self.assertEqual(sync_session_stock(self.session, self.admin), [])
+        self.assertEqual(StockMovement.objects.count(), count)
+
+    def test_outlet_change_moves_stock(self):
+        self.session.outlet_name = 'LIBA'
+        self.session.save()
+        sync_session_stock(self.session, self.admin)
+        self.assertEqual(balances(), {('LIBA', 'Coffee'): 5, ('LIBA', 'Tea'): 3})
+        self.assertEqual(StockBalance.objects.filter(outlet_name='MOBILE_1', on_hand=0).count(), 2)
+
+    def test_inventory_log(self):
+        log = InventoryLog.objects.create(item=self.tea, outlet_name='LIBA', quantity_taken=4, created_by=self.admin)
+        sync_log_stock(log, self.admin)
+        self.assertEqual(balances()[('LIBA', 'Tea')], 4)
+        log.quantity_returned, log.is_closed = 1, True
+        log.save()
+        sync_log_stock(log, self.admin)
+        self.assertNotIn(('LIBA', 'Tea'), balances())
+
+    def test_inventory_log_synced_from_locked_row(self):
+        log = InventoryLog.objects.create(item=self.tea, outlet_name='LIBA', quantity_taken=4, created_by=self.admin)
+        stale = InventoryLog.objects.get(pk=log.pk)
+        log.quantity_returned, log.is_closed = 4, True
+        log.save()
+        sync_log_stock(log, self.admin)
+        count = StockMovement.objects.count()
+        self.assertEqual(sync_log_stock(stale, self.admin), [])
+        self.assertEqual(StockMovement.objects.count(), count)
+
+        with self.assertRaises(ProtectedError):
+            log.delete()
+
+    def test_rebuild_matches_incremental(self):
+        self.coffee_line.quantity_returned = 1
+        self.coffee_line.save()
+        sync_session_stock(self.session, self.admin)
+        log = InventoryLog.objects.create(item=self.coffee, outlet_name='LIBA', quantity_taken=2, created_by=self.admin)
+        sync_log_stock(log, self.admin)
+        incremental = balances()
+
+        StockBalance.objects.update(on_hand=99)
+        call_command('rebuild_stock_ledger', stdout=StringIO())
+        self.assertEqual(balances(), incremental)
+        movements, _ = rebuild_stock_ledger(batch_size=2)
+        self.assertEqual(movements, StockMovement.objects.count())
+        self.assertEqual(balances(), incremental)
+
+    def test_views_show_floor_stock(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('inventory_list'))
+        self.assertContains(response, 'Out on Floor')
+        self.assertEqual(len(response.context['floor_stock']), 2)
+        response = self.client.get(reverse('edit_inventory_session', args=[self.session.pk]))
+        self.assertContains(response, 'Out on floor at')
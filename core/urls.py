@@ -2,6 +2,7 @@ from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
 from . import invoice
+from . import reports
 
 urlpatterns = [
     path('', auth_views.LoginView.as_view(template_name='core/login.html', redirect_authenticated_user=True), name='login_home'),
@@ -12,6 +13,9 @@ urlpatterns = [
     path('roles/', views.role_list, name='role_list'),
     path('roles/<str:role_code>/edit/', views.edit_role_permissions, name='edit_role_permissions'),
     path('items/', views.item_list, name='item_list'),
+    path('items/catalogue.json', views.item_catalogue_json, name='item_catalogue'),
+    path('customers/lookup/', views.customer_lookup, name='customer_lookup'),
+    path('import/<str:kind>/', views.import_master_data, name='import_master_data'),
     path('items/create/', views.create_item, name='create_item'),
     path('items/edit/<int:pk>/', views.edit_item, name='edit_item'),
     path('items/delete/<int:pk>/', views.delete_item, name='delete_item'),
@@ -30,12 +34,18 @@ urlpatterns = [
     path('bill/delete/<int:pk>/', views.delete_bill, name='delete_bill'),
     path('profile/', views.profile, name='profile'),
     path('bills/export/', views.export_bills, name='export_bills'),
+    path('exports/<int:pk>/', views.export_job_detail, name='export_job_detail'),
+    path('exports/<int:pk>/status/', views.export_job_status, name='export_job_status'),
+    path('exports/<int:pk>/download/<int:part>/', views.export_job_download, name='export_job_download'),
     path('invoice/', invoice.invoice_list, name='invoice_list'),
     path('invoice/export/', invoice.invoice_export, name='invoice_export'),
+    path('reports/sales/', reports.sales_report, name='sales_report'),
+    path('reports/financial/', reports.financial_report, name='financial_report'),
     path('inventory/', views.inventory_list, name='inventory_list'),
     path('inventory/create/', views.create_inventory_session, name='create_inventory_session'),
     path('inventory/edit/<int:pk>/', views.edit_inventory_session, name='edit_inventory_session'),
     path('inventory/close/<int:pk>/', views.close_inventory_session, name='close_inventory_session'),
+    path('inventory/close-day/', views.close_inventory_day, name='close_inventory_day'),
     path('vendors/', views.vendor_list, name='vendor_list'),
     path('vendors/export/', views.export_vendors, name='export_vendors'),
     path('vendors/create/', views.create_vendor, name='create_vendor'),
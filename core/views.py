@@ -1,20 +1,36 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Sum, Q
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from .models import User, Item, Bill, BillItem, InventoryLog, Customer, Vendor, PurchaseRecord, VendorPayment, RolePermission
+from .models import User, Item, Bill, BillItem, InventoryLog, Customer, Vendor, PurchaseRecord, VendorPayment, RolePermission, ExportJob
+from .filters import BillQuery, InventorySessionQuery, parse_local_date
+from .pagination import KeysetPaginator
+from .search import search_bills
+from .customers import customer_suggestions
+from .metrics import dashboard_metrics
+from .periods import financial_quarter, financial_year_label, financial_year as current_financial_year
+from .exports import csv_stream_response, bill_rows, vendor_rows, purchase_rows, pending_purchase_rows
+from .jobs import enqueue_bill_pdf_export, export_root
+from .printing import render_bill_invoice
+from .billing import BillWriter
+from .catalogue import item_catalogue, get_item_catalogue_version
+from .inventory import close_session, close_sessions, open_sessions, with_session_totals
+from .stock import sync_session_stock, sync_log_stock, on_floor
+from .imports import IMPORTERS, ImportFileError, import_rows, read_rows
 from .forms import CustomUserCreationForm, BillForm, BillItemFormSet, ItemForm, InventoryLogForm, CustomerForm, VendorForm, PurchaseRecordForm, VendorPaymentForm, RolePermissionForm, BillPaymentFormSet, InventorySessionForm, InventorySessionItemFormSet, InventorySessionPaymentFormSet
 import json
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
+from django.core.exceptions import ValidationError
 from datetime import datetime
-from zoneinfo import ZoneInfo
-import csv
+import os
 import re
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from decimal import Decimal
 try:
     from weasyprint import HTML
@@ -31,46 +47,32 @@ def check_permission(user, module):
 @login_required
 def dashboard(request):
     today = timezone.localtime(timezone.now()).date()
-    current_month = today.month
-    current_year = today.year
+    # April-March financial year, same quarters as the financial report
+    quarter = financial_quarter(today)
+    financial_year = financial_year_label(current_financial_year(today))
 
-    # Existing Metrics
-    daily_sales = Bill.objects.filter(created_at__date=today).exclude(payment_status='CANCELLED').aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    pending_payments = Bill.objects.filter(payment_status='PENDING').count()
-    
-    # New Metrics
-    quarter = (current_month - 1) // 3 + 1
-    if current_month >= 4:
-        financial_year = f"{current_year}-{current_year + 1}"
-    else:
-        financial_year = f"{current_year - 1}-{current_year}"
-        
-    invoices_this_month = Bill.objects.filter(created_at__year=current_year, created_at__month=current_month).count()
-    sales_this_month = Bill.objects.filter(created_at__year=current_year, created_at__month=current_month).exclude(payment_status='CANCELLED').aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    cancelled_bills_count = Bill.objects.filter(payment_status='CANCELLED').count()
+    # One aggregate query (cached briefly) for all Bill metrics and module counts
+    metrics = dashboard_metrics(request.user, see_all=request.user.is_supervisor_or_admin())
 
     recent_bills = Bill.objects.all().order_by('-created_at')[:10]
     query = request.GET.get('q')
     if query:
-        recent_bills = Bill.objects.filter(invoice_number__icontains=query)
+        # Ranked and limited to SEARCH_RESULT_LIMIT rows
+        recent_bills = search_bills(Bill.objects.all(), query)
     # Module counts
-    if request.user.has_module_access('billing'):
-        invoices_count = Bill.objects.count() if request.user.is_supervisor_or_admin() else Bill.objects.filter(created_by=request.user).count()
-    else:
-        invoices_count = 0
-        
-    items_count = Item.objects.count() if request.user.has_module_access('inventory') else 0
-    vendors_count = Customer.objects.count() if request.user.has_module_access('customers') else 0
-    inventory_count = InventoryLog.objects.count() if request.user.has_module_access('inventory') else 0
+    invoices_count = metrics['invoices_count'] if request.user.has_module_access('billing') else 0
+    items_count = metrics['items_count'] if request.user.has_module_access('inventory') else 0
+    vendors_count = metrics['vendors_count'] if request.user.has_module_access('customers') else 0
+    inventory_count = metrics['inventory_count'] if request.user.has_module_access('inventory') else 0
 
     context = {
-        'daily_sales': daily_sales,
-        'pending_payments': pending_payments,
-        'invoices_this_month': invoices_this_month,
-        'sales_this_month': sales_this_month,
+        'daily_sales': metrics['daily_sales'],
+        'pending_payments': metrics['pending_payments'],
+        'invoices_this_month': metrics['invoices_this_month'],
+        'sales_this_month': metrics['sales_this_month'],
         'quarter': f"Q{quarter}",
         'financial_year': financial_year,
-        'cancelled_bills_count': cancelled_bills_count,
+        'cancelled_bills_count': metrics['cancelled_bills_count'],
         'recent_bills': recent_bills,
         'invoices_count': invoices_count,
         'items_count': items_count,
@@ -116,6 +118,8 @@ def manage_user_permissions(request, pk):
         if form.is_valid():
             user_to_edit.module_permissions = form.get_cleaned_permissions()
             user_to_edit.save()
+            if user_to_edit.pk == request.user.pk:
+                request.user.clear_permission_cache()
             messages.success(request, f"Permissions updated for {user_to_edit.username}")
             return redirect('user_list')
     else:
@@ -155,7 +159,8 @@ def edit_role_permissions(request, role_code):
         form = RolePermissionForm(request.POST)
         if form.is_valid():
             role_perm.permissions = form.get_cleaned_permissions()
-            role_perm.save()
+            role_perm.save()  # bumps the shared role permission version
+            request.user.clear_permission_cache()
             messages.success(request, f"Permissions updated for role {role_perm.get_role_display()}")
             return redirect('role_list')
     else:
@@ -184,8 +189,14 @@ def profile(request):
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'inventory'))
 def inventory_list(request):
-    sessions = InventorySession.objects.all().order_by('-created_at')
-    return render(request, 'core/inventory_list.html', {'sessions': sessions})
+    filters = InventorySessionQuery(request.GET)
+    sessions = KeysetPaginator(with_session_totals(filters.queryset()), 25).page(request.GET.get('cursor'))
+    return render(request, 'core/inventory_list.html', {
+        'sessions': sessions,
+        'floor_stock': on_floor(),
+        'outlet_choices': Bill.OUTLET_CHOICES,
+        **filters.context(),
+    })
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'inventory'))
@@ -194,11 +205,13 @@ def create_inventory_session(request):
         form = InventorySessionForm(request.POST)
         formset = InventorySessionItemFormSet(request.POST)
         if form.is_valid() and formset.is_valid():
-            session = form.save(commit=False)
-            session.created_by = request.user
-            session.save()
-            formset.instance = session
-            formset.save()
+            with transaction.atomic():
+                session = form.save(commit=False)
+                session.created_by = request.user
+                session.save()
+                formset.instance = session
+                formset.save()
+                sync_session_stock(session, request.user)
             messages.success(request, "Inventory session created (Stock Out)")
             return redirect('inventory_list')
     else:
@@ -206,16 +219,11 @@ def create_inventory_session(request):
         formset = InventorySessionItemFormSet()
         payment_formset = InventorySessionPaymentFormSet()
         
-    items = Item.objects.filter(is_active=True)
-    # Mapping for potential JS price/info if needed
-    items_json = json.dumps({item.id: str(item.price) for item in items})
-    
     return render(request, 'core/inventory_session_form.html', {
         'form': form, 
         'formset': formset,
         'payment_formset': payment_formset if 'payment_formset' in locals() else InventorySessionPaymentFormSet(),
-        'title': 'Create Stock Out Session',
-        'items_json': items_json
+        'title': 'Create Stock Out Session'
     })
 
 @login_required
@@ -231,9 +239,11 @@ def edit_inventory_session(request, pk):
         formset = InventorySessionItemFormSet(request.POST, instance=session)
         payment_formset = InventorySessionPaymentFormSet(request.POST, instance=session)
         if form.is_valid() and formset.is_valid() and payment_formset.is_valid():
-            form.save()
-            formset.save()
-            payment_formset.save()
+            with transaction.atomic():
+                form.save()
+                formset.save()
+                payment_formset.save()
+                sync_session_stock(session, request.user)
             messages.success(request, "Inventory seesion updated")
             return redirect('inventory_list')
     else:
@@ -241,106 +251,65 @@ def edit_inventory_session(request, pk):
         formset = InventorySessionItemFormSet(instance=session)
         payment_formset = InventorySessionPaymentFormSet(instance=session)
         
-    items = Item.objects.filter(is_active=True)
-    items_json = json.dumps({item.id: str(item.price) for item in items})
-
     return render(request, 'core/inventory_session_form.html', {
         'form': form, 
         'formset': formset,
         'payment_formset': payment_formset,
         'title': 'Stock Return / Update Session',
         'session': session,
-        'items_json': items_json
+        'floor_stock': on_floor(session.outlet_name),
     })
 
+@login_required
+@user_passes_test(lambda u: check_permission(u, 'inventory'))
+def close_inventory_day(request):
+    # End-of-day close of every open session for a day and/or set of outlets; valid ones close together.
+    # The day filter is only dropped when "All dates" is chosen explicitly, never for a blank or bad date.
+    params = request.POST if request.method == 'POST' else request.GET
+    day_param = params.get('date', timezone.localdate().isoformat())
+    any_date = params.get('any_date') == '1'
+    outlets = [o for o in params.getlist('outlet_name') if o in dict(Bill.OUTLET_CHOICES)]
+    day = None if any_date else parse_local_date(day_param)
+    date_error = None
+    if not any_date and day is None:
+        date_error = "Enter a valid date, or choose All dates."
+        sessions = InventorySession.objects.none()
+    else:
+        sessions = open_sessions(day, outlets)
+    closed = rejected = None
+    if request.method == 'POST' and not date_error:
+        closed, rejected = close_sessions(sessions, request.user)
+        if closed:
+            messages.success(request, f"Closed {len(closed)} session(s) into sales bills.")
+        if rejected:
+            messages.warning(request, f"{len(rejected)} session(s) could not be closed; see below.")
+    return render(request, 'core/inventory_close_day.html', {
+        'sessions': with_session_totals(sessions.select_related('created_by')) if closed is None else [],
+        'closed': closed,
+        'rejected': rejected,
+        'date_error': date_error,
+        'filter_date': day_param,
+        'filter_any_date': any_date,
+        'filter_outlets': outlets,
+        'outlet_choices': Bill.OUTLET_CHOICES,
+    }, status=400 if date_error and request.method == 'POST' else 200)
+
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'inventory'))
 def close_inventory_session(request, pk):
     session = get_object_or_404(InventorySession, pk=pk)
+    if session.bill_id:
+        return redirect('bill_detail', pk=session.bill_id)
     if session.status == 'CLOSED':
         return redirect('inventory_list')
         
     if request.method == 'POST':
-        # Validate logic: Returned <= Taken
-        items = session.items.all()
-        invalid = False
-        has_items = False
-        for i in items:
-            if i.quantity_taken > 0:
-                has_items = True
-            if i.quantity_returned > i.quantity_taken:
-                invalid = True
-                messages.error(request, f"Error: Item {i.item.name} has more returned ({i.quantity_returned}) than taken ({i.quantity_taken})")
-        
-        if not has_items:
-             messages.error(request, "Session has no items taken.")
-             return redirect('edit_inventory_session', pk=pk)
-             
-        if invalid:
-            return redirect('edit_inventory_session', pk=pk)
-
-        # Calculate Total Amount
-        total_amount = Decimal(0)
-        for i in items:
-            sold_qty = i.quantity_sold
-            total_amount += sold_qty * i.item.price
-            
-        # Validate Payments
-        total_payments = session.payments.aggregate(Sum('amount'))['amount__sum'] or Decimal(0)
-        
-        if total_payments != total_amount:
-            messages.error(request, f"Cannot close session: Total Payments (₹{total_payments}) do not match Bill Amount (₹{total_amount}). Please update payment details.")
+        try:
+            bill, _ = close_session(pk, request.user)
+        except ValidationError as e:
+            for message in e.messages:
+                messages.error(request, message)
             return redirect('edit_inventory_session', pk=pk)
-            
-        # All good, create Sales Bill
-        session.status = 'CLOSED'
-        session.save()
-        
-        bill = Bill.objects.create(
-            bill_type='SALES',
-            created_by=request.user,
-            outlet_name=session.outlet_name,
-            remarks=f"Generated from Inventory Session #{session.id}",
-            payment_status=session.payment_status
-        )
-        # Default payment type for bill header (can be mixed)
-        if session.payments.exists():
-             bill.payment_type = session.payments.first().payment_type
-        else:
-             bill.payment_type = 'CASH' # Default if no payments recorded
-        bill.save()
-        
-        # Transfer payments
-        for p in session.payments.all():
-            BillPayment.objects.create(
-                bill=bill,
-                payment_type=p.payment_type,
-                amount=p.amount,
-                reference_number=p.reference_number
-            )
-            # Update bill status if covered?
-            # Basic logic: let bill logic handle status or leave as PENDING for accountant review
-        
-        # Add student employees
-        
-        # Add student employees
-        if session.student_employees.exists():
-            bill.student_employees.set(session.student_employees.all())
-        
-        for i in items:
-            sold_qty = i.quantity_sold
-            if sold_qty > 0:
-                BillItem.objects.create(
-                    bill=bill,
-                    item=i.item,
-                    quantity=sold_qty,
-                    price=i.item.price
-                )
-                total_amount += sold_qty * i.item.price
-        
-        bill.total_amount = total_amount
-        bill.save()
-        
         return redirect('bill_detail', pk=bill.id)
         
     # If GET, just go back to edit page
@@ -352,9 +321,11 @@ def create_inventory_log(request):
     if request.method == 'POST':
         form = InventoryLogForm(request.POST)
         if form.is_valid():
-            log = form.save(commit=False)
-            log.created_by = request.user
-            log.save()
+            with transaction.atomic():
+                log = form.save(commit=False)
+                log.created_by = request.user
+                log.save()
+                sync_log_stock(log, request.user)
             return redirect('inventory_list')
     else:
         form = InventoryLogForm()
@@ -371,7 +342,9 @@ def close_inventory_log(request, pk):
         log.quantity_returned = qty_returned
         log.date_returned = timezone.now()
         log.is_closed = True
-        log.save()
+        with transaction.atomic():
+            log.save()
+            sync_log_stock(log, request.user)
         sold_qty = log.quantity_taken - log.quantity_returned
         if sold_qty > 0:
             new_bill = Bill.objects.create(
@@ -389,16 +362,40 @@ def close_inventory_log(request, pk):
         return redirect('inventory_list')
     return render(request, 'core/inventory_close.html', {'log': log})
 
+def _item_catalogue_etag(request):
+    return f"items-{get_item_catalogue_version()}-{request.GET.get('scope', 'active')}"
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@etag(_item_catalogue_etag)
+def item_catalogue_json(request):
+    """
+    Item id/name/price list fetched by the bill and session forms. Browsers keep it and
+    revalidate with If-None-Match, getting an empty 304 until an item changes.
+    `?scope=all` includes inactive items (bill forms can still select them).
+    """
+    catalogue = item_catalogue(active_only=request.GET.get('scope') != 'all')
+    return HttpResponse(catalogue['json'], content_type='application/json')
+
+@login_required
+@user_passes_test(lambda u: check_permission(u, 'billing') or check_permission(u, 'customers'))
+def customer_lookup(request):
+    """
+    Type-ahead for the bill forms' customer select: `?q=` prefix of a name or
+    contact number, answered in Select2's {"results": [{"id", "text"}]} format.
+    """
+    return JsonResponse({'results': customer_suggestions(request.GET.get('q', ''))})
+
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'inventory'))
 def item_list(request):
-    items = Item.objects.all()
+    items = KeysetPaginator(Item.objects.all(), 50, ordering=['id']).page(request.GET.get('cursor'))
     return render(request, 'core/item_list.html', {'items': items})
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'customers'))
 def customer_list(request):
-    customers = Customer.objects.all()
+    customers = KeysetPaginator(Customer.objects.all(), 50, ordering=['id']).page(request.GET.get('cursor'))
     return render(request, 'core/customer_list.html', {'customers': customers})
 
 @login_required
@@ -435,6 +432,34 @@ def delete_customer(request, pk):
         return redirect('customer_list')
     return render(request, 'core/form_generic.html', {'form': None, 'title': f'Delete Customer {cust.customer_name}', 'object': cust})
 
+IMPORT_PERMISSIONS = {'items': 'inventory', 'customers': 'customers', 'vendors': 'vendors'}
+IMPORT_LIST_URLS = {'items': 'item_list', 'customers': 'customer_list', 'vendors': 'vendor_list'}
+
+@login_required
+def import_master_data(request, kind):
+    """Upload a CSV/XLSX of items, customers or vendors; see core.imports for the rules."""
+    if kind not in IMPORTERS:
+        raise Http404
+    if not check_permission(request.user, IMPORT_PERMISSIONS[kind]):
+        return redirect('dashboard')
+    result = error = None
+    if request.method == 'POST' and request.FILES.get('file'):
+        upload = request.FILES['file']
+        try:
+            result = import_rows(kind, read_rows(upload, upload.name), dry_run=bool(request.POST.get('dry_run')))
+        except ImportFileError as e:
+            error = str(e)
+    importer = IMPORTERS[kind]
+    return render(request, 'core/import_form.html', {
+        'kind': kind,
+        'title': f"Import {kind.title()}",
+        'columns': list(importer.fields),
+        'key': importer.key,
+        'result': result,
+        'error': error,
+        'list_url': IMPORT_LIST_URLS[kind],
+    })
+
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'inventory'))
 def create_item(request):
@@ -471,54 +496,18 @@ def delete_item(request, pk):
 @user_passes_test(lambda u: check_permission(u, 'billing'))
 def billing_home(request):
     # Fetch bills based on permissions
+    filters = BillQuery(request.GET)
     if request.user.is_supervisor_or_admin() or request.user.has_module_access('billing'):
-        qs = Bill.objects.all().order_by('-created_at')
+        qs = filters.queryset()
     else:
-        qs = Bill.objects.filter(created_by=request.user).order_by('-created_at')
-
-    # Filters
-    bill_type = request.GET.get('bill_type')
-    payment_status = request.GET.get('payment_status')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    q = request.GET.get('q')
-
-    if bill_type:
-        qs = qs.filter(bill_type=bill_type)
-    if payment_status:
-        qs = qs.filter(payment_status=payment_status)
-    if start_date:
-        try:
-            sd = datetime.fromisoformat(start_date)
-            qs = qs.filter(created_at__gte=sd)
-        except Exception:
-            pass
-    if end_date:
-        try:
-            ed = datetime.fromisoformat(end_date)
-            qs = qs.filter(created_at__lte=ed)
-        except Exception:
-            pass
-    if q:
-        qs = qs.filter(Q(invoice_number__icontains=q) | Q(customer__customer_name__icontains=q) | Q(customer_name__icontains=q))
+        qs = filters.queryset(user=request.user)
 
     # Pagination
-    page = request.GET.get('page', 1)
-    paginator = Paginator(qs, 20) # Show 20 per page
-    try:
-        bills = paginator.page(page)
-    except PageNotAnInteger:
-        bills = paginator.page(1)
-    except EmptyPage:
-        bills = paginator.page(paginator.num_pages)
+    bills = KeysetPaginator(qs, 20).page(request.GET.get('cursor')) # Show 20 per page
 
     context = {
         'bills': bills,
-        'filter_bill_type': bill_type,
-        'filter_payment_status': payment_status,
-        'filter_start_date': start_date,
-        'filter_end_date': end_date,
-        'q': q,
+        **filters.context(),
     }
     return render(request, 'core/billing_home.html', context)
 
@@ -532,7 +521,6 @@ def create_bill(request, bill_type):
     else:
         template_name = 'core/bill_form_sales.html'
 
-    items = Item.objects.all()
     if request.method == 'POST':
         form = BillForm(request.POST)
 
@@ -598,8 +586,7 @@ def create_bill(request, bill_type):
                 # messages.error(request, "Cannot generate a bill with no items. Please add at least one item.")
                 form.add_error(None, "Cannot generate a bill with no items. Please add at least one item.")
                 
-                items = Item.objects.all()
-                items_mapping = {item.id: str(item.price) for item in items}
+                catalogue = item_catalogue()
                 if bill_type == 'INNER':
                     template_name = 'core/bill_form_inner.html'
                 elif bill_type == 'OUTER':
@@ -612,8 +599,7 @@ def create_bill(request, bill_type):
                     'formset': formset,
                     'payment_formset': payment_formset, # ensure this is passed
                     'bill_type': bill_type,
-                    'items': items,
-                    'items_json': json.dumps(items_mapping)
+                    'items': catalogue['items']
                 })
 
             # 2.5 Validation: Total Paid must match Grand Total for SALES bills (Only if PAID)
@@ -635,30 +621,26 @@ def create_bill(request, bill_type):
                                  amount = p_form.cleaned_data.get('amount') or Decimal('0')
                                  if amount <= 0:
                                      p_form.add_error('amount', "Payment amount must be greater than 0.")
-                                     items = Item.objects.all()
-                                     items_mapping = {item.id: str(item.price) for item in items}
+                                     catalogue = item_catalogue()
                                      return render(request, template_name, {
                                         'form': form,
                                         'formset': formset,
                                         'payment_formset': payment_formset,
                                         'bill_type': bill_type,
-                                        'items': items,
-                                        'items_json': json.dumps(items_mapping)
+                                        'items': catalogue['items']
                                      })
                                  total_paid += amount
                     
                     if abs(total_paid - grand_total) > Decimal('0.5'):
                         form.add_error(None, f"Total Paid ({total_paid}) must match Grand Total ({grand_total}) for Paid Sales Bills.")
                         
-                        items = Item.objects.all()
-                        items_mapping = {item.id: str(item.price) for item in items}
+                        catalogue = item_catalogue()
                         return render(request, template_name, {
                             'form': form,
                             'formset': formset,
                             'payment_formset': payment_formset,
                             'bill_type': bill_type,
-                            'items': items,
-                            'items_json': json.dumps(items_mapping)
+                            'items': catalogue['items']
                         })
 
                         return render(request, template_name, {
@@ -666,8 +648,7 @@ def create_bill(request, bill_type):
                             'formset': formset,
                             'payment_formset': payment_formset,
                             'bill_type': bill_type,
-                            'items': items,
-                            'items_json': json.dumps(items_mapping)
+                            'items': catalogue['items']
                         })
 
             # 2.6 Validation: Advance Payment for OUTER bills
@@ -682,71 +663,39 @@ def create_bill(request, bill_type):
                 
                 if advance_payment < 0:
                      form.add_error('advance_payment', "Advance payment cannot be negative.")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping)
+                        'items': catalogue['items']
                     })
 
                 if advance_payment > grand_total:
                      form.add_error('advance_payment', f"Advance payment ({advance_payment}) cannot be greater than Total Amount ({grand_total}).")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping)
+                        'items': catalogue['items']
                     })
                 
                 if payment_status == 'PENDING' and advance_payment == grand_total and grand_total > 0:
                      form.add_error('advance_payment', "Advance payment equals Total Amount. Please change status to PAID.")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping)
+                        'items': catalogue['items']
                     })
 
-            # 3. Save Bill and Items
-            bill = form.save(commit=False)
-            bill.bill_type = bill_type
-            bill.created_by = request.user
-            bill.save()
-            form.save_m2m() # Save student_employees relation
-            
-            total = Decimal('0')
-            for v in aggregated.values():
-                bi = BillItem.objects.create(
-                    bill=bill,
-                    item=v['item'],
-                    custom_item_name=v['custom_item_name'] or None,
-                    quantity=v['quantity'],
-                    price=v['price']
-                )
-                total += Decimal(bi.price) * bi.quantity
-            bill.total_amount = total
-            bill.save()
-            
-            # Save payments (only for SALES)
-            if payment_formset:
-                payments = payment_formset.save(commit=False)
-                for payment in payments:
-                    payment.bill = bill
-                    payment.save()
-                for obj in payment_formset.deleted_objects:
-                    obj.delete()
+            # 3. Save Bill, Items and Payments in one transaction
+            bill = BillWriter(form, aggregated.values(), payment_formset).save(bill_type=bill_type, created_by=request.user)
 
             messages.success(request, "Bill Generated Successfully")
             return redirect('bill_detail', pk=bill.id)
@@ -754,26 +703,24 @@ def create_bill(request, bill_type):
         form = BillForm()
         formset = BillItemFormSet()
         payment_formset = BillPaymentFormSet(prefix='payments')
-    items = Item.objects.all()
-    items_mapping = {item.id: str(item.price) for item in items}
+    catalogue = item_catalogue()
     return render(request, template_name, {
         'form': form,
         'formset': formset,
         'payment_formset': payment_formset,
         'bill_type': bill_type,
-        'items': items,
-        'items_json': json.dumps(items_mapping)
+        'items': catalogue['items']
     })
 
 @login_required
 def bill_detail(request, pk):
-    bill = get_object_or_404(Bill, pk=pk)
+    bill = get_object_or_404(Bill.objects.select_related('customer', 'created_by'), pk=pk)
     
     # Check permission
     can_view = False
     if request.user.role in ['ADMIN', 'SUPERVISOR', 'ACCOUNTANT']:
         can_view = True
-    elif bill.created_by == request.user:
+    elif bill.created_by_id == request.user.id:
         can_view = True
     elif request.user.has_module_access('billing'):
         can_view = True
@@ -789,7 +736,7 @@ def bill_detail(request, pk):
          messages.error(request, "Unauthorized to view this bill")
          return redirect('dashboard')
          
-    return render(request, 'core/bill_print.html', {'bill': bill})
+    return render(request, 'core/bill_print.html', {'bill': bill, 'invoice_html': render_bill_invoice(bill)})
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'billing'))
@@ -797,114 +744,84 @@ def bill_list(request):
     # If admin/supervisor, see all.
     # If employee with billing access, see all? or just their own?
     # Usually billing staff needs to see all bills to manage them.
+    filters = BillQuery(request.GET)
     if request.user.is_supervisor_or_admin() or request.user.has_module_access('billing'):
-        qs = Bill.objects.all().order_by('-created_at')
+        qs = filters.queryset()
     else:
-        qs = Bill.objects.filter(created_by=request.user).order_by('-created_at')
-
-    # Filters
-    bill_type = request.GET.get('bill_type')
-    payment_status = request.GET.get('payment_status')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    sort_by = request.GET.get('sort_by', 'date_desc')
-    q = request.GET.get('q')
-
-    if bill_type:
-        qs = qs.filter(bill_type=bill_type)
-    if payment_status:
-        qs = qs.filter(payment_status=payment_status)
-    if start_date:
-        try:
-            sd = datetime.fromisoformat(start_date)
-            qs = qs.filter(created_at__gte=sd)
-        except Exception:
-            pass
-    if end_date:
-        try:
-            ed = datetime.fromisoformat(end_date)
-            qs = qs.filter(created_at__lte=ed)
-        except Exception:
-            pass
-    if q:
-        qs = qs.filter(Q(invoice_number__icontains=q) | Q(customer__customer_name__icontains=q) | Q(customer_name__icontains=q))
+        qs = filters.queryset(user=request.user)
 
     # paginate
-    page = request.GET.get('page', 1)
-    paginator = Paginator(qs, 25)
-    try:
-        page_obj = paginator.page(page)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    page_obj = KeysetPaginator(qs, 25).page(request.GET.get('cursor'))
 
     return render(request, 'core/bill_list.html', {
         'bills': page_obj,
-        'filter_bill_type': bill_type,
-        'filter_payment_status': payment_status,
-        'filter_start_date': start_date,
-        'filter_end_date': end_date,
-        'q': q,
-        'paginator': paginator,
+        **filters.context(),
         'page_obj': page_obj,
     })
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'billing'))
 def export_bills(request):
+    # The export links carry the list filters but historically ignore the search box
+    filters = BillQuery(request.GET, search=False)
     if request.user.is_supervisor_or_admin() or request.user.has_module_access('billing'):
-        qs = Bill.objects.all().order_by('-created_at')
+        qs = filters.queryset()
     else:
-        qs = Bill.objects.filter(created_by=request.user).order_by('-created_at')
-
-    bill_type = request.GET.get('bill_type')
-    payment_status = request.GET.get('payment_status')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    if bill_type:
-        qs = qs.filter(bill_type=bill_type)
-    if payment_status:
-        qs = qs.filter(payment_status=payment_status)
-    if start_date:
-        try:
-            sd = datetime.fromisoformat(start_date)
-            qs = qs.filter(created_at__gte=sd)
-        except Exception:
-            pass
-    if end_date:
-        try:
-            ed = datetime.fromisoformat(end_date)
-            qs = qs.filter(created_at__lte=ed)
-        except Exception:
-            pass
+        qs = filters.queryset(user=request.user)
 
     fmt = request.GET.get('format', 'csv')
     if fmt == 'csv':
         # stream CSV
-        response = HttpResponse(content_type='text/csv')
         filename = f"bills_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        writer = csv.writer(response)
-        writer.writerow(['Invoice', 'Type', 'Customer', 'Created By', 'Created At (IST)', 'Total', 'Payment Status'])
-        for bill in qs:
-            created_ist = bill.created_at.astimezone(ZoneInfo('Asia/Kolkata')).strftime('%Y-%m-%d %H:%M:%S')
-            customer = bill.customer.customer_name if bill.customer else (bill.customer_name or '')
-            writer.writerow([bill.invoice_number, bill.get_bill_type_display(), customer, bill.created_by.username, created_ist, str(bill.total_amount), bill.get_payment_status_display()])
-        return response
+        return csv_stream_response(filename, bill_rows(qs))
     elif fmt == 'pdf':
         if not WEASYPRINT_AVAILABLE:
             return HttpResponse('PDF export requires `weasyprint` package. Install with `pip install weasyprint`', status=400)
-        # render html template and convert to pdf
-        html_string = render_to_string('core/bill_export_pdf.html', {'bills': qs, 'now': datetime.now()})
-        html = HTML(string=html_string)
-        pdf = html.write_pdf()
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="bills_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-        return response
+        # Rendered by `manage.py run_export_jobs`; the job page polls until the PDF is ready
+        job = enqueue_bill_pdf_export(request.user, request.GET)
+        return redirect('export_job_detail', pk=job.id)
     else:
         return HttpResponse('Format not supported', status=400)
 
+def _get_export_job(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+    if job.created_by_id != request.user.pk and request.user.role != 'ADMIN':
+        return None
+    return job
+
+def _export_job_files(job):
+    return [(name, reverse('export_job_download', args=[job.id, part])) for part, name in enumerate(job.files, 1)]
+
+@login_required
+def export_job_detail(request, pk):
+    job = _get_export_job(request, pk)
+    if job is None:
+        messages.error(request, "Unauthorized to view this export")
+        return redirect('dashboard')
+    return render(request, 'core/export_job.html', {'job': job, 'files': _export_job_files(job)})
+
+@login_required
+def export_job_status(request, pk):
+    job = _get_export_job(request, pk)
+    if job is None:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'error': job.error,
+        'files': [{'name': name, 'url': url} for name, url in _export_job_files(job)],
+    })
+
+@login_required
+def export_job_download(request, pk, part):
+    job = _get_export_job(request, pk)
+    if job is None or job.status != 'DONE' or not 1 <= part <= len(job.files):
+        raise Http404("Export not available")
+    path = os.path.join(export_root(), job.files[part - 1])
+    if not os.path.exists(path):
+        raise Http404("Export file has been removed")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.files[part - 1])
+
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'billing'))
 def edit_bill(request, pk):
@@ -919,7 +836,6 @@ def edit_bill(request, pk):
     else:
         template_name = 'core/bill_form_sales.html'
 
-    items = Item.objects.all()
     if request.method == 'POST':
         form = BillForm(request.POST, instance=bill)
         formset = BillItemFormSet(request.POST, instance=bill)
@@ -1066,8 +982,7 @@ def edit_bill(request, pk):
             if not aggregated:
                 # messages.error(request, "Cannot save a bill with no items. Please add at least one item.")
                 form.add_error(None, "Cannot save a bill with no items. Please add at least one item.")
-                items = Item.objects.all()
-                items_mapping = {item.id: str(item.price) for item in items}
+                catalogue = item_catalogue()
                 if bill.bill_type == 'INNER':
                     template_name = 'core/bill_form_inner.html'
                 elif bill.bill_type == 'OUTER':
@@ -1080,8 +995,7 @@ def edit_bill(request, pk):
                     'formset': formset,
                     'payment_formset': payment_formset, # ensure this is passed (not present in original but seems fine to pass)
                     'bill_type': bill.bill_type,
-                    'items': items,
-                    'items_json': json.dumps(items_mapping),
+                    'items': catalogue['items'],
                     'editing': True,
                 })
 
@@ -1096,43 +1010,37 @@ def edit_bill(request, pk):
                 
                 if advance_payment < 0:
                      form.add_error('advance_payment', "Advance payment cannot be negative.")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill.bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping),
+                        'items': catalogue['items'],
                         'editing': True,
                     })
 
                 if advance_payment > grand_total:
                      form.add_error('advance_payment', f"Advance payment ({advance_payment}) cannot be greater than Total Amount ({grand_total}).")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill.bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping),
+                        'items': catalogue['items'],
                         'editing': True,
                     })
                 
                 if payment_status == 'PENDING' and advance_payment == grand_total and grand_total > 0:
                      form.add_error('advance_payment', "Advance payment equals Total Amount. Please change status to PAID.")
-                     items = Item.objects.all()
-                     items_mapping = {item.id: str(item.price) for item in items}
+                     catalogue = item_catalogue()
                      return render(request, template_name, {
                         'form': form,
                         'formset': formset,
                         'payment_formset': payment_formset,
                         'bill_type': bill.bill_type,
-                        'items': items,
-                        'items_json': json.dumps(items_mapping),
+                        'items': catalogue['items'],
                         'editing': True,
                     })
 
@@ -1152,15 +1060,13 @@ def edit_bill(request, pk):
                                  if amount <= 0:
                                      p_form.add_error('amount', "Payment amount must be greater than 0.")
                                      # Force re-render if invalid
-                                     items = Item.objects.all()
-                                     items_mapping = {item.id: str(item.price) for item in items}
+                                     catalogue = item_catalogue()
                                      return render(request, template_name, {
                                         'form': form,
                                         'formset': formset,
                                         'payment_formset': payment_formset,
                                         'bill_type': bill.bill_type,
-                                        'items': items,
-                                        'items_json': json.dumps(items_mapping),
+                                        'items': catalogue['items'],
                                         'editing': True,
                                     })
                                  total_paid += amount
@@ -1168,46 +1074,18 @@ def edit_bill(request, pk):
                     if abs(total_paid - grand_total) > Decimal('0.5'):
                         form.add_error(None, f"Total Paid ({total_paid}) must match Grand Total ({grand_total}) for Paid Sales Bills.")
                         
-                        items = Item.objects.all()
-                        items_mapping = {item.id: str(item.price) for item in items}
+                        catalogue = item_catalogue()
                         return render(request, template_name, {
                             'form': form,
                             'formset': formset,
                             'payment_formset': payment_formset,
                             'bill_type': bill.bill_type,
-                            'items': items,
-                            'items_json': json.dumps(items_mapping),
+                            'items': catalogue['items'],
                             'editing': True,
                         })
 
-            # 3. Save Bill and Items
-            bill = form.save(commit=False)
-            bill.save()
-            form.save_m2m() # Save student_employees relation
-            
-            # remove existing items and recreate grouped ones
-            bill.items.all().delete()
-            total = Decimal('0')
-            for v in aggregated.values():
-                bi = BillItem.objects.create(
-                    bill=bill,
-                    item=v['item'],
-                    custom_item_name=v['custom_item_name'] or None,
-                    quantity=v['quantity'],
-                    price=v['price']
-                )
-                total += Decimal(bi.price) * bi.quantity
-            bill.total_amount = total
-            bill.save()
-            
-            # Save payments
-            if payment_formset:
-                payments = payment_formset.save(commit=False)
-                for payment in payments:
-                    payment.bill = bill
-                    payment.save()
-                for obj in payment_formset.deleted_objects:
-                    obj.delete()
+            # 3. Save Bill, Items and Payments in one transaction; only changed lines are written
+            bill = BillWriter(form, aggregated.values(), payment_formset).save()
 
             messages.success(request, 'Bill updated successfully')
             return redirect('bill_detail', pk=bill.id)
@@ -1221,15 +1099,13 @@ def edit_bill(request, pk):
             template_name = 'core/bill_form_outer.html'
         else:
             template_name = 'core/bill_form_sales.html'
-    items = Item.objects.all()
-    items_mapping = {item.id: str(item.price) for item in items}
+    catalogue = item_catalogue()
     return render(request, template_name, {
         'form': form,
         'formset': formset,
         'payment_formset': payment_formset,
         'bill_type': bill.bill_type,
-        'items': items,
-        'items_json': json.dumps(items_mapping),
+        'items': catalogue['items'],
         'editing': True,
     })
 
@@ -1249,7 +1125,7 @@ def delete_bill(request, pk):
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'vendors'))
 def vendor_list(request):
-    vendors = Vendor.objects.all()
+    vendors = KeysetPaginator(Vendor.objects.all(), 50, ordering=['id']).page(request.GET.get('cursor'))
     return render(request, 'core/vendor_list.html', {'vendors': vendors})
 
 @login_required
@@ -1292,26 +1168,8 @@ def delete_vendor(request, pk):
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'vendors'))
 def export_vendors(request):
-    vendors = Vendor.objects.all()
-    response = HttpResponse(content_type='text/csv')
     filename = f"vendors_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    # S.no, Name, A/c Holder’s Name, Name of the Bank, Account Number, Ifsc Code, Branch, Mobile Number
-    writer.writerow(['S.no', 'Name', 'A/c Holder\'s Name', 'Name of the Bank', 'Account Number', 'Ifsc Code', 'Branch', 'Mobile Number'])
-    
-    for idx, vendor in enumerate(vendors, 1):
-        writer.writerow([
-            idx,
-            vendor.name,
-            vendor.account_holder_name,
-            vendor.bank_name,
-            vendor.ac_number,
-            vendor.ifsc_code,
-            vendor.branch,
-            vendor.contact
-        ])
-    return response
+    return csv_stream_response(filename, vendor_rows(Vendor.objects.all()))
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'employees'))
@@ -1362,11 +1220,8 @@ def purchase_list(request):
     if end_date:
         purchases = purchases.filter(ordered_date__lte=end_date)
         
-    # Attempt to order by received_date or ordered_date instead of date if date does not exist on this model
-    try:
-        purchases = purchases.order_by('-ordered_date')
-    except Exception:
-        purchases = purchases.order_by('-date')
+    purchases = purchases.select_related('vendor', 'purchased_by')
+    purchases = KeysetPaginator(purchases, 25, ordering=['-ordered_date', '-id']).page(request.GET.get('cursor'))
 
     return render(request, 'core/purchase_list.html', {
         'purchases': purchases,
@@ -1379,36 +1234,8 @@ def purchase_list(request):
 @user_passes_test(lambda u: check_permission(u, 'purchases'))
 def export_purchases(request):
     purchases = PurchaseRecord.objects.all().order_by('-ordered_date')
-    
-    response = HttpResponse(content_type='text/csv')
     filename = f"purchases_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    
-    # Headers: S.no, Purchase Order ID, Vendor Name, Bill No, Ordered Date, Received Date, Amount, Payment Status, Payment Date
-    writer.writerow(['S.no', 'Purchase Order ID', 'Vendor Name', 'Bill No', 'Ordered Date', 'Received Date', 'Amount', 'Payment Status', 'Payment Date'])
-    
-    grand_total = Decimal(0)
-    for idx, purchase in enumerate(purchases, 1):
-        writer.writerow([
-            idx,
-            purchase.purchase_order_id,
-            purchase.vendor.name,
-            purchase.bill_no,
-            purchase.ordered_date,
-            purchase.received_date,
-            purchase.total_amount,
-            purchase.get_payment_status_display(),
-            purchase.payment_date
-        ])
-        grand_total += purchase.total_amount
-        
-    writer.writerow([])
-    # Grand Total Row
-    writer.writerow(['', '', '', '', '', 'Grand Total', '', ''])
-    writer.writerow(['', '', '', '', '', grand_total, '', ''])
-    
-    return response
+    return csv_stream_response(filename, purchase_rows(purchases))
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'purchases'))
@@ -1423,45 +1250,14 @@ def export_pending_purchases(request):
     if end_date_str:
         query &= Q(ordered_date__lte=end_date_str)
         
-    purchases = PurchaseRecord.objects.filter(query).order_by('ordered_date').select_related('vendor')
-    
-    response = HttpResponse(content_type='text/csv')
+    purchases = PurchaseRecord.objects.filter(query).order_by('ordered_date')
     filename = f"pending_payments_{start_date_str}_to_{end_date_str}.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    
+
     # Title
     start_fmt = datetime.strptime(start_date_str, '%Y-%m-%d').strftime('%d-%m-%Y') if start_date_str else 'Start'
     end_fmt = datetime.strptime(end_date_str, '%Y-%m-%d').strftime('%d-%m-%Y') if end_date_str else 'End'
-    writer.writerow([f"Give Life Vendor Payment Details for the period from {start_fmt} to {end_fmt}"])
-    writer.writerow([])
-    
-    # Headers
-    # S.no, purchase order , Name, A/c Holder’s Name, Name of the Bank, Account Number, IFSC Code, Branch, Mobile Number, Total Amount to Pay
-    headers = ['S.no', 'Purchase Order', 'Name', 'A/c Holder\'s Name', 'Name of the Bank', 'Account Number', 'IFSC Code', 'Branch', 'Mobile Number', 'Total Amount to Pay']
-    writer.writerow(headers)
-    
-    grand_total = Decimal(0)
-    for idx, p in enumerate(purchases, 1):
-        v = p.vendor
-        writer.writerow([
-            idx,
-            p.purchase_order_id,
-            v.name,
-            v.account_holder_name or '',
-            v.bank_name or '',
-            v.ac_number or '',
-            v.ifsc_code or '',
-            v.branch or '',
-            v.contact or '',
-            p.total_amount
-        ])
-        grand_total += p.total_amount
-        
-    writer.writerow([])
-    writer.writerow(['', '', '', '', '', '', '', '', 'Grand Total', grand_total])
-    
-    return response
+    title = f"Give Life Vendor Payment Details for the period from {start_fmt} to {end_fmt}"
+    return csv_stream_response(filename, pending_purchase_rows(purchases, title))
 
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'purchases'))
@@ -1502,7 +1298,8 @@ def edit_purchase(request, pk):
 @login_required
 @user_passes_test(lambda u: check_permission(u, 'vendors'))
 def vendor_payment_list(request):
-    payments = VendorPayment.objects.all().order_by('-date')
+    payments = VendorPayment.objects.select_related('vendor').order_by('-date')
+    payments = KeysetPaginator(payments, 25).page(request.GET.get('cursor'))
     return render(request, 'core/vendor_payment_list.html', {'payments': payments})
 
 @login_required
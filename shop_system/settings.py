@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,6 +19,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestCostMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +61,65 @@ DATABASES = {
     }
 }
 
+# Cache Configuration
+# File based so every gunicorn worker on the host shares the same entries
+# (e.g. the role permission version used to invalidate per-process caches).
+# MAX_ENTRIES leaves room for one rendered invoice per recently viewed bill; past it,
+# a third of the entries are culled at random.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / '.django_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# `manage.py test` clears the cache between tests: keep it in memory so a test run on a
+# deployed checkout never wipes the workers' cache directory
+if sys.argv[1:2] == ['test']:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Seconds the dashboard's aggregate metrics are cached (also dropped whenever a bill changes)
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# Seconds a rendered invoice is cached; entries are keyed by a fingerprint of the bill, its lines and the
+# customer and item catalogue versions, so edits to any of them never serve stale HTML
+BILL_INVOICE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds the item list and price JSON used by the bill and session forms are cached (new version on any item change)
+ITEM_CATALOGUE_CACHE_TIMEOUT = 60 * 60
+
+# Seconds the approximate row counts shown by paginated lists are cached
+LIST_COUNT_CACHE_TIMEOUT = 300
+
+# Most rows returned by the dashboard quick search
+SEARCH_RESULT_LIMIT = 25
+
+# Customer type-ahead on the bill forms: rows per answer, and how long each prefix is cached
+CUSTOMER_LOOKUP_LIMIT = 20
+CUSTOMER_LOOKUP_CACHE_TIMEOUT = 60 * 5
+
+# Financial year / quarter reports: the open quarter is cached this long; a quarter is
+# frozen into PeriodSnapshot once it ended more than PERIOD_FREEZE_AFTER_DAYS ago
+PERIOD_REPORT_CACHE_TIMEOUT = 60 * 10
+PERIOD_FREEZE_AFTER_DAYS = 7
+
+# Bulk CSV/XLSX import of items, customers and vendors: rows written per batch, and
+# how many row errors are kept for the report (the total is always counted)
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 200
+
+# Background PDF exports (rendered by `python manage.py run_export_jobs`)
+EXPORT_ROOT = BASE_DIR / 'exports'
+EXPORT_PDF_BILLS_PER_PART = 2000
+EXPORT_WORKER_PROCESSES = 2
+# Seconds after which a RUNNING job is assumed to have lost its worker and is queued again;
+# keep it above the time the largest export takes to render
+EXPORT_JOB_TIMEOUT = 60 * 60
+
+# JSON results of `python manage.py run_benchmarks`, one file per run, for comparing commits
+BENCHMARK_ROOT = BASE_DIR / 'benchmarks'
+
 AUTH_USER_MODEL = 'core.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -81,3 +142,22 @@ MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
 
+
+# Request cost instrumentation (core.instrumentation): Server-Timing header on every
+# response (it tells any client, logged in or not, our query counts and database time,
+# so development only), and the number of recent requests per view kept for rolling percentiles
+REQUEST_SERVER_TIMING = DEBUG
+REQUEST_STATS_WINDOW = 1000
+
+# One key=value line per request on the `core.requests` logger: at DEBUG normally, at
+# WARNING when a view goes over its query budget. Set the level to DEBUG to see them all.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}